@@ -0,0 +1,5 @@
+"""Offline micro-benchmarks for easy_langchain_rag components.
+
+Run with `python -m benchmarks run -o results.json` and compare two runs with
+`python -m benchmarks compare baseline.json results.json`.
+"""
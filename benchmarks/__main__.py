@@ -0,0 +1,132 @@
+import sys
+import logging
+import argparse
+from .harness import compare_results, load_results, write_results
+
+
+def run(args) -> int:
+    from .suite import BENCHMARKS
+
+    names = args.only or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(unknown)}. Available: {', '.join(BENCHMARKS)}")
+        return 2
+
+    results = {}
+    for name in names:
+        print(f"Running {name}...", flush=True)
+        results[name] = BENCHMARKS[name](quick=args.quick)
+        for metric, value in results[name].items():
+            print(f"  {metric:<20} {value:,.4f}" if isinstance(value, float) else f"  {metric:<20} {value}")
+
+    write_results(results, args.output)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+def compare(args) -> int:
+    rows = compare_results(load_results(args.baseline), load_results(args.current), threshold=args.threshold)
+    regressions = [row for row in rows if row["regression"]]
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['benchmark']:<22} {row['metric']:<20} {row['baseline']:>14,.4f} -> {row['current']:>14,.4f} "
+              f"{row['change']:>+8.1%} {flag}")
+    print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def load(args) -> int:
+    from .load import flatten, run_load
+
+    def report(level: int, metrics: dict):
+        print(f"{level:>6} {metrics['turns']:>7} {metrics['errors']:>6} {metrics['turns_per_s']:>10,.1f} "
+              f"{metrics['ttft_p50_ms']:>10,.1f} {metrics['ttft_p99_ms']:>10,.1f} "
+              f"{metrics['turn_p50_ms']:>10,.1f} {metrics['turn_p99_ms']:>10,.1f}", flush=True)
+
+    print(f"{'users':>6} {'turns':>7} {'errors':>6} {'turns/s':>10} {'ttft p50':>10} {'ttft p99':>10} "
+          f"{'turn p50':>10} {'turn p99':>10}")
+    results = run_load(
+        backend=args.backend,
+        concurrency=args.concurrency,
+        turns=args.turns,
+        token_delay=args.token_delay,
+        saver_latency=args.saver_latency,
+        pool_size=args.pool_size,
+        think_time=args.think_time,
+        on_level=report,
+    )
+    if args.output:
+        write_results({f"graph_load_{args.backend}": flatten(results)}, args.output)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+def parity(args) -> int:
+    from .parity import run_parity
+
+    results = run_parity(model_name=args.model, backends=args.backends, texts=args.texts,
+                         onnx_dir=args.onnx_dir, processes=args.processes)
+    failures = 0
+    for name, metrics in results.items():
+        print(name)
+        for metric, value in metrics.items():
+            print(f"  {metric:<20} {value:,.4f}")
+        if metrics.get("min_cosine", 1.0) < args.min_cosine:
+            failures += 1
+            print(f"  FAIL: min_cosine below {args.min_cosine}")
+    if args.output:
+        write_results({"embedding_parity": {f"{name}_{metric}": value for name, metrics in results.items()
+                                            for metric, value in metrics.items()}}, args.output)
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write the results as JSON")
+    run_parser.add_argument("-o", "--output", default="bench_results.json")
+    run_parser.add_argument("--only", nargs="*", help="Only run these benchmarks")
+    run_parser.add_argument("--quick", action="store_true", help="Use small inputs for a fast smoke run")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="Relative change counted as a regression (default: 0.1)")
+    compare_parser.set_defaults(func=compare)
+
+    load_parser = commands.add_parser("load", help="Load test a compiled graph at increasing concurrency")
+    load_parser.add_argument("--backend", choices=["memory", "postgres", "redis"], default="memory",
+                             help="Checkpointer and history store: in-memory or local Postgres/Redis stand-ins")
+    load_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    load_parser.add_argument("--turns", type=int, default=5, help="Turns per user conversation")
+    load_parser.add_argument("--token-delay", type=float, default=0.002, help="Seconds between streamed tokens")
+    load_parser.add_argument("--saver-latency", type=float, default=0.001,
+                             help="Round trip of the Postgres/Redis checkpointer stand-in, in seconds")
+    load_parser.add_argument("--pool-size", type=int, default=10, help="Connections of the checkpointer stand-in")
+    load_parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between turns, in seconds")
+    load_parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    load_parser.set_defaults(func=load)
+
+    parity_parser = commands.add_parser("parity", help="Check embedding backends against the reference model")
+    parity_parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parity_parser.add_argument("--backends", nargs="+", choices=["onnx_int8", "onnx_fp32", "pool"],
+                               default=["onnx_int8", "onnx_fp32", "pool"])
+    parity_parser.add_argument("--texts", type=int, default=2000, help="Number of sentences embedded")
+    parity_parser.add_argument("--onnx-dir", default="onnx_model", help="Exported ONNX model, created if missing")
+    parity_parser.add_argument("--processes", type=int, help="Workers of the pool backend (default: all CPUs)")
+    parity_parser.add_argument("--min-cosine", type=float, default=0.98,
+                               help="Fail when any vector is less similar than this to its reference")
+    parity_parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    parity_parser.set_defaults(func=parity)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
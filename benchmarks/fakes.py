@@ -0,0 +1,418 @@
+"""Deterministic offline stand-ins used by the benchmarks.
+
+Nothing here touches the network: embeddings are hashed bag-of-words vectors,
+the chat model replays a fixed answer token by token, and the Postgres store
+keeps its rows in process memory while answering the same queries that
+`PostgresStoreConfig` sends. `LocalRedis` implements the Redis commands used by
+`RedisStoreConfig`, expiry included, and `LatencySaver` gives an in-memory
+checkpointer the round trip and connection limit of a networked one.
+"""
+import re
+import json
+import fnmatch
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import numpy as np
+from typing_extensions import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from langchain_core.embeddings import Embeddings
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple)
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self, dims: int = 384, latency: float = 0.0):
+        """
+        Hashed bag-of-words embeddings.
+
+        Texts sharing words get similar vectors, so similarity search behaves sensibly.
+
+        Args:
+            dims (int, optional): The dimensions of the vectors. Defaults to 384.
+            latency (float, optional): Seconds to sleep per call to imitate a real model. Defaults to 0.0.
+        """
+        self.dims = dims
+        self.latency = latency
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for word in _WORD_RE.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dims
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers every prompt with the same text, streamed word by word."""
+
+    response: str = "This is a deterministic answer from the fake chat model."
+    token_delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = "".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for token in re.findall(r"\S+\s*", self.response):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeCrossEncoder:
+    def __init__(self, latency_per_pair: float = 0.0002):
+        """
+        Pair scorer ranking passages by the share of query words they contain.
+
+        Args:
+            latency_per_pair (float, optional): Seconds spent per pair, like a CPU cross-encoder. Defaults to 0.0002.
+        """
+        self.latency_per_pair = latency_per_pair
+
+    def __call__(self, query: str, texts: List[str]) -> List[float]:
+        if self.latency_per_pair:
+            time.sleep(self.latency_per_pair * len(texts))
+        words = set(_WORD_RE.findall(query.lower()))
+        return [len(words & set(_WORD_RE.findall(text.lower()))) / (len(words) or 1) for text in texts]
+
+
+def _cosine_distance(a, b) -> float:
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    denominator = float(np.linalg.norm(a) * np.linalg.norm(b)) or 1.0
+    return 1.0 - float(np.dot(a, b)) / denominator
+
+
+class _LocalResult:
+    def __init__(self, rows: list):
+        self.rows = rows
+
+    def fetchall(self) -> list:
+        return self.rows
+
+
+_PARTITION_RE = re.compile(r"CREATE TABLE IF NOT EXISTS (\w+) PARTITION OF (\w+) FOR VALUES FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class _LocalConnection:
+    def __init__(self, store: "LocalPostgresStore"):
+        self.store = store
+
+    def execute(self, query: str, params: tuple = ()):
+        """Answer the history queries and partition DDL issued by PostgresStoreConfig."""
+        statement = " ".join(query.split())
+        if statement.startswith("CREATE EXTENSION") or statement.endswith("PARTITION BY RANGE (created_at)"):
+            return _LocalResult([])
+        match = _PARTITION_RE.match(statement)
+        if match:
+            name, _, start, end = match.groups()
+            with self.store._lock:
+                self.store.partitions.setdefault(
+                    name, {"range": (datetime.fromisoformat(start), datetime.fromisoformat(end)), "rows": []})
+            return _LocalResult([])
+        if statement.startswith("DROP TABLE"):
+            with self.store._lock:
+                self.store.partitions.pop(statement.split()[-1], None)
+            return _LocalResult([])
+        if "pg_inherits" in statement:
+            return _LocalResult([{"name": name} for name in list(self.store.partitions)])
+        if statement.startswith("INSERT INTO"):
+            prefix, key, value, embedding, created_at = params
+            row = {"prefix": prefix, "key": key, "value": json.loads(value), "embedding": embedding or [],
+                   "created_at": created_at}
+            with self.store._lock:
+                for partition in self.store.partitions.values():
+                    start, end = partition["range"]
+                    if start <= created_at < end:
+                        partition["rows"].append(row)
+                        return _LocalResult([])
+            raise ValueError(f"no partition of relation found for row with created_at {created_at}")
+
+        if "store_vectors" in statement or "distance" in statement:
+            embedding, prefix, start, end, _, limit = params
+            rows = [
+                {**row, "distance": _cosine_distance(embedding, row["embedding"])}
+                for row in self._rows(statement, prefix, start, end)
+            ]
+            rows.sort(key=lambda row: row["distance"])
+            keys = ("key", "value", "created_at", "updated_at", "distance")
+            return _LocalResult([{key: row[key] for key in keys if key in row} for row in rows[:limit]])
+        if len(params) == 3:
+            prefix, start, end = params
+            rows = self._rows(statement, prefix, start, end)
+        else:
+            (prefix,) = params
+            rows = self.store.rows(prefix)
+        rows = sorted(rows, key=lambda row: row["created_at"], reverse=True)[:2]
+        keys = ("prefix", "key", "value", "created_at", "updated_at")
+        return _LocalResult([{key: row[key] for key in keys if key in row} for row in rows])
+
+    def _rows(self, statement: str, prefix: str, start: datetime, end: datetime) -> list:
+        if "store_vectors" in statement:
+            candidates = self.store.rows(prefix)
+        else:
+            # Only the partitions overlapping the window are scanned, like partition pruning
+            candidates = [
+                row for partition in list(self.store.partitions.values())
+                if partition["range"][0] < end and partition["range"][1] > start
+                for row in partition["rows"] if row["prefix"] == prefix
+            ]
+        return [row for row in candidates if start <= row["created_at"] < end]
+
+
+class LocalPostgresStore:
+    """In-process stand-in for `langgraph.store.postgres.PostgresStore`."""
+
+    _databases: Dict[str, Dict[str, dict]] = {}
+    _partitioned: Dict[str, Dict[str, dict]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, conn_string: str, index: dict = None):
+        self.index = index or {}
+        with self._lock:
+            self.data = self._databases.setdefault(conn_string, {})
+            self.partitions = self._partitioned.setdefault(conn_string, {})
+        self.conn = _LocalConnection(self)
+
+    @classmethod
+    @contextmanager
+    def from_conn_string(cls, conn_string: str, index: dict = None):
+        yield cls(conn_string, index=index)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._databases.clear()
+            cls._partitioned.clear()
+
+    def setup(self):
+        return None
+
+    def rows(self, prefix: str) -> list:
+        return list(self.data.get(prefix, {}).values())
+
+    def put(self, namespace: tuple, key: str, value: dict, index=None):
+        fields = index or self.index.get("fields") or list(value)
+        text = " ".join(str(value.get(field, "")) for field in fields)
+        embed = self.index.get("embed")
+        now = datetime.now(timezone.utc)
+        prefix = ".".join(namespace)
+        with self._lock:
+            self.data.setdefault(prefix, {})[key] = {
+                "prefix": prefix,
+                "key": key,
+                "value": value,
+                "created_at": now,
+                "updated_at": now,
+                "embedding": embed.embed_query(text) if embed else [],
+            }
+
+
+class _LocalPipeline:
+    def __init__(self, client: "LocalRedis"):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self.calls.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> list:
+        # Queued commands run back to back under the lock, like MULTI/EXEC
+        with self.client._lock:
+            results = [method(*args, **kwargs) for method, args, kwargs in self.calls]
+        self.calls = []
+        return results
+
+
+class LocalRedis:
+    """In-process stand-in for the subset of `redis.Redis` used by `RedisStoreConfig`."""
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def _alive(self, key: str) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+    def pipeline(self, transaction: bool = True) -> _LocalPipeline:
+        return _LocalPipeline(self)
+
+    def rpush(self, key: str, *values) -> int:
+        with self._lock:
+            self._alive(key)
+            items = self._data.setdefault(key, [])
+            items.extend(self._encode(value) for value in values)
+            return len(items)
+
+    def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        with self._lock:
+            if not self._alive(key):
+                return []
+            items = self._data[key]
+            end = len(items) if end == -1 else end + 1
+            return list(items[start:end])
+
+    def set(self, key: str, value) -> bool:
+        with self._lock:
+            self._data[key] = self._encode(value)
+            self._expires.pop(key, None)
+            return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._data[key] if self._alive(key) else None
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self.get(key) for key in keys]
+
+    def scan_iter(self, match: str = "*", count: int = None) -> Iterator[bytes]:
+        with self._lock:
+            keys = [key for key in list(self._data) if self._alive(key) and fnmatch.fnmatchcase(key, match)]
+        for key in keys:
+            yield key.encode("utf-8")
+
+    def expireat(self, key: str, when: int) -> bool:
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = float(when)
+            return True
+
+    def delete(self, *keys) -> int:
+        with self._lock:
+            removed = sum(1 for key in keys if self._alive(key))
+            for key in keys:
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def flushall(self) -> bool:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            return True
+
+
+class LatencySaver(BaseCheckpointSaver):
+    def __init__(self, saver: BaseCheckpointSaver, latency: float = 0.001, pool_size: int = 10):
+        """
+        Checkpointer stand-in for a networked saver such as PostgresSaver or RedisSaver.
+
+        Every call holds one of `pool_size` connections and waits `latency`
+        seconds, as a round trip to the server would, before being served by
+        the wrapped (usually in-memory) saver.
+
+        Args:
+            saver (BaseCheckpointSaver): The saver that actually keeps the checkpoints.
+            latency (float, optional): Seconds added to every call. Defaults to 0.001.
+            pool_size (int, optional): Maximum number of concurrent calls. Defaults to 10.
+        """
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.latency = latency
+        self._pool = threading.BoundedSemaphore(pool_size)
+
+    @property
+    def config_specs(self) -> list:
+        return self.saver.config_specs
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    def _call(self, method, *args, **kwargs):
+        with self._pool:
+            if self.latency:
+                time.sleep(self.latency)
+            return method(*args, **kwargs)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self._call(self.saver.get_tuple, config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        yield from self._call(lambda: list(self.saver.list(config, filter=filter, before=before, limit=limit)))
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self._call(self.saver.put, config, checkpoint, metadata, new_versions)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return self._call(self.saver.put_writes, config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        return self._call(self.saver.delete_thread, thread_id)
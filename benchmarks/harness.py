@@ -0,0 +1,107 @@
+"""Timing, result files and run comparison shared by every benchmark."""
+import json
+import math
+import time
+import platform
+from datetime import datetime, timezone
+from typing_extensions import Callable, Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def summarize(samples: List[float]) -> dict:
+    """Summarize durations in seconds as millisecond statistics."""
+    return {
+        "runs": len(samples),
+        "mean_ms": sum(samples) / len(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def measure(fn: Callable, repeat: int, warmup: int = 1, setup: Callable = None) -> List[float]:
+    """
+    Time `fn` `repeat` times after `warmup` untimed calls.
+
+    Args:
+        fn (Callable): Called with the value returned by `setup`, or with no argument.
+        repeat (int): Number of timed calls.
+        warmup (int, optional): Number of untimed calls first. Defaults to 1.
+        setup (Callable, optional): Untimed call made before every call of `fn`. Defaults to None.
+
+    Returns:
+        List[float]: The duration of each timed call in seconds.
+    """
+    samples = []
+    for i in range(warmup + repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def write_results(results: Dict[str, dict], path: str) -> dict:
+    payload = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return payload
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def _direction(metric: str) -> int:
+    """1 if larger is better, -1 if smaller is better, 0 if the metric is informational."""
+    if metric.endswith("_per_s"):
+        return 1
+    if metric.endswith(("_ms", "_us", "_bytes")):
+        return -1
+    return 0
+
+
+def compare_results(baseline: Dict[str, dict], current: Dict[str, dict], threshold: float = 0.1) -> List[dict]:
+    """
+    Compare two result sets metric by metric.
+
+    Args:
+        baseline (Dict[str, dict]): Results of the reference run.
+        current (Dict[str, dict]): Results of the run under test.
+        threshold (float, optional): Relative change that counts as a regression. Defaults to 0.1.
+
+    Returns:
+        List[dict]: One row per shared metric with the relative change and a `regression` flag.
+    """
+    rows = []
+    for name in sorted(set(baseline) & set(current)):
+        for metric in sorted(set(baseline[name]) & set(current[name])):
+            direction = _direction(metric)
+            old, new = baseline[name][metric], current[name][metric]
+            if not direction or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (new - old) / old
+            rows.append({
+                "benchmark": name,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": change,
+                "regression": change * direction < -threshold,
+            })
+    return rows
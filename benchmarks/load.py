@@ -0,0 +1,266 @@
+"""Concurrent end-to-end load test of a compiled `GraphBuilder` graph.
+
+Simulated users hold multi-turn conversations, each on its own thread id,
+against an agentic RAG graph (agent -> retrieval tool -> generate). Answers
+come from the streaming fake chat model through an `SSEHandler`, embeddings
+are the hashed fakes, and history and checkpoints go to in-memory or local
+Postgres/Redis stand-ins, so the whole run stays offline. Each concurrency
+level reports throughput, time to first streamed token and turn latency.
+"""
+import copy
+import time
+import uuid
+import random
+import threading
+from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
+from typing_extensions import Annotated, Callable, Dict, List, Sequence, TypedDict
+from langchain_core.tools import tool
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_community.vectorstores import FAISS
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END
+from langgraph.graph.message import add_messages
+from langgraph.prebuilt import ToolNode
+from easy_langchain_rag.graph import GraphBuilder
+from easy_langchain_rag.handlers.streaming_callback import SSEHandler
+from easy_langchain_rag.stores.in_memory import InMemoryStoreConfig
+from easy_langchain_rag.stores.postgres import PostgresStoreConfig
+from easy_langchain_rag.stores.redis import RedisStoreConfig
+from .fakes import FakeChatModel, FakeEmbeddings, LatencySaver, LocalPostgresStore, LocalRedis
+from .harness import percentile
+from .suite import MESSAGES, make_chunks
+
+
+BACKENDS = ("memory", "postgres", "redis")
+
+
+class LoadState(TypedDict):
+    messages: Annotated[list, add_messages]
+    question: str
+    chat_history: list
+    answer: str
+
+
+class _TimedQueue(Queue):
+    """Token queue of one turn that remembers when the first token arrived."""
+
+    def __init__(self):
+        super().__init__()
+        self.first_token_at = None
+        self.tokens = 0
+
+    def put(self, item, block=True, timeout=None):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.tokens += 1
+        super().put(item, block, timeout)
+
+
+def make_backend(backend: str, embeddings, saver_latency: float = 0.001, pool_size: int = 10):
+    """
+    Build the checkpointer and history store config of a backend.
+
+    Args:
+        backend (str): "memory" for InMemorySaver and InMemoryStoreConfig, "postgres" or "redis"
+            for their local stand-ins behind a LatencySaver.
+        embeddings (Embeddings): The embeddings of the history store.
+        saver_latency (float, optional): Round trip added to every checkpointer call of the
+            networked backends. Defaults to 0.001.
+        pool_size (int, optional): Connections of the networked checkpointer. Defaults to 10.
+
+    Returns:
+        tuple: The checkpointer and a StoreConfig to copy per user.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+
+    if backend == "memory":
+        return InMemorySaver(), InMemoryStoreConfig(embeddings=embeddings, embedding_fields=["query"])
+
+    saver = LatencySaver(InMemorySaver(), latency=saver_latency, pool_size=pool_size)
+    if backend == "postgres":
+        LocalPostgresStore.reset()
+        store_config = PostgresStoreConfig(embeddings=embeddings, embedding_fields=["query"])
+        store_config.store_type = LocalPostgresStore
+        store_config.set_connection_string("load", "load", "localhost", 5432, "load")
+    else:
+        store_config = RedisStoreConfig(client=LocalRedis(), embeddings=embeddings, embedding_fields=["query"])
+    return saver, store_config
+
+
+def build_graph(checkpointer, store_config, chunks: int = 500, embeddings=None, token_delay: float = 0.002,
+                response: str = None, k: int = 4):
+    """
+    Compile the agent -> tools -> generate graph used by the load test.
+
+    History is read by the agent node and written by the generate node. A
+    StoreConfig keeps the current user id on the instance, so each user of
+    `configurable["user_id"]` works on its own shallow copy of `store_config`,
+    which shares the underlying store.
+
+    Args:
+        checkpointer (BaseCheckpointSaver): The graph's checkpointer.
+        store_config (StoreConfig): The chat history store.
+        chunks (int, optional): Number of chunks in the retrieval index. Defaults to 500.
+        embeddings (Embeddings, optional): Embeddings of the index. Defaults to FakeEmbeddings().
+        token_delay (float, optional): Seconds between streamed tokens. Defaults to 0.002.
+        response (str, optional): The fake model's answer. Defaults to its built-in answer.
+        k (int, optional): Chunks retrieved per question. Defaults to 4.
+
+    Returns:
+        The compiled graph.
+    """
+    embeddings = embeddings or FakeEmbeddings()
+    documents = make_chunks(chunks)
+    vector_store = FAISS.from_texts([d.page_content for d in documents], embeddings,
+                                    metadatas=[d.metadata for d in documents])
+    llm = FakeChatModel(token_delay=token_delay, **({"response": response} if response else {}))
+    user_stores: Dict[str, object] = {}
+    lock = threading.Lock()
+
+    def store_of(config: RunnableConfig):
+        user_id = config["configurable"]["user_id"]
+        with lock:
+            if user_id not in user_stores:
+                user_stores[user_id] = copy.copy(store_config)
+            return user_stores[user_id]
+
+    @tool
+    def retrieve_documents(query: str) -> str:
+        """Search the knowledge base for passages relevant to the query."""
+        return "\n\n".join(doc.page_content for doc in vector_store.similarity_search(query, k=k))
+
+    def agent(state: LoadState, config: RunnableConfig):
+        question = state["question"]
+        history = store_of(config).load_chat_history(question, config)
+        call = {"name": "retrieve_documents", "args": {"query": question}, "id": f"call_{uuid.uuid4().hex}"}
+        return {
+            "messages": [HumanMessage(question), AIMessage("", tool_calls=[call])],
+            "chat_history": history,
+        }
+
+    def generate(state: LoadState, config: RunnableConfig):
+        context = next(m.content for m in reversed(state["messages"]) if isinstance(m, ToolMessage))
+        prompt = [SystemMessage(f"Answer from this context:\n{context}"), *state["chat_history"],
+                  HumanMessage(state["question"])]
+        answer = llm.invoke(prompt, config).content
+        store_of(config).update_chat_history({"query": state["question"], "bot": answer})
+        return {"answer": answer, "messages": [AIMessage(answer)]}
+
+    def route(state: LoadState):
+        last = state["messages"][-1]
+        return "tools" if getattr(last, "tool_calls", None) else END
+
+    builder = GraphBuilder(
+        state=LoadState,
+        nodes=[("agent", agent), ("generate", generate)],
+        check_pointer=checkpointer,
+        store=None,
+        entry_point="agent",
+        tools=ToolNode([retrieve_documents]),
+    )
+    return builder.compile_graph(tools_condition=route)
+
+
+def run_turn(graph, user_id: str, thread_id: str, question: str) -> dict:
+    """Run one turn, returning its latency, time to first token and number of streamed tokens."""
+    queue = _TimedQueue()
+    config = {
+        "configurable": {"thread_id": thread_id, "user_id": user_id},
+        "callbacks": [SSEHandler(queue)],
+    }
+    start = time.perf_counter()
+    graph.invoke({"question": question}, config)
+    end = time.perf_counter()
+    first = queue.first_token_at if queue.first_token_at is not None else end
+    return {"latency": end - start, "ttft": first - start, "tokens": queue.tokens}
+
+
+def run_level(graph, concurrency: int, turns: int, think_time: float = 0.0,
+              questions: Sequence[str] = MESSAGES) -> dict:
+    """
+    Run `concurrency` users in parallel, each holding a `turns`-turn conversation.
+
+    Returns:
+        dict: Throughput, time to first token and turn latency statistics of the level.
+    """
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    counters = {"tokens": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def user(index: int):
+        rng = random.Random(index)
+        user_id = str(uuid.uuid4())
+        thread_id = f"load-{concurrency}-{index}-{uuid.uuid4().hex[:8]}"
+        for _ in range(turns):
+            try:
+                result = run_turn(graph, user_id, thread_id, rng.choice(questions))
+            except Exception:
+                with lock:
+                    counters["errors"] += 1
+                continue
+            with lock:
+                latencies.append(result["latency"])
+                ttfts.append(result["ttft"])
+                counters["tokens"] += result["tokens"]
+            if think_time:
+                time.sleep(rng.uniform(0, 2 * think_time))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(user, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "turns": len(latencies),
+        "errors": counters["errors"],
+        "turns_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "tokens_per_s": counters["tokens"] / elapsed if elapsed else 0.0,
+        "ttft_p50_ms": percentile(ttfts, 50) * 1000,
+        "ttft_p99_ms": percentile(ttfts, 99) * 1000,
+        "turn_p50_ms": percentile(latencies, 50) * 1000,
+        "turn_p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_load(backend: str = "memory", concurrency: Sequence[int] = (1, 4, 16, 64), turns: int = 5,
+             token_delay: float = 0.002, saver_latency: float = 0.001, pool_size: int = 10,
+             think_time: float = 0.0, chunks: int = 500,
+             on_level: Callable[[int, dict], None] = None) -> Dict[int, dict]:
+    """
+    Load test a fresh graph at increasing concurrency.
+
+    Args:
+        backend (str, optional): One of BACKENDS. Defaults to "memory".
+        concurrency (Sequence[int], optional): Number of simultaneous users of each level. Defaults to (1, 4, 16, 64).
+        turns (int, optional): Turns per user conversation. Defaults to 5.
+        token_delay (float, optional): Seconds between streamed tokens. Defaults to 0.002.
+        saver_latency (float, optional): Checkpointer round trip of networked backends. Defaults to 0.001.
+        pool_size (int, optional): Checkpointer connections of networked backends. Defaults to 10.
+        think_time (float, optional): Mean pause in seconds between a user's turns. Defaults to 0.0.
+        chunks (int, optional): Number of chunks in the retrieval index. Defaults to 500.
+        on_level (Callable[[int, dict], None], optional): Called after each level with its results.
+
+    Returns:
+        Dict[int, dict]: The results of each concurrency level.
+    """
+    embeddings = FakeEmbeddings()
+    checkpointer, store_config = make_backend(backend, embeddings, saver_latency, pool_size)
+    graph = build_graph(checkpointer, store_config, chunks=chunks, embeddings=embeddings, token_delay=token_delay)
+    # Warm up imports, FAISS and the graph outside the measured levels
+    run_turn(graph, str(uuid.uuid4()), "warmup", MESSAGES[0])
+
+    results = {}
+    for level in concurrency:
+        results[level] = run_level(graph, level, turns, think_time)
+        if on_level:
+            on_level(level, results[level])
+    return results
+
+
+def flatten(results: Dict[int, dict]) -> dict:
+    """Flatten per-level results into `c{level}_{metric}` keys for result files."""
+    return {f"c{level}_{metric}": value for level, metrics in results.items() for metric, value in metrics.items()}
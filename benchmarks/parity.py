@@ -0,0 +1,91 @@
+"""Parity and throughput of the optimized embedding backends against the reference model.
+
+Embeds the same sentences with `HuggingFaceEmbeddings` and with each backend,
+then reports the cosine similarity of every backend vector to its reference
+vector, how many of each text's nearest neighbours are preserved, and texts
+embedded per second. Needs the models, so unlike the suite it is not offline
+once the model cache is cold.
+"""
+import os
+import time
+import numpy as np
+from typing_extensions import Dict, List, Sequence
+from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+from easy_langchain_rag.embeddings import OnnxEmbeddings, ProcessPoolEmbeddings
+from easy_langchain_rag.embeddings.onnx import MODEL_FILE, export_onnx
+from .suite import make_corpus
+
+
+BACKENDS = ("onnx_int8", "onnx_fp32", "pool")
+
+
+def make_sentences(count: int) -> List[str]:
+    text = make_corpus(max(1, count // 4))
+    sentences = [s.strip() + "." for s in text.replace("\n", " ").split(".") if s.strip()]
+    return (sentences * (count // max(len(sentences), 1) + 1))[:count]
+
+
+def _timed_embed(embeddings, texts: Sequence[str]):
+    embeddings.embed_documents(list(texts[:8]))  # warm up model loading
+    start = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(list(texts)), dtype=np.float32)
+    return vectors, len(texts) / (time.perf_counter() - start)
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def neighbour_overlap(reference: np.ndarray, candidate: np.ndarray, queries: int = 100, k: int = 10) -> float:
+    """Mean share of the reference top-k neighbours a backend finds for the first `queries` texts."""
+    reference, candidate = _normalized(reference), _normalized(candidate)
+    queries = min(queries, len(reference))
+    k = min(k, len(reference) - 1)
+    if k < 1:
+        return 1.0
+    overlaps = []
+    for i in range(queries):
+        expected = set(np.argsort(-(reference @ reference[i]))[1:k + 1].tolist())
+        found = set(np.argsort(-(candidate @ candidate[i]))[1:k + 1].tolist())
+        overlaps.append(len(expected & found) / k)
+    return float(np.mean(overlaps))
+
+
+def make_backend(name: str, model_name: str, onnx_dir: str, processes: int = None):
+    if name not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    if name.startswith("onnx"):
+        if not os.path.exists(os.path.join(onnx_dir, MODEL_FILE)):
+            export_onnx(model_name, onnx_dir)
+        return OnnxEmbeddings(onnx_dir, quantized=name == "onnx_int8")
+    return ProcessPoolEmbeddings(model_name=model_name, processes=processes)
+
+
+def run_parity(model_name: str = "sentence-transformers/all-MiniLM-L6-v2", backends: Sequence[str] = BACKENDS,
+               texts: int = 2000, onnx_dir: str = "onnx_model", processes: int = None) -> Dict[str, dict]:
+    """
+    Compare each backend with the reference HuggingFaceEmbeddings of `model_name`.
+
+    Returns:
+        Dict[str, dict]: Per backend (and "reference"), cosine statistics, neighbour overlap and texts_per_s.
+    """
+    sentences = make_sentences(texts)
+    reference, reference_speed = _timed_embed(HuggingFaceEmbeddings(model_name=model_name), sentences)
+    results = {"reference": {"texts_per_s": reference_speed}}
+
+    for name in backends:
+        backend = make_backend(name, model_name, onnx_dir, processes)
+        try:
+            vectors, speed = _timed_embed(backend, sentences)
+        finally:
+            if isinstance(backend, ProcessPoolEmbeddings):
+                backend.close()
+        cosines = np.sum(_normalized(reference) * _normalized(vectors), axis=1)
+        results[name] = {
+            "min_cosine": float(cosines.min()),
+            "mean_cosine": float(cosines.mean()),
+            "neighbour_overlap": neighbour_overlap(reference, vectors),
+            "texts_per_s": speed,
+            "speedup": speed / reference_speed,
+        }
+    return results
@@ -0,0 +1,411 @@
+"""Component benchmarks.
+
+Every benchmark takes a `quick` flag and returns a flat dict of metrics.
+Metric names ending in `_ms` are latencies, `_per_s` throughputs; the
+compare command uses the suffix to decide which direction is a regression.
+"""
+import os
+import uuid
+import random
+import shutil
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from langchain_community.document_loaders import TextLoader
+from langchain.text_splitter import CharacterTextSplitter, RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from easy_langchain_rag.document_processor import DocumentProcessor
+from easy_langchain_rag.document_processor.splitter import OffsetTextSplitter
+from easy_langchain_rag.vectors import VectorStoreActions
+from easy_langchain_rag.utils.managers import EmbeddingStoreManager
+from easy_langchain_rag.utils.user_input import detect_closing_intent
+from easy_langchain_rag.utils.phrase_matcher import ClosingPhraseMatcher
+from easy_langchain_rag.stores.in_memory import InMemoryStoreConfig
+from easy_langchain_rag.stores.postgres import PostgresStoreConfig
+from easy_langchain_rag.stores.redis import RedisStoreConfig
+from easy_langchain_rag.stores.transfer import export_history_file, import_history_file
+from easy_langchain_rag.persistance.chat_management import ChatManagement
+from .fakes import FakeCrossEncoder, FakeEmbeddings, LocalPostgresStore, LocalRedis
+from .harness import measure, summarize
+
+
+WORDS = (
+    "policy account invoice customer support refund delivery contract premium claim "
+    "document network service payment balance request approval report office branch "
+    "schedule manager product license update security password transfer limit access"
+).split()
+
+CLOSING_PHRASES = [
+    "bye", "goodbye", "see you", "thank you", "thanks", "that's all", "no more questions",
+    "have a nice day", "talk to you later", "murakoze", "au revoir", "merci beaucoup",
+]
+
+MESSAGES = [
+    "How do I reset my password?",
+    "What is the refund policy for premium accounts?",
+    "thanks, that's all for today",
+    "Can I transfer money to another branch?",
+    "goodby",
+    "I would like to talk to a manager about my invoice",
+    "ok thank you so much",
+    "Where is the nearest office?",
+]
+
+
+def make_corpus(paragraphs: int, seed: int = 7) -> str:
+    """Build a deterministic text of `paragraphs` paragraphs."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = rng.choices(WORDS, k=rng.randint(6, 16))
+            sentences.append(" ".join(words).capitalize() + f" ref-{i}.")
+        out.append(" ".join(sentences))
+    return "\n\n".join(out)
+
+
+def make_chunks(count: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    return [
+        Document(page_content=" ".join(rng.choices(WORDS, k=60)) + f" chunk-{i}", metadata={"source": "bench"})
+        for i in range(count)
+    ]
+
+
+@contextmanager
+def workdir():
+    """Run inside a scratch directory, since processors resolve paths against the working directory."""
+    previous = os.getcwd()
+    path = tempfile.mkdtemp(prefix="easy_rag_bench_")
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def bench_chunking(quick: bool = False) -> dict:
+    text = make_corpus(300 if quick else 3000)
+    with workdir():
+        with open("corpus.txt", "w", encoding="utf-8") as f:
+            f.write(text)
+
+        def run(cache_dir=None):
+            processor = DocumentProcessor("corpus.txt", RecursiveCharacterTextSplitter, TextLoader, chunk_size=1000,
+                                          cache_dir=cache_dir)
+            return processor.get_chunks()
+
+        samples = measure(run, repeat=3 if quick else 10)
+        _, chunk_count = run()
+        # The first run fills the cache; measured runs only read it back
+        run("parsed")
+        cached_samples = measure(lambda: run("parsed"), repeat=3 if quick else 10)
+
+        # Compact chunks with deduplication, on a corpus whose second half repeats the first
+        with open("duplicated.txt", "w", encoding="utf-8") as f:
+            f.write(text + "\n\n" + text)
+        def run_dedup():
+            processor = DocumentProcessor("duplicated.txt", OffsetTextSplitter, TextLoader, chunk_size=1000,
+                                          separator="paragraph", compact_chunks=True, deduplicate=True)
+            return processor.get_chunks()
+
+        dedup_samples = measure(run_dedup, repeat=1 if quick else 3)
+        _, dedup_chunk_count = run_dedup()
+
+    megabytes = len(text.encode("utf-8")) / 1e6
+    result = summarize(samples)
+    result["chunks"] = chunk_count
+    result["compact_dedup_chunks"] = dedup_chunk_count
+    result["compact_dedup_mb_per_s"] = 2 * megabytes / (sum(dedup_samples) / len(dedup_samples))
+    result["mb_per_s"] = megabytes / (sum(samples) / len(samples))
+    result["cached_mb_per_s"] = megabytes / (sum(cached_samples) / len(cached_samples))
+    return result
+
+
+def _peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_splitters(quick: bool = False) -> dict:
+    text = make_corpus(300 if quick else 3000)
+    documents = [Document(page_content=text, metadata={"source": "bench"})]
+    megabytes = len(text.encode("utf-8")) / 1e6
+    splitters = {
+        "recursive": RecursiveCharacterTextSplitter(separators=["\n"], chunk_size=1000, chunk_overlap=100),
+        "character": CharacterTextSplitter(separator=" ", chunk_size=1000, chunk_overlap=100),
+        "offset": OffsetTextSplitter(separator=" ", chunk_size=1000, chunk_overlap=100),
+        "offset_paragraph": OffsetTextSplitter(separator="paragraph", chunk_size=1000, chunk_overlap=100),
+    }
+
+    result = {}
+    for name, splitter in splitters.items():
+        samples = measure(lambda: splitter.split_documents(documents), repeat=3 if quick else 10)
+        result[f"{name}_mb_per_s"] = megabytes / (sum(samples) / len(samples))
+        result[f"{name}_peak_bytes"] = _peak_bytes(lambda: splitter.split_documents(documents))
+        result[f"{name}_chunks"] = len(splitter.split_documents(documents))
+    return result
+
+
+def bench_vector_store(quick: bool = False) -> dict:
+    embeddings = FakeEmbeddings()
+    chunks = make_chunks(200 if quick else 2000)
+    queries = [" ".join(random.Random(i).choices(WORDS, k=8)) for i in range(50 if quick else 500)]
+
+    with workdir():
+        counter = iter(range(1_000_000))
+
+        def build():
+            actions = VectorStoreActions(save_location=f"index_{next(counter)}", chunks=chunks, embeddings=embeddings)
+            return actions.load_vector_store()
+
+        build_samples = measure(build, repeat=2 if quick else 5)
+        vector_store = build()
+
+        query_samples = []
+        for query in queries:
+            query_samples.extend(measure(lambda: vector_store.similarity_search(query, k=4), repeat=1, warmup=0))
+
+    build_stats = summarize(build_samples)
+    query_stats = summarize(query_samples)
+    return {
+        "chunks": len(chunks),
+        "build_p50_ms": build_stats["p50_ms"],
+        "build_p99_ms": build_stats["p99_ms"],
+        "query_p50_ms": query_stats["p50_ms"],
+        "query_p99_ms": query_stats["p99_ms"],
+        "queries_per_s": len(query_samples) / sum(query_samples),
+    }
+
+
+def bench_pool_embeddings(quick: bool = False) -> dict:
+    from easy_langchain_rag.embeddings import ProcessPoolEmbeddings
+
+    texts = [chunk.page_content for chunk in make_chunks(2000 if quick else 20000)]
+    embeddings = FakeEmbeddings()
+    single = measure(lambda: embeddings.embed_documents(texts), repeat=1 if quick else 3)
+    with ProcessPoolEmbeddings(factory=FakeEmbeddings, processes=min(4, os.cpu_count() or 1)) as pool:
+        pooled = measure(lambda: pool.embed_documents(texts), repeat=1 if quick else 3)
+    return {
+        "texts": len(texts),
+        "single_texts_per_s": len(texts) / min(single),
+        "pool_texts_per_s": len(texts) / min(pooled),
+    }
+
+
+def bench_rerank(quick: bool = False) -> dict:
+    embeddings = FakeEmbeddings()
+    chunks = make_chunks(200 if quick else 2000)
+    queries = [" ".join(random.Random(i).choices(WORDS, k=8)) for i in range(50 if quick else 500)]
+
+    with workdir():
+        actions = VectorStoreActions(save_location="index", chunks=chunks, embeddings=embeddings)
+        results, retrievers = {}, {}
+        for name, budget in (("unbounded", None), ("budget", 0.005)):
+            retriever = actions.load_rerank_retriever(scorer=FakeCrossEncoder(), k=4, fetch_k=40,
+                                                      latency_budget=budget)
+            retrievers[name] = retriever
+            samples = []
+            for query in queries:
+                samples.extend(measure(lambda: retriever.invoke(query), repeat=1, warmup=0))
+            stats = summarize(samples)
+            results[f"{name}_p50_ms"] = stats["p50_ms"]
+            results[f"{name}_p99_ms"] = stats["p99_ms"]
+            results[f"{name}_reranked"] = retriever.stats["reranked"]
+        # Repeated queries are served from the pair score cache
+        cached = measure(lambda: [retrievers["unbounded"].invoke(query) for query in queries[:20]], repeat=3)
+    results["cached_queries_per_s"] = 20 / (sum(cached) / len(cached))
+    return results
+
+
+def bench_update_vector_store(quick: bool = False) -> dict:
+    embeddings = FakeEmbeddings()
+    chunks = make_chunks(200 if quick else 2000)
+    # Change every tenth chunk so the diff has real work to do
+    updated = [
+        Document(page_content=chunk.page_content + " revised", metadata=chunk.metadata) if i % 10 == 0 else chunk
+        for i, chunk in enumerate(chunks)
+    ]
+
+    with workdir():
+        VectorStoreActions(save_location="index", chunks=chunks, embeddings=embeddings).load_vector_store()
+
+        def setup():
+            manager = EmbeddingStoreManager("index", embeddings)
+            return manager, manager.vectorstore
+
+        samples = measure(lambda args: args[0].update_vector_store(args[1], updated), repeat=3 if quick else 10, setup=setup)
+
+    result = summarize(samples)
+    result["chunks"] = len(chunks)
+    return result
+
+
+def _bench_history(store_config, quick: bool) -> dict:
+    config = {"configurable": {"user_id": str(uuid.uuid4())}}
+    turns = 50 if quick else 500
+    # The stores learn the user id on the first load
+    store_config.load_chat_history("hello", config)
+
+    write_samples = []
+    for i in range(turns):
+        data = {"query": MESSAGES[i % len(MESSAGES)], "bot": f"answer {i}"}
+        write_samples.extend(measure(lambda: store_config.update_chat_history(data), repeat=1, warmup=0))
+
+    search_samples = []
+    latest_samples = []
+    for i in range(turns):
+        query = MESSAGES[i % len(MESSAGES)]
+        search_samples.extend(measure(lambda: store_config.load_chat_history(query, config), repeat=1, warmup=0))
+        latest_samples.extend(
+            measure(lambda: store_config.load_chat_history(query, config, is_latest=True), repeat=1, warmup=0))
+
+    write_stats, search_stats, latest_stats = summarize(write_samples), summarize(search_samples), summarize(latest_samples)
+    return {
+        "write_p50_ms": write_stats["p50_ms"],
+        "write_p99_ms": write_stats["p99_ms"],
+        "search_p50_ms": search_stats["p50_ms"],
+        "search_p99_ms": search_stats["p99_ms"],
+        "latest_p50_ms": latest_stats["p50_ms"],
+        "latest_p99_ms": latest_stats["p99_ms"],
+    }
+
+
+def bench_in_memory_history(quick: bool = False) -> dict:
+    store_config = InMemoryStoreConfig(embeddings=FakeEmbeddings(), embedding_fields=["query"])
+    return _bench_history(store_config, quick)
+
+
+def bench_postgres_history(quick: bool = False) -> dict:
+    LocalPostgresStore.reset()
+    store_config = PostgresStoreConfig(embeddings=FakeEmbeddings(), embedding_fields=["query"])
+    store_config.store_type = LocalPostgresStore
+    store_config.set_connection_string("bench", "bench", "localhost", 5432, "bench")
+    return _bench_history(store_config, quick)
+
+
+def bench_postgres_partitioned_history(quick: bool = False) -> dict:
+    LocalPostgresStore.reset()
+    store_config = PostgresStoreConfig(embeddings=FakeEmbeddings(), embedding_fields=["query"],
+                                       partition_by="day", retention_days=7)
+    store_config.store_type = LocalPostgresStore
+    store_config.set_connection_string("bench", "bench", "localhost", 5432, "bench")
+    return _bench_history(store_config, quick)
+
+
+def bench_redis_history(quick: bool = False) -> dict:
+    store_config = RedisStoreConfig(client=LocalRedis(), embeddings=FakeEmbeddings(), embedding_fields=["query"])
+    return _bench_history(store_config, quick)
+
+
+def bench_history_transfer(quick: bool = False) -> dict:
+    users, turns = (50, 20) if quick else (500, 100)
+    source = InMemoryStoreConfig(embeddings=FakeEmbeddings(), embedding_fields=["query"])
+    for u in range(users):
+        source.user_id = str(uuid.UUID(int=u))
+        for i in range(turns):
+            data = {"query": MESSAGES[i % len(MESSAGES)], "bot": f"answer {i}"}
+            # Unique keys, since update_chat_history keeps a single turn per user
+            source.store.put((source.user_id, "history"), f"chat_{i}", data, index=["query"])
+    records = users * turns
+
+    with workdir():
+        export_samples = measure(lambda: export_history_file(source, "history.bin"), repeat=3, warmup=0)
+        file_bytes = os.path.getsize("history.bin")
+        import_samples = measure(
+            lambda: import_history_file(InMemoryStoreConfig(embeddings=FakeEmbeddings(), embedding_fields=["query"]),
+                                        "history.bin"),
+            repeat=3, warmup=0)
+
+        redis_samples = measure(
+            lambda: import_history_file(RedisStoreConfig(client=LocalRedis(), embeddings=FakeEmbeddings(),
+                                                         embedding_fields=["query"]), "history.bin"),
+            repeat=3, warmup=0)
+
+    return {
+        "records": records,
+        "bytes_per_record": file_bytes / records,
+        "export_records_per_s": records / min(export_samples),
+        "import_records_per_s": records / min(import_samples),
+        "redis_import_records_per_s": records / min(redis_samples),
+    }
+
+
+def bench_chat_management(quick: bool = False) -> dict:
+    conversations, turns = (100, 50) if quick else (1000, 100)
+    user_id = str(uuid.UUID(int=1))
+    chats = ChatManagement()
+    for i in range(turns):
+        for c in range(conversations):
+            chats.add_turn(user_id, f"conversation-{c}", MESSAGES[i % len(MESSAGES)], f"answer {i}")
+
+    # Cursors of the first and of the last pages, to show that depth does not change the cost
+    first = chats.get_turns(user_id, "conversation-0", limit=20)
+    cursor, deep_cursor = first.next_cursor, None
+    while cursor:
+        deep_cursor, cursor = cursor, chats.get_turns(user_id, "conversation-0", limit=20, cursor=cursor).next_cursor
+    listing = chats.list_conversations(user_id, limit=20)
+
+    repeat = 200 if quick else 2000
+    first_samples = measure(lambda: chats.get_turns(user_id, "conversation-0", limit=20), repeat=repeat)
+    deep_samples = measure(lambda: chats.get_turns(user_id, "conversation-0", limit=20, cursor=deep_cursor),
+                           repeat=repeat)
+    list_samples = measure(lambda: chats.list_conversations(user_id, limit=20, cursor=listing.next_cursor),
+                           repeat=repeat)
+    return {
+        "turns": conversations * turns,
+        "first_page_p50_ms": summarize(first_samples)["p50_ms"],
+        "deep_page_p50_ms": summarize(deep_samples)["p50_ms"],
+        "conversations_page_p50_ms": summarize(list_samples)["p50_ms"],
+    }
+
+
+def bench_graph_load(quick: bool = False) -> dict:
+    from .load import flatten, run_load
+
+    levels = (1, 8) if quick else (1, 8, 32)
+    return flatten(run_load("memory", concurrency=levels, turns=2 if quick else 5, token_delay=0.0005,
+                            chunks=200 if quick else 500))
+
+
+def bench_closing_intent(quick: bool = False) -> dict:
+    messages = MESSAGES * (100 if quick else 1000)
+    samples = measure(lambda: [detect_closing_intent(m, CLOSING_PHRASES) for m in messages], repeat=3 if quick else 10)
+    mean = sum(samples) / len(samples)
+
+    # Thousands of phrases through the batch API
+    matcher = ClosingPhraseMatcher(CLOSING_PHRASES + [f"{w} {v} goodbye {i}" for i, (w, v) in
+                                                      enumerate(zip(WORDS * 100, reversed(WORDS * 100)))])
+    batch_samples = measure(lambda: matcher.match_many(messages), repeat=3 if quick else 10)
+    batch_mean = sum(batch_samples) / len(batch_samples)
+    return {
+        "messages": len(messages),
+        "per_message_us": mean / len(messages) * 1e6,
+        "messages_per_s": len(messages) / mean,
+        "phrases_large": len(matcher),
+        "large_per_message_us": batch_mean / len(messages) * 1e6,
+    }
+
+
+BENCHMARKS = {
+    "chunking": bench_chunking,
+    "splitters": bench_splitters,
+    "vector_store": bench_vector_store,
+    "pool_embeddings": bench_pool_embeddings,
+    "rerank": bench_rerank,
+    "update_vector_store": bench_update_vector_store,
+    "in_memory_history": bench_in_memory_history,
+    "postgres_history": bench_postgres_history,
+    "postgres_partitioned_history": bench_postgres_partitioned_history,
+    "redis_history": bench_redis_history,
+    "history_transfer": bench_history_transfer,
+    "chat_management": bench_chat_management,
+    "graph_load": bench_graph_load,
+    "closing_intent": bench_closing_intent,
+}
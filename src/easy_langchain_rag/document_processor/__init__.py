@@ -1,39 +1,65 @@
 import os
 import logging
 from pathlib import Path
-from typing_extensions import Type, Union, List
+from typing_extensions import Iterator, Type, Union, List
 from langchain_core.documents import Document
 from werkzeug.utils import secure_filename
 from langchain_community.document_loaders import (
     TextLoader, UnstructuredWordDocumentLoader, Docx2txtLoader, PyPDFLoader, PDFPlumberLoader, UnstructuredMarkdownLoader)
 from langchain.text_splitter import CharacterTextSplitter, RecursiveCharacterTextSplitter, TextSplitter, MarkdownTextSplitter
+from ..instrumentation import instrumentation
+from .dedup import NearDuplicateFilter
+from .pdf import iter_pdf_pages
+from .splitter import OffsetTextSplitter
+from .chunk_store import ChunkStore
+from .cache import DocumentCache
 
 
 class DocumentProcessor:
     def __init__(self,
                  file_path: str,
-                 text_splitter: Type[Union[CharacterTextSplitter, RecursiveCharacterTextSplitter, TextSplitter, MarkdownTextSplitter]],
+                 text_splitter: Type[Union[
+                     CharacterTextSplitter, RecursiveCharacterTextSplitter, TextSplitter, MarkdownTextSplitter, OffsetTextSplitter]
+                 ],
                  document_loader: Type[Union[
                      TextLoader, PyPDFLoader, PDFPlumberLoader, Docx2txtLoader,
                      UnstructuredWordDocumentLoader, UnstructuredMarkdownLoader]
                  ],
                  chunk_size=1000,
                  chunk_overlap=0,
-                 separator=" "
+                 separator=" ",
+                 deduplicate=False,
+                 dedup_threshold=0.85,
+                 parallel_pages=False,
+                 page_workers=None,
+                 pages_per_task=16,
+                 compact_chunks=False,
+                 cache_dir=None
                  ):
         """
         Initialize a DocumentProcessor object.
 
         Args:
             file_path (str): The path to the file to be processed.
-            text_splitter (Type[Union[CharacterTextSplitter, RecursiveCharacterTextSplitter, TextSplitter,MarkdownTextSplitter]]):
-                The text splitter to use.
+            text_splitter (Type[Union[CharacterTextSplitter, RecursiveCharacterTextSplitter, TextSplitter,MarkdownTextSplitter,
+                OffsetTextSplitter]]):
+                The text splitter to use. OffsetTextSplitter records the start/end offsets of each chunk.
             document_loader (Type[Union[TextLoader, PyPDFLoader,PDFPlumberLoader, Docx2txtLoader,
                 UnstructuredWordDocumentLoader, UnstructuredMarkdownLoader]]):
                 The document loader to use.
             chunk_size (int, optional): The size of each chunk. Defaults to 1000.
             chunk_overlap (int, optional): The overlap between chunks. Defaults to 0.
-            separator (str, optional): The separator to use. Defaults to " ".
+            separator (str, optional): The separator to use: " ", "\n" or "paragraph". Defaults to " ".
+            deduplicate (bool, optional): Collapse near-duplicate chunks before they are embedded. Defaults to False.
+            dedup_threshold (float, optional): Estimated Jaccard similarity above which chunks are duplicates. Defaults to 0.85.
+            parallel_pages (bool, optional): Extract PDF pages in a process pool and split them as they arrive
+                instead of parsing the whole file first. Only applies to PyPDFLoader and PDFPlumberLoader. Defaults to False.
+            page_workers (int, optional): Number of extraction processes. Defaults to the number of CPUs.
+            pages_per_task (int, optional): Pages extracted per worker task. Defaults to 16.
+            compact_chunks (bool, optional): Return the chunks as a ChunkStore, which keeps each source text once
+                and builds Documents only when iterated. Defaults to False.
+            cache_dir (str, optional): Directory of a DocumentCache keeping the parsed documents, so that unchanged
+                files are not parsed again when re-chunking. Defaults to None (no cache).
         """
         if not isinstance(file_path, str):
             raise ValueError("file_path must be a string")
@@ -47,8 +73,8 @@ class DocumentProcessor:
             if not path.exists():
                 raise ValueError(f"file_path {path} does not exist")
 
-        if text_splitter not in [CharacterTextSplitter, RecursiveCharacterTextSplitter, TextSplitter, MarkdownTextSplitter]:
-            raise ValueError("Only 'CharacterTextSplitter, RecursiveCharacterTextSplitter, TextSplitter, MarkdownTextSplitter' are supported")
+        if text_splitter not in [CharacterTextSplitter, RecursiveCharacterTextSplitter, TextSplitter, MarkdownTextSplitter, OffsetTextSplitter]:
+            raise ValueError("Only 'CharacterTextSplitter, RecursiveCharacterTextSplitter, TextSplitter, MarkdownTextSplitter, OffsetTextSplitter' are supported")
                 
         if document_loader not in [TextLoader, PyPDFLoader,PDFPlumberLoader, Docx2txtLoader, UnstructuredWordDocumentLoader, UnstructuredMarkdownLoader]:
             raise ValueError("Only 'TextLoader, PyPDFLoader,PDFPlumberLoader, Docx2txtLoader, UnstructuredWordDocumentLoader, UnstructuredMarkdownLoader' are supported")
@@ -61,6 +87,15 @@ class DocumentProcessor:
         
         if not isinstance(separator, str) or separator not in [" ", "\n", "paragraph"]:
             raise ValueError("separator must be a string")
+
+        if isinstance(dedup_threshold, bool) or not isinstance(dedup_threshold, (int, float)) or not 0 < dedup_threshold <= 1:
+            raise ValueError("dedup_threshold must be a number in (0, 1]")
+
+        if page_workers is not None and (not isinstance(page_workers, int) or page_workers < 1):
+            raise ValueError("page_workers must be a positive integer")
+
+        if not isinstance(pages_per_task, int) or pages_per_task < 1:
+            raise ValueError("pages_per_task must be a positive integer")
         
         
         self.knowledge_base = file_path
@@ -70,6 +105,14 @@ class DocumentProcessor:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.separator = separator
+        self.deduplicate = deduplicate
+        self.dedup_threshold = dedup_threshold
+        self.duplicate_filter = None
+        self.parallel_pages = parallel_pages
+        self.page_workers = page_workers
+        self.pages_per_task = pages_per_task
+        self.compact_chunks = compact_chunks
+        self.document_cache = DocumentCache(cache_dir) if cache_dir else None
         self.ALLOWED_EXTENSIONS = {'txt', 'pdf', 'docx', 'md'}
 
     def _does_file_exists(self):
@@ -109,11 +152,37 @@ class DocumentProcessor:
             The content of the file as loaded by the text_loader.
         """
         filename = self._validate_document_extension()
+        if self.document_cache is not None:
+            return self.document_cache.load(filename, self.document_loader)
+
         loader = self.document_loader(filename)
-        documents = loader.load()
+        with instrumentation.span("load", loader=self.document_loader.__name__):
+            documents = loader.load()
 
         return documents
 
+    def _iter_documents(self) -> Iterator[List[Document]]:
+        """
+        Yield the loaded document in batches.
+
+        PDFs in parallel page mode come one page range at a time, so splitting
+        starts with the first range and page texts are released once split.
+        Everything else is loaded as a single batch.
+        """
+        if not self.parallel_pages or self.document_loader not in [PyPDFLoader, PDFPlumberLoader]:
+            yield self._load_file()
+            return
+
+        filename = self._validate_document_extension()
+        backend = "pdfplumber" if self.document_loader == PDFPlumberLoader else "pypdf"
+        batches = iter_pdf_pages(filename, backend=backend, workers=self.page_workers, pages_per_task=self.pages_per_task)
+        while True:
+            with instrumentation.span("load", loader=self.document_loader.__name__):
+                batch = next(batches, None)
+            if batch is None:
+                return
+            yield batch
+
     def _split_document(self) -> List:
         """
         Split the loaded document into chunks using the specified text splitter.
@@ -128,12 +197,37 @@ class DocumentProcessor:
         if self.text_splitter == RecursiveCharacterTextSplitter:
             text_splitter = self.text_splitter(separators=["\n"], chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
         elif self.text_splitter == CharacterTextSplitter:
+            separator = "\n\n" if self.separator == "paragraph" else self.separator
+            text_splitter = self.text_splitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, separator=separator)
+        elif self.text_splitter == OffsetTextSplitter:
             text_splitter = self.text_splitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, separator=self.separator)
         else:
-            raise ValueError("Unsupported text splitter. Use 'CharacterTextSplitter' or 'RecursiveCharacterTextSplitter'.")
+            raise ValueError("Unsupported text splitter. Use 'CharacterTextSplitter', 'RecursiveCharacterTextSplitter' or 'OffsetTextSplitter'.")
         
-        documents = self._load_file()
-        chunks = text_splitter.split_documents(documents)
+        chunks = ChunkStore() if self.compact_chunks else []
+        for documents in self._iter_documents():
+            with instrumentation.span("split"):
+                if self.compact_chunks and isinstance(text_splitter, OffsetTextSplitter):
+                    # Chunks are recorded by offsets, no chunk Document is ever built
+                    chunks.add_split(documents, text_splitter)
+                else:
+                    chunks.extend(text_splitter.split_documents(documents))
+        instrumentation.increment("chunks_produced", len(chunks))
+
+        if self.deduplicate:
+            # Keep the filter so `duplicates` maps kept chunks back to their copies
+            self.duplicate_filter = NearDuplicateFilter(threshold=self.dedup_threshold)
+            with instrumentation.span("dedup"):
+                kept = self.duplicate_filter.filter(chunks)
+            instrumentation.increment("chunks_deduplicated", len(chunks) - len(kept))
+            if self.compact_chunks:
+                # Keep the store compact; only chunks that absorbed copies get new metadata
+                removed = {index for copies in self.duplicate_filter.duplicates.values() for index in copies}
+                indexes = [index for index in range(len(chunks)) if index not in removed]
+                kept = chunks.select(indexes, {
+                    index: document.metadata for index, document in zip(indexes, kept)
+                    if index in self.duplicate_filter.duplicates})
+            chunks = kept
 
         # Update instance chunks
         self.chunks = chunks
@@ -144,7 +238,7 @@ class DocumentProcessor:
         Return the chunks of the document.
 
         Returns:
-            A tuple containing the chunks as a list and the number of chunks as an int.
+            A tuple containing the chunks as a list (a ChunkStore with compact_chunks) and the number of chunks as an int.
         """
         if self.chunks is None:
             self._split_document()
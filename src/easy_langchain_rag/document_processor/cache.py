@@ -0,0 +1,162 @@
+import os
+import json
+import zlib
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from importlib import metadata
+from typing_extensions import Dict, List, Optional, Type
+from langchain_core.documents import Document
+from ..instrumentation import instrumentation
+
+
+# Bump when the entry layout changes so old entries are ignored instead of misread
+CACHE_FORMAT = 2
+
+# Libraries doing the actual parsing; their version changes what a loader returns
+LOADER_PACKAGES: Dict[str, List[str]] = {
+    "PyPDFLoader": ["pypdf"],
+    "PDFPlumberLoader": ["pdfplumber"],
+    "Docx2txtLoader": ["docx2txt"],
+    "UnstructuredWordDocumentLoader": ["unstructured"],
+    "UnstructuredMarkdownLoader": ["unstructured"],
+}
+
+
+# Metadata the loaders derive from the file path, refilled from the current path on every hit
+PATH_METADATA = {
+    "source": lambda path: path,
+    "file_path": lambda path: path,
+    "filename": os.path.basename,
+    "file_directory": os.path.dirname,
+}
+
+
+def _package_version(package: str) -> str:
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return "-"
+
+
+def loader_version(loader: Type) -> str:
+    """Versions of the package defining `loader` and of the libraries it parses with."""
+    packages = [loader.__module__.split(".")[0]] + LOADER_PACKAGES.get(loader.__name__, [])
+    return ",".join(f"{package}={_package_version(package)}" for package in packages)
+
+
+def file_digest(file_path: str, block_size: int = 1 << 20) -> str:
+    """blake2b digest of the content of a file, read in blocks."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentCache:
+    def __init__(self, cache_dir: str, compression_level: int = 6):
+        """
+        On-disk cache of parsed documents.
+
+        Entries are keyed by the content hash of the file, the loader class and
+        the versions of the packages doing the parsing, so an edited file or an
+        upgraded parser is parsed again while re-chunking an unchanged corpus
+        skips parsing altogether. Each entry is the loader output as
+        zlib-compressed JSON, written atomically, so concurrent processes can
+        share a directory.
+
+        Args:
+            cache_dir (str): Directory holding the entries; created if missing.
+            compression_level (int, optional): zlib level, 1 (fastest) to 9 (smallest). Defaults to 6.
+        """
+        if not isinstance(compression_level, int) or not 1 <= compression_level <= 9:
+            raise ValueError("compression_level must be an integer from 1 to 9")
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.compression_level = compression_level
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, file_path: str, loader: Type) -> str:
+        """Cache key of `file_path` parsed by `loader`."""
+        loader_name = f"{loader.__module__}.{loader.__qualname__}"
+        digest = hashlib.blake2b(digest_size=20)
+        for part in (str(CACHE_FORMAT), file_digest(file_path), loader_name, loader_version(loader)):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir/key[:2]/f"{key}.json.z"
+
+    def get(self, key: str, file_path: str) -> Optional[List[Document]]:
+        """
+        The cached documents of `key`, or None when missing or unreadable.
+
+        Entries are shared by identical files, so path metadata such as
+        `source` is set from `file_path` rather than from the file first parsed.
+        """
+        path = self._path(key)
+        try:
+            payload = json.loads(zlib.decompress(path.read_bytes()))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, zlib.error, ValueError) as e:
+            logging.warning(f"Ignoring unreadable document cache entry {path}: {e}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        documents = []
+        for text, document_metadata in payload:
+            for name in PATH_METADATA.keys() & document_metadata.keys():
+                document_metadata[name] = PATH_METADATA[name](file_path)
+            documents.append(Document(page_content=text, metadata=document_metadata))
+        return documents
+
+    def put(self, key: str, documents: List[Document]):
+        """Store `documents` under `key`, replacing any previous entry. Path metadata is stored empty."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        payload = json.dumps(
+            [[document.page_content, {name: None if name in PATH_METADATA else value
+                                      for name, value in document.metadata.items()}]
+             for document in documents],
+            ensure_ascii=False, default=str)
+        data = zlib.compress(payload.encode(), self.compression_level)
+
+        descriptor, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def load(self, file_path: str, loader: Type) -> List[Document]:
+        """
+        Parse `file_path` with `loader`, or return its cached documents.
+
+        Returns:
+            List[Document]: The documents, as `loader(file_path).load()` returned them.
+        """
+        key = self.key(file_path, loader)
+        documents = self.get(key, file_path)
+        if documents is not None:
+            instrumentation.increment("document_cache_hits")
+            return documents
+
+        with instrumentation.span("load", loader=loader.__name__):
+            documents = loader(file_path).load()
+        self.put(key, documents)
+        return documents
+
+    def clear(self):
+        """Remove every entry."""
+        for path in self.cache_dir.glob("*/*.json.z"):
+            path.unlink(missing_ok=True)
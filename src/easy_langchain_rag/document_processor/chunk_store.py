@@ -0,0 +1,194 @@
+from array import array
+from collections.abc import Sequence
+from typing_extensions import Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain_core.documents import Document
+
+
+def _metadata_key(metadata: dict):
+    """Hashable key of a metadata dict, used to store equal dicts once."""
+    try:
+        key = tuple(sorted(metadata.items()))
+        # Sorting succeeds on unhashable values such as lists; hashing does not
+        hash(key)
+        return key
+    except TypeError:
+        # Unorderable keys or unhashable values
+        return repr(sorted(metadata.items(), key=lambda item: repr(item[0])))
+
+
+class ChunkStore(Sequence):
+    def __init__(self):
+        """
+        Compact container of document chunks.
+
+        Each source text is stored once and a chunk is only a (source id, start,
+        end) entry in typed arrays, plus the id of its metadata dict; equal
+        metadata dicts are stored once. `Document` objects are built only when a
+        chunk is indexed or iterated, and `texts()`/`metadatas()` serve
+        consumers that do not need them at all.
+
+        Chunks added by offsets get `start` and `end` metadata like
+        OffsetTextSplitter chunks; chunks added as whole Documents keep their
+        own metadata unchanged.
+        """
+        self._sources: List[str] = []
+        self._source_offsets = array("b")
+        self._source_ids = array("I")
+        self._starts = array("Q")
+        self._ends = array("Q")
+        self._metadata_ids = array("I")
+        self._metadata: List[dict] = []
+        self._metadata_index: Dict[object, int] = {}
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document]) -> "ChunkStore":
+        """Build a store from already split chunks; each chunk text becomes its own source."""
+        store = cls()
+        store.extend(documents)
+        return store
+
+    @classmethod
+    def from_splitter(cls, documents: Iterable[Document], splitter) -> "ChunkStore":
+        """
+        Split documents straight into a store, without building chunk Documents.
+
+        Args:
+            documents (Iterable[Document]): The loaded documents.
+            splitter (OffsetTextSplitter): A splitter exposing `split_offsets`.
+
+        Returns:
+            ChunkStore: The chunks of all documents.
+        """
+        store = cls()
+        store.add_split(documents, splitter)
+        return store
+
+    def add_split(self, documents: Iterable[Document], splitter) -> None:
+        """Split documents with an OffsetTextSplitter and add their chunks by offsets."""
+        for document in documents:
+            source_id = self.add_source(document.page_content)
+            metadata_id = self._intern(document.metadata)
+            for start, end in splitter.split_offsets(document.page_content):
+                self._append(source_id, start, end, metadata_id)
+
+    def _intern(self, metadata: Optional[dict]) -> int:
+        metadata = metadata or {}
+        key = _metadata_key(metadata)
+        metadata_id = self._metadata_index.get(key)
+        if metadata_id is None:
+            metadata_id = self._metadata_index[key] = len(self._metadata)
+            self._metadata.append(dict(metadata))
+        return metadata_id
+
+    def _append(self, source_id: int, start: int, end: int, metadata_id: int) -> None:
+        self._source_ids.append(source_id)
+        self._starts.append(start)
+        self._ends.append(end)
+        self._metadata_ids.append(metadata_id)
+
+    def add_source(self, text: str, offsets: bool = True) -> int:
+        """Store a source text and return its id."""
+        self._sources.append(text)
+        self._source_offsets.append(1 if offsets else 0)
+        return len(self._sources) - 1
+
+    def add_chunk(self, source_id: int, start: int, end: int, metadata: dict = None) -> int:
+        """
+        Add the chunk `text[start:end]` of a stored source.
+
+        Args:
+            source_id (int): Id returned by `add_source`.
+            start (int): Offset of the first character.
+            end (int): Offset after the last character.
+            metadata (dict, optional): Metadata of the chunk, without offsets. Defaults to None.
+
+        Returns:
+            int: The index of the chunk.
+        """
+        if not 0 <= start <= end <= len(self._sources[source_id]):
+            raise ValueError("start and end must be offsets within the source text")
+
+        self._append(source_id, start, end, self._intern(metadata))
+        return len(self._starts) - 1
+
+    def append(self, document: Document) -> int:
+        """Add a whole Document as a chunk."""
+        source_id = self.add_source(document.page_content, offsets=False)
+        self._append(source_id, 0, len(document.page_content), self._intern(document.metadata))
+        return len(self._starts) - 1
+
+    def extend(self, documents: Iterable[Document]) -> None:
+        for document in documents:
+            self.append(document)
+
+    def select(self, indexes: Iterable[int], metadatas: Dict[int, dict] = None) -> "ChunkStore":
+        """
+        Return a store with only the given chunks, sharing the source texts.
+
+        Args:
+            indexes (Iterable[int]): Indexes of the chunks to keep, in the wanted order.
+            metadatas (Dict[int, dict], optional): Replacement metadata by chunk index. Defaults to None.
+
+        Returns:
+            ChunkStore: The selected chunks.
+        """
+        metadatas = metadatas or {}
+        store = ChunkStore()
+        store._sources = self._sources
+        store._source_offsets = self._source_offsets
+        store._metadata = list(self._metadata)
+        store._metadata_index = dict(self._metadata_index)
+        for index in indexes:
+            metadata_id = self._metadata_ids[index]
+            if index in metadatas:
+                metadata = {k: v for k, v in metadatas[index].items() if k not in ("start", "end")}
+                metadata_id = store._intern(metadata)
+            store._append(self._source_ids[index], self._starts[index], self._ends[index], metadata_id)
+        return store
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def text(self, index: int) -> str:
+        return self._sources[self._source_ids[index]][self._starts[index]:self._ends[index]]
+
+    def metadata(self, index: int) -> dict:
+        metadata = dict(self._metadata[self._metadata_ids[index]])
+        if self._source_offsets[self._source_ids[index]]:
+            metadata["start"] = self._starts[index]
+            metadata["end"] = self._ends[index]
+        return metadata
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chunk index out of range")
+        return Document(page_content=self.text(index), metadata=self.metadata(index))
+
+    def __iter__(self) -> Iterator[Document]:
+        for index in range(len(self)):
+            yield Document(page_content=self.text(index), metadata=self.metadata(index))
+
+    def texts(self) -> Iterator[str]:
+        """Yield the chunk texts only."""
+        sources, starts, ends = self._sources, self._starts, self._ends
+        for source_id, start, end in zip(self._source_ids, starts, ends):
+            yield sources[source_id][start:end]
+
+    def metadatas(self) -> Iterator[dict]:
+        for index in range(len(self)):
+            yield self.metadata(index)
+
+    def batches(self, size: int) -> Iterator[Tuple[List[str], List[dict]]]:
+        """Yield (texts, metadatas) lists of at most `size` chunks."""
+        for offset in range(0, len(self), size):
+            indexes = range(offset, min(offset + size, len(self)))
+            yield [self.text(i) for i in indexes], [self.metadata(i) for i in indexes]
+
+    def nbytes(self) -> int:
+        """Approximate size of the chunk arrays and source texts, in bytes."""
+        arrays = (self._source_offsets, self._source_ids, self._starts, self._ends, self._metadata_ids)
+        return sum(a.itemsize * len(a) for a in arrays) + sum(len(text) for text in self._sources)
@@ -0,0 +1,133 @@
+import re
+import zlib
+import logging
+import numpy as np
+from typing_extensions import Dict, List
+from langchain_core.documents import Document
+
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+class NearDuplicateFilter:
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16, shingle_size: int = 5, seed: int = 1):
+        """
+        Collapse near-duplicate chunks using MinHash signatures and an LSH index.
+
+        Each chunk is reduced to the set of its word shingles and signed with
+        `num_perm` MinHash values. Signatures are split into `bands` bands; chunks
+        sharing a band become candidates and are confirmed when the estimated
+        Jaccard similarity reaches `threshold`. The first chunk of each group is
+        kept and records where all of its copies came from.
+
+        Args:
+            threshold (float, optional): Minimum estimated Jaccard similarity of shingles. Defaults to 0.85.
+            num_perm (int, optional): Number of MinHash permutations. Defaults to 64.
+            bands (int, optional): Number of LSH bands; must divide num_perm. Defaults to 16.
+            shingle_size (int, optional): Number of words per shingle. Defaults to 5.
+            seed (int, optional): Seed of the permutations, so signatures are reproducible. Defaults to 1.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        # representative chunk index -> indexes of the chunks collapsed into it
+        self.duplicates: Dict[int, List[int]] = {}
+
+    def _shingles(self, text: str) -> np.ndarray:
+        words = _WORD_RE.findall(text.lower())
+        size = self.shingle_size
+        if len(words) <= size:
+            shingles = {" ".join(words)}
+        else:
+            shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text's word shingles."""
+        hashes = self._shingles(text) % np.uint64(_MERSENNE_PRIME)
+        permuted = (np.outer(hashes, self._a) + self._b) % np.uint64(_MERSENNE_PRIME)
+        return permuted.min(axis=0)
+
+    def filter(self, chunks: List[Document]) -> List[Document]:
+        """
+        Return the chunks with near duplicates removed.
+
+        A kept chunk that absorbed copies gets a `duplicate_sources` metadata entry
+        listing the metadata of every copy, including its own, so each source
+        location can still be traced. `self.duplicates` maps kept chunk indexes to
+        the indexes of the chunks collapsed into them.
+
+        Args:
+            chunks (List[Document]): The chunks, in document order.
+
+        Returns:
+            List[Document]: The deduplicated chunks, in document order.
+        """
+        self.duplicates = {}
+        exact: Dict[int, int] = {}
+        buckets: Dict[bytes, List[int]] = {}
+        signatures: Dict[int, np.ndarray] = {}
+        representative_of: Dict[int, int] = {}
+
+        for index, chunk in enumerate(chunks):
+            normalized = " ".join(chunk.page_content.split()).lower()
+            digest = zlib.crc32(normalized.encode("utf-8")) ^ (len(normalized) << 32)
+            original = exact.get(digest)
+            if original is not None and " ".join(chunks[original].page_content.split()).lower() == normalized:
+                # The first copy may itself have been collapsed into an earlier chunk
+                original = representative_of.get(original, original)
+                representative_of[index] = original
+                self.duplicates.setdefault(original, []).append(index)
+                continue
+            exact.setdefault(digest, index)
+
+            signature = self.signature(chunk.page_content)
+            keys = [
+                band.to_bytes(2, "little") + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                for band in range(self.bands)
+            ]
+            match = None
+            for key in keys:
+                for candidate in buckets.get(key, ()):
+                    if float(np.mean(signatures[candidate] == signature)) >= self.threshold:
+                        match = candidate
+                        break
+                if match is not None:
+                    break
+
+            if match is not None:
+                representative_of[index] = match
+                self.duplicates.setdefault(match, []).append(index)
+                continue
+
+            signatures[index] = signature
+            for key in keys:
+                buckets.setdefault(key, []).append(index)
+
+        kept = []
+        for index, chunk in enumerate(chunks):
+            if index in representative_of:
+                continue
+            copies = self.duplicates.get(index)
+            if copies:
+                sources = [dict(chunk.metadata)] + [dict(chunks[copy].metadata) for copy in copies]
+                chunk = Document(page_content=chunk.page_content, metadata={**chunk.metadata, "duplicate_sources": sources})
+            kept.append(chunk)
+
+        removed = len(chunks) - len(kept)
+        if removed:
+            logging.info(f"Collapsed {removed} near-duplicate chunks into {len(self.duplicates)} chunks")
+        return kept
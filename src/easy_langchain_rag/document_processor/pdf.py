@@ -0,0 +1,143 @@
+import os
+import logging
+from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing_extensions import Iterator, List, Tuple
+from langchain_core.documents import Document
+
+
+PDF_BACKENDS = ["pypdf", "pdfplumber"]
+
+# Defaults PyPDFLoader puts before the PDF's own info dictionary
+_PYPDF_DEFAULTS = {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+
+
+def _purge_metadata(metadata: dict) -> dict:
+    """Normalize a PDF info dictionary as the langchain PDF parsers do: lowercase keys without "/", ISO dates."""
+    purged = {}
+    for key, value in metadata.items():
+        if type(value) not in (str, int):
+            value = str(value)
+        key = key.lstrip("/").lower()
+        if key in ("creationdate", "moddate"):
+            try:
+                purged[key] = datetime.strptime(value.replace("'", ""), "D:%Y%m%d%H%M%S%z").isoformat("T")
+            except ValueError:
+                purged[key] = value
+        elif key == "page_count":
+            purged["total_pages"] = purged[key] = value
+        elif isinstance(value, str):
+            purged[key] = value.strip()
+        else:
+            purged[key] = value
+    return purged
+
+
+def read_pdf_metadata(file_path: str, backend: str = "pypdf") -> Tuple[dict, List[str]]:
+    """
+    Read the document-level metadata of a PDF without extracting any text.
+
+    Returns:
+        Tuple[dict, List[str]]: The metadata every page shares, as PyPDFLoader or
+            PDFPlumberLoader set it, `total_pages` included, and the page labels
+            (empty for pdfplumber, which does not report them).
+    """
+    if backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            # PDFPlumberLoader keeps the raw info keys next to their normalized form
+            return {**pdf.metadata, **_purge_metadata({**pdf.metadata, "source": file_path, "file_path": file_path,
+                                                       "total_pages": len(pdf.pages)})}, []
+
+    from pypdf import PdfReader
+    reader = PdfReader(file_path)
+    metadata = _purge_metadata({**_PYPDF_DEFAULTS, **(reader.metadata or {}),
+                                "source": file_path, "total_pages": len(reader.pages)})
+    return metadata, list(reader.page_labels)
+
+
+def extract_page_range(file_path: str, start: int, end: int, backend: str = "pypdf") -> List[Tuple[int, str]]:
+    """
+    Extract the text of pages `start` to `end` (exclusive) of a PDF.
+
+    Runs in a worker process, so each call opens the file itself and only the
+    texts of its own pages travel back to the parent.
+
+    Returns:
+        List[Tuple[int, str]]: (page number, text) pairs, zero-based like PyPDFLoader.
+    """
+    if backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            pages = []
+            for number in range(start, end):
+                page = pdf.pages[number]
+                pages.append((number, page.extract_text() or ""))
+                # pdfplumber caches parsed objects per page; drop them as we go
+                page.close()
+            return pages
+
+    from pypdf import PdfReader
+    reader = PdfReader(file_path)
+    return [(number, reader.pages[number].extract_text() or "") for number in range(start, end)]
+
+
+def _page_metadata(metadata: dict, page_labels: List[str], number: int) -> dict:
+    if page_labels:
+        return {**metadata, "page": number, "page_label": page_labels[number]}
+    return {**metadata, "page": number}
+
+
+def iter_pdf_pages(
+    file_path: str,
+    backend: str = "pypdf",
+    workers: int = None,
+    pages_per_task: int = 16,
+    max_in_flight: int = None,
+) -> Iterator[List[Document]]:
+    """
+    Extract a PDF page range by page range in a process pool.
+
+    Batches are yielded in page order as soon as they are ready. At most
+    `max_in_flight` ranges are extracted or waiting at any time, so memory stays
+    bounded by the window rather than by the size of the document.
+
+    Args:
+        file_path (str): Path to the PDF.
+        backend (str, optional): "pypdf" (as PyPDFLoader) or "pdfplumber" (as PDFPlumberLoader). Defaults to "pypdf".
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        pages_per_task (int, optional): Pages extracted per task. Defaults to 16.
+        max_in_flight (int, optional): Maximum number of pending tasks. Defaults to twice the workers.
+
+    Yields:
+        List[Document]: One Document per page, in page order, with the metadata the matching
+            loader sets: `source`, `page`, `total_pages`, the PDF's info and, for pypdf, `page_label`.
+    """
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"backend must be one of {PDF_BACKENDS}")
+
+    if not isinstance(pages_per_task, int) or pages_per_task < 1:
+        raise ValueError("pages_per_task must be a positive integer")
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    metadata, page_labels = read_pdf_metadata(file_path, backend)
+    total = metadata["total_pages"]
+    ranges = iter([(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)])
+    logging.info(f"Extracting {total} pages of {file_path} with {workers} workers")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, end in ranges:
+            pending.append(executor.submit(extract_page_range, file_path, start, end, backend))
+            if len(pending) >= max_in_flight:
+                break
+
+        while pending:
+            pages = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append(executor.submit(extract_page_range, file_path, *next_range, backend))
+            yield [Document(page_content=text, metadata=_page_metadata(metadata, page_labels, number))
+                   for number, text in pages]
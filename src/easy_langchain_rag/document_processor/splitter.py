@@ -0,0 +1,103 @@
+from typing_extensions import Iterable, Iterator, List, Tuple
+from langchain_core.documents import Document
+from langchain.text_splitter import TextSplitter
+
+
+# Break points tried from the coarsest to the finest; a chunk is cut hard only when none fits
+SEPARATOR_MODES = {
+    " ": (" ",),
+    "\n": ("\n", " "),
+    "paragraph": ("\n\n", "\n", " "),
+}
+
+
+class OffsetTextSplitter(TextSplitter):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 0, separator: str = " ", **kwargs):
+        """
+        Single-pass splitter that works on character offsets.
+
+        Instead of splitting the text into pieces and merging them back, it walks
+        the text once: for each chunk it looks backwards from `start + chunk_size`
+        for the last separator of the mode and slices the text only once, for the
+        final chunk. The offsets of every chunk in its source document are stored
+        as `start` and `end` metadata.
+
+        Args:
+            chunk_size (int, optional): Maximum number of characters per chunk. Defaults to 1000.
+            chunk_overlap (int, optional): Number of characters the next chunk may repeat, rounded to a word. Defaults to 0.
+            separator (str, optional): " " breaks between words, "\\n" between lines and "paragraph"
+                between blank-line separated paragraphs, each falling back to finer breaks. Defaults to " ".
+        """
+        if separator not in SEPARATOR_MODES:
+            raise ValueError(f"separator must be one of {list(SEPARATOR_MODES)}")
+
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap, **kwargs)
+        self.separator = separator
+        self._breaks = SEPARATOR_MODES[separator]
+
+    def split_offsets(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield the (start, end) offsets of the chunks of a text, whitespace trimmed."""
+        size, overlap, breaks = self._chunk_size, self._chunk_overlap, self._breaks
+        length = len(text)
+        start = previous_end = 0
+        while start < length and text[start].isspace():
+            start += 1
+
+        while start < length:
+            limit = start + size
+            if limit >= length:
+                end = next_start = length
+            else:
+                end = -1
+                # An overlapping chunk must still reach past the previous one
+                lowest = max(start, previous_end) + 1
+                for separator in breaks:
+                    # A separator right after the window still closes a full chunk
+                    end = text.rfind(separator, lowest, limit + len(separator))
+                    if end != -1:
+                        break
+                if end == -1:
+                    end = limit
+                next_start = end
+
+            chunk_end = end
+            while chunk_end > start and text[chunk_end - 1].isspace():
+                chunk_end -= 1
+            if chunk_end > start:
+                yield start, chunk_end
+            # First character the next chunk has to cover
+            previous_end = end
+            while previous_end < length and text[previous_end].isspace():
+                previous_end += 1
+
+            # Only whitespace may be left; an overlapping restart would re-emit part of this chunk
+            if previous_end >= length:
+                return
+
+            if overlap:
+                # Restart at the first word that begins in the last `overlap` characters, but never
+                # repeat more than half a chunk, or short chunks would be re-emitted word by word
+                target = max(chunk_end - overlap, (start + chunk_end) // 2 + 1)
+                space, newline = text.find(" ", target, chunk_end), text.find("\n", target, chunk_end)
+                candidates = [position for position in (space, newline) if position != -1]
+                if candidates:
+                    next_start = min(candidates) + 1
+            start = next_start
+            while start < length and text[start].isspace():
+                start += 1
+
+    def split_text(self, text: str) -> List[str]:
+        return [text[start:end] for start, end in self.split_offsets(text)]
+
+    def create_documents(self, texts: Iterable[str], metadatas: List[dict] = None) -> List[Document]:
+        texts = list(texts)
+        metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        for text, metadata in zip(texts, metadatas):
+            for start, end in self.split_offsets(text):
+                documents.append(Document(page_content=text[start:end], metadata={**metadata, "start": start, "end": end}))
+        return documents
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        documents = list(documents)
+        return self.create_documents([d.page_content for d in documents], [d.metadata for d in documents])
@@ -0,0 +1,37 @@
+from typing_extensions import List, Protocol, runtime_checkable
+from .onnx import OnnxEmbeddings
+from .pool import ProcessPoolEmbeddings
+
+
+@runtime_checkable
+class EmbeddingBackend(Protocol):
+    """
+    What the package needs from an embedding model.
+
+    Any langchain `Embeddings` qualifies, as does any object with these two
+    methods, e.g. `OnnxEmbeddings` or `ProcessPoolEmbeddings`.
+    """
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+    def embed_query(self, text: str) -> List[float]:
+        ...
+
+
+def is_embedding_backend(obj) -> bool:
+    """True for an embedding model instance, False for a class or anything else."""
+    return not isinstance(obj, type) and isinstance(obj, EmbeddingBackend)
+
+
+def validate_embeddings(embeddings, name: str = "embeddings"):
+    """
+    Raise ValueError unless `embeddings` is None or an embedding backend instance.
+
+    Returns:
+        The embeddings, unchanged.
+    """
+    if embeddings is not None and not is_embedding_backend(embeddings):
+        raise ValueError(f"{name} must implement embed_documents and embed_query. {embeddings}: {type(embeddings)}")
+    return embeddings
+
@@ -0,0 +1,173 @@
+import logging
+import threading
+from pathlib import Path
+import numpy as np
+from typing_extensions import List, Optional
+from langchain_core.embeddings import Embeddings
+from ..instrumentation import instrumentation
+
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_int8.onnx"
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = True, opset: int = 17) -> Path:
+    """
+    Export a Hugging Face transformer encoder to ONNX, optionally with an int8 copy.
+
+    Needs torch and transformers, which sentence-transformers already brings
+    in; only the export needs them, not inference.
+
+    Args:
+        model_name (str): The model to export, e.g. "sentence-transformers/all-MiniLM-L6-v2".
+        output_dir (str): Directory receiving the ONNX model(s) and the tokenizer files.
+        quantize (bool, optional): Also write a dynamically int8-quantized model. Defaults to True.
+        opset (int, optional): ONNX opset version. Defaults to 17.
+
+    Returns:
+        Path: The output directory.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(output)
+
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in names),
+            str(output/MODEL_FILE),
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    if quantize:
+        quantize_onnx(output/MODEL_FILE, output/QUANTIZED_MODEL_FILE)
+    return output
+
+
+def quantize_onnx(model_path: Path, output_path: Path) -> Path:
+    """Write a dynamically int8-quantized copy of an ONNX model: int8 weights, float activations."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(model_path), str(output_path), weight_type=QuantType.QInt8)
+    return Path(output_path)
+
+
+class OnnxEmbeddings(Embeddings):
+    def __init__(self, model_dir: str, quantized: bool = True, batch_size: int = 32, max_length: int = 256,
+                 normalize: bool = True, intra_op_threads: Optional[int] = None):
+        """
+        Sentence embeddings computed with ONNX Runtime on CPU.
+
+        Runs a transformer encoder exported by `export_onnx` and mean-pools its
+        token states like sentence-transformers does, without torch at
+        inference time. The int8-quantized model is several times faster than
+        the float one on CPU at a small accuracy cost; check it with
+        `python -m benchmarks parity`. Texts are sorted by length before
+        batching so that batches carry little padding.
+
+        Args:
+            model_dir (str): Directory written by `export_onnx`.
+            quantized (bool, optional): Use the int8 model, quantizing the float one if it is missing. Defaults to True.
+            batch_size (int, optional): Texts per inference call. Defaults to 32.
+            max_length (int, optional): Tokens kept per text. Defaults to 256.
+            normalize (bool, optional): L2-normalize the vectors. Defaults to True.
+            intra_op_threads (int, optional): Threads used by ONNX Runtime per call. Defaults to all cores.
+        """
+        path = Path(model_dir)
+        if not (path/MODEL_FILE).exists() and not (path/QUANTIZED_MODEL_FILE).exists():
+            raise ValueError(f"No ONNX model in {model_dir}. Create one with export_onnx.")
+
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+
+        self.model_dir = path
+        self.quantized = quantized
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.normalize = normalize
+        self.intra_op_threads = intra_op_threads
+        self._session = None
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_path(self) -> Path:
+        if not self.quantized:
+            return self.model_dir/MODEL_FILE
+        quantized = self.model_dir/QUANTIZED_MODEL_FILE
+        if not quantized.exists():
+            logging.info(f"Quantizing {self.model_dir/MODEL_FILE} to int8")
+            quantize_onnx(self.model_dir/MODEL_FILE, quantized)
+        return quantized
+
+    def _load(self):
+        if self._session is not None:
+            return
+        with self._lock:
+            if self._session is not None:
+                return
+            import onnxruntime
+            from transformers import AutoTokenizer
+
+            options = onnxruntime.SessionOptions()
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.intra_op_threads:
+                options.intra_op_num_threads = self.intra_op_threads
+            with instrumentation.span("embedding_model_load", backend="onnx"):
+                self._tokenizer = AutoTokenizer.from_pretrained(str(self.model_dir))
+                self._session = onnxruntime.InferenceSession(
+                    str(self.model_path), options, providers=["CPUExecutionProvider"])
+            self._input_names = {node.name for node in self._session.get_inputs()}
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encoded = self._tokenizer(texts, padding=True, truncation=True, max_length=self.max_length,
+                                  return_tensors="np")
+        inputs = {name: encoded[name].astype(np.int64) for name in self._input_names if name in encoded}
+        if "token_type_ids" in self._input_names and "token_type_ids" not in inputs:
+            inputs["token_type_ids"] = np.zeros_like(inputs["input_ids"])
+        states = self._session.run(None, inputs)[0]
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        vectors = (states * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        self._load()
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        with instrumentation.span("embed_documents", backend="onnx", texts=len(texts)):
+            for offset in range(0, len(order), self.batch_size):
+                batch = order[offset:offset + self.batch_size]
+                batch_vectors = self._encode([texts[i] for i in batch])
+                if vectors.shape[1] == 0:
+                    vectors = np.empty((len(texts), batch_vectors.shape[1]), dtype=np.float32)
+                vectors[batch] = batch_vectors
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def __getstate__(self):
+        # Sessions are not picklable; workers of ProcessPoolEmbeddings load their own
+        state = self.__dict__.copy()
+        state.update(_session=None, _tokenizer=None, _lock=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,119 @@
+import os
+import logging
+import threading
+import multiprocessing
+from functools import partial
+from typing_extensions import Callable, List, Optional
+from langchain_core.embeddings import Embeddings
+from ..instrumentation import instrumentation
+
+
+# The model of a worker process, built once by _init_worker
+_worker_embeddings = None
+
+
+def _init_worker(factory: Callable[[], Embeddings], threads: int):
+    global _worker_embeddings
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_embeddings = factory()
+
+
+def _embed_chunk(texts: List[str]) -> List[List[float]]:
+    return _worker_embeddings.embed_documents(texts)
+
+
+def _huggingface(model_name: str) -> Embeddings:
+    from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+class ProcessPoolEmbeddings(Embeddings):
+    def __init__(self, factory: Callable[[], Embeddings] = None,
+                 model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 processes: Optional[int] = None, threads_per_process: int = 1, chunk_size: int = 256,
+                 start_method: str = "spawn"):
+        """
+        Embeddings computed by a pool of worker processes, for bulk ingestion on CPU.
+
+        Each worker builds its own model once, limited to `threads_per_process`
+        threads, and documents are sent to the workers in chunks of
+        `chunk_size`. Several single-threaded workers keep every core busy on
+        the small batches ingestion produces, where one multi-threaded model
+        spends much of its time synchronizing. The pool starts on first use;
+        call `close()` (or use the instance as a context manager) to stop it.
+
+        Args:
+            factory (Callable[[], Embeddings], optional): Picklable callable building the model in a worker,
+                e.g. `functools.partial(OnnxEmbeddings, "onnx/minilm")`. Defaults to HuggingFaceEmbeddings
+                of `model_name`.
+            model_name (str, optional): Model of the default factory. Defaults to "sentence-transformers/all-MiniLM-L6-v2".
+            processes (int, optional): Number of workers. Defaults to the number of CPUs.
+            threads_per_process (int, optional): Threads of each worker's model. Defaults to 1.
+            chunk_size (int, optional): Texts sent to a worker at a time. Defaults to 256.
+            start_method (str, optional): multiprocessing start method; "spawn" is safe with torch. Defaults to "spawn".
+        """
+        if processes is not None and (not isinstance(processes, int) or processes < 1):
+            raise ValueError("processes must be a positive integer")
+
+        if not isinstance(chunk_size, int) or chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+
+        self.factory = factory or partial(_huggingface, model_name)
+        self.processes = processes or os.cpu_count() or 1
+        self.threads_per_process = threads_per_process
+        self.chunk_size = chunk_size
+        self.start_method = start_method
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    context = multiprocessing.get_context(self.start_method)
+                    logging.info(f"Starting {self.processes} embedding worker processes")
+                    self._pool = context.Pool(self.processes, initializer=_init_worker,
+                                              initargs=(self.factory, self.threads_per_process))
+        return self._pool
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        with instrumentation.span("embed_documents", backend="process_pool", texts=len(texts)):
+            # imap keeps the input order and lets results come back while later chunks are encoded
+            vectors = []
+            for chunk_vectors in self._get_pool().imap(_embed_chunk, chunks):
+                vectors.extend(chunk_vectors)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._get_pool().apply(_embed_chunk, ([text],))[0]
+
+    def close(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+
+    def __enter__(self) -> "ProcessPoolEmbeddings":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_pool=None, _lock=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
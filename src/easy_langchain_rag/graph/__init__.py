@@ -7,6 +7,10 @@ from langgraph.checkpoint.redis import RedisSaver
 from langgraph.prebuilt import ToolNode
 from langgraph.graph import StateGraph, END
 from langgraph.store.base import BaseStore
+from .checkpointer import PolicyCheckpointSaver, CHECKPOINT_POLICIES
+from .response_cache import SemanticResponseCache
+from ..persistance.chat_management import ChatManagement
+from ..instrumentation import instrumentation
 
 
 class GraphBuilder:
@@ -17,7 +21,12 @@ class GraphBuilder:
         check_pointer: Type[Union[InMemorySaver, MemorySaver, PostgresSaver, RedisSaver]],
         store: Type[BaseStore],
         entry_point: str = None,
-        tools: Type[List[BaseTool]] = ToolNode([])
+        tools: Type[List[BaseTool]] = ToolNode([]),
+        checkpoint_policy: str = None,
+        checkpoint_every: int = 1,
+        delta_channels: Tuple[str, ...] = ("messages",),
+        response_cache: SemanticResponseCache = None,
+        chat_management: ChatManagement = None
     ):
         """
         Initialize a Graph object.
@@ -29,13 +38,35 @@ class GraphBuilder:
             store (Type[BaseStore]): The storage backend for persisting graph data.
             entry_point (str): The entry point node for the graph.
             tools (Type[List[BaseTool]], optional): A list of tools to be used within the graph. Defaults to an empty ToolNode list.
+            checkpoint_policy (str, optional): When to write checkpoints: "every_step", "every_n" or "on_end".
+                Defaults to None, which hands the checkpointer to the graph unchanged.
+            checkpoint_every (int, optional): Number of supersteps between writes for the "every_n" policy. Defaults to 1.
+            delta_channels (Tuple[str, ...], optional): List channels stored as deltas against the previous checkpoint
+                when a checkpoint_policy is set. Defaults to ("messages",).
+            response_cache (SemanticResponseCache, optional): Cache answers of the node named by the cache's
+                node_name. Defaults to None.
+            chat_management (ChatManagement, optional): Record every answer of the node named by its node_name
+                as a turn of the conversation whose ID is the run's thread_id. Defaults to None.
         """
+        if checkpoint_policy is not None and checkpoint_policy not in CHECKPOINT_POLICIES:
+            raise ValueError(f"checkpoint_policy must be one of {CHECKPOINT_POLICIES}")
+
+        if checkpoint_policy is not None and check_pointer is not None:
+            check_pointer = PolicyCheckpointSaver(
+                check_pointer,
+                policy=checkpoint_policy,
+                every=checkpoint_every,
+                delta_channels=delta_channels,
+            )
+
         self.state = state
         self.nodes = nodes
         self.tools = tools
         self.check_pointer = check_pointer
         self.store = store
         self.entry_point = entry_point
+        self.response_cache = response_cache
+        self.chat_management = chat_management
 
     def _initialize_state(self):
         """
@@ -58,7 +89,13 @@ class GraphBuilder:
         graph_builder = self._initialize_state()
 
         for node in self.nodes:
-            graph_builder.add_node(node[0], node[1])
+            action = node[1]
+            if self.response_cache is not None and node[0] == self.response_cache.node_name:
+                action = self.response_cache.wrap_node(action)
+            # Outside the cache, so cached answers are recorded too
+            if self.chat_management is not None and node[0] == self.chat_management.node_name:
+                action = self.chat_management.wrap_node(action)
+            graph_builder.add_node(node[0], instrumentation.wrap_node(node[0], action))
 
         # Add tools node if provided
         if self.tools:
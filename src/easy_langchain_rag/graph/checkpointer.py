@@ -0,0 +1,494 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing_extensions import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple)
+from langgraph.constants import INTERRUPT, ERROR
+
+
+CHECKPOINT_POLICIES = ["every_step", "every_n", "on_end"]
+
+# Key used to mark a channel value that is stored as a delta against an earlier checkpoint
+DELTA_MARKER = "__delta_base__"
+
+
+def _is_delta(value) -> bool:
+    return isinstance(value, dict) and DELTA_MARKER in value
+
+
+def _is_extension(base: list, value: list) -> bool:
+    """Return True if `value` starts with every item of `base`, in order."""
+    if len(value) < len(base):
+        return False
+    for old, new in zip(base, value):
+        if old is not new and old != new:
+            return False
+    return True
+
+
+class PolicyCheckpointSaver(BaseCheckpointSaver):
+    def __init__(
+        self,
+        saver: BaseCheckpointSaver,
+        policy: str = "every_step",
+        every: int = 1,
+        delta_channels: Sequence[str] = ("messages",),
+        snapshot_every: int = 20,
+        track_bytes: bool = True,
+        on_turn_end: Callable[[str, dict], None] = None,
+        max_threads: int = 1024,
+    ):
+        """
+        Wrap a checkpointer so that state is only persisted according to a write policy.
+
+        Skipped checkpoints are kept in memory so the running graph and the next
+        turn still see them, but they are not written to the underlying saver.
+        List-valued channels such as `messages` are written as deltas against the
+        previous persisted checkpoint instead of the full list.
+
+        Args:
+            saver (BaseCheckpointSaver): The checkpointer that actually stores the checkpoints.
+            policy (str, optional): One of "every_step", "every_n" or "on_end". Defaults to "every_step".
+            every (int, optional): Number of supersteps between writes for the "every_n" policy. Defaults to 1.
+            delta_channels (Sequence[str], optional): Channels holding lists to store as deltas. Defaults to ("messages",).
+            snapshot_every (int, optional): Write a full list after this many consecutive deltas so that
+                reads never walk a long chain. Defaults to 20.
+            track_bytes (bool, optional): If True, measure the serialized bytes written per turn. Defaults to True.
+            on_turn_end (Callable[[str, dict], None], optional): Called with the thread id and the turn stats
+                when the final checkpoint of a turn is written. Defaults to None.
+            max_threads (int, optional): Number of threads whose last persisted lists are cached. Defaults to 1024.
+        """
+        if policy not in CHECKPOINT_POLICIES:
+            raise ValueError(f"policy must be one of {CHECKPOINT_POLICIES}")
+
+        if not isinstance(every, int) or every < 1:
+            raise ValueError("every must be a positive integer")
+
+        if not isinstance(snapshot_every, int) or snapshot_every < 1:
+            raise ValueError("snapshot_every must be a positive integer")
+
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.policy = policy
+        self.every = every if policy == "every_n" else 1
+        self.delta_channels = tuple(delta_channels)
+        self.snapshot_every = snapshot_every
+        self.track_bytes = track_bytes
+        self.on_turn_end = on_turn_end
+        self.max_threads = max_threads
+
+        self._lock = threading.RLock()
+        # (thread_id, checkpoint_ns) -> checkpoint waiting to be written
+        self._pending: Dict[Tuple[str, str], dict] = {}
+        # (thread_id, checkpoint_ns) -> id, lists and delta chain length of the last written checkpoint
+        self._persisted: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        # thread_id -> stats of the current turn
+        self._turns: Dict[str, dict] = {}
+        self.total_bytes_written = 0
+
+    @property
+    def config_specs(self) -> list:
+        return self.saver.config_specs
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    @staticmethod
+    def _key(config: RunnableConfig) -> Tuple[str, str]:
+        configurable = config["configurable"]
+        return configurable["thread_id"], configurable.get("checkpoint_ns", "")
+
+    @staticmethod
+    def _with_checkpoint_id(config: RunnableConfig, checkpoint_id: Optional[str]) -> RunnableConfig:
+        configurable = {k: v for k, v in config["configurable"].items() if k != "checkpoint_id"}
+        if checkpoint_id:
+            configurable["checkpoint_id"] = checkpoint_id
+        return {**config, "configurable": configurable}
+
+    def _turn(self, thread_id: str) -> dict:
+        turn = self._turns.get(thread_id)
+        if turn is None:
+            turn = self._turns[thread_id] = {
+                "bytes_written": 0,
+                "checkpoints_written": 0,
+                "checkpoints_skipped": 0,
+                "writes_written": 0,
+            }
+        return turn
+
+    def _measure(self, values) -> int:
+        if not self.track_bytes:
+            return 0
+        return sum(len(self.serde.dumps_typed(value)[1]) for value in values)
+
+    def _is_terminal(self, checkpoint: Checkpoint, metadata: CheckpointMetadata) -> bool:
+        """
+        Guess whether a checkpoint is the last one of a run.
+
+        A step that does not route to any other node leaves no `branch:to:*` (or Send) channel updated.
+        Older langgraph versions do not report updated channels, in which case every checkpoint is
+        treated as terminal so that nothing is ever lost.
+        """
+        if metadata.get("source") == "input":
+            return False
+        updated = checkpoint.get("updated_channels")
+        if updated is None:
+            return True
+        return not any(channel.startswith("branch:to:") or channel == "__pregel_tasks" for channel in updated)
+
+    def _should_write(self, pending: dict, terminal: bool) -> bool:
+        if self.policy == "every_step" or terminal:
+            return True
+        if self.policy == "every_n":
+            return pending["steps"] >= self.every
+        return False
+
+    def _buffer(self, config, checkpoint, metadata, new_versions) -> Tuple[dict, bool]:
+        """Merge a new checkpoint into the pending buffer and decide if it must be written."""
+        key = self._key(config)
+        thread_id = key[0]
+        if metadata.get("source") == "input":
+            # A new invocation starts a new turn
+            self._turns.pop(thread_id, None)
+
+        previous = self._pending.get(key)
+        versions = dict(previous["new_versions"]) if previous else {}
+        versions.update(new_versions)
+        if previous:
+            self._turn(thread_id)["checkpoints_skipped"] += 1
+
+        pending = {
+            "config": config,
+            "checkpoint": checkpoint,
+            "metadata": metadata,
+            "new_versions": versions,
+            "writes": [],
+            "steps": (previous["steps"] if previous else 0) + 1,
+        }
+        self._pending[key] = pending
+        terminal = self._is_terminal(checkpoint, metadata)
+        pending["terminal"] = terminal
+        return pending, self._should_write(pending, terminal)
+
+    def _encode(self, key, pending) -> Tuple[RunnableConfig, Checkpoint, ChannelVersions]:
+        """Build the checkpoint actually handed to the saver, with deltas and a fixed-up parent."""
+        checkpoint = pending["checkpoint"]
+        values = checkpoint["channel_values"]
+        channel_versions = checkpoint["channel_versions"]
+        versions = {
+            channel: channel_versions[channel]
+            for channel in pending["new_versions"] if channel in channel_versions
+        }
+
+        state = self._persisted.get(key)
+        encoded = dict(values)
+        lists = dict(state["lists"]) if state else {}
+        chains = dict(state["chains"]) if state else {}
+        for channel in self.delta_channels:
+            value = values.get(channel)
+            if channel not in versions or not isinstance(value, list):
+                continue
+            base = lists.get(channel)
+            chain = chains.get(channel, 0)
+            if base is not None and chain < self.snapshot_every and _is_extension(base, value):
+                encoded[channel] = {DELTA_MARKER: state["id"], "offset": len(base), "tail": value[len(base):]}
+                chains[channel] = chain + 1
+            else:
+                chains[channel] = 0
+            lists[channel] = list(value)
+
+        # The parent of a written checkpoint is the last written one, not a skipped one
+        parent_config = self._with_checkpoint_id(pending["config"], state["id"] if state else None)
+
+        self._persisted[key] = {"id": checkpoint["id"], "lists": lists, "chains": chains}
+        self._persisted.move_to_end(key)
+        while len(self._persisted) > self.max_threads:
+            self._persisted.popitem(last=False)
+
+        turn = self._turn(key[0])
+        written = self._measure(encoded[channel] for channel in versions if channel in encoded)
+        turn["bytes_written"] += written
+        turn["checkpoints_written"] += 1
+        self.total_bytes_written += written
+
+        return parent_config, {**checkpoint, "channel_values": encoded}, versions
+
+    def _finish(self, key, pending):
+        self._pending.pop(key, None)
+        if pending.get("terminal"):
+            turn = self._turns.pop(key[0], None)
+            if turn is not None:
+                logging.info(f"Checkpoint turn for thread {key[0]}: {turn}")
+                if self.on_turn_end:
+                    self.on_turn_end(key[0], turn)
+
+    def _account_writes(self, thread_id: str, writes) -> None:
+        written = self._measure(value for _, value in writes)
+        turn = self._turn(thread_id)
+        turn["bytes_written"] += written
+        turn["writes_written"] += len(writes)
+        self.total_bytes_written += written
+
+    def _pending_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        key = self._key(config)
+        pending = self._pending.get(key)
+        if pending is None:
+            return None
+        checkpoint = pending["checkpoint"]
+        checkpoint_id = config["configurable"].get("checkpoint_id")
+        if checkpoint_id and checkpoint_id != checkpoint["id"]:
+            return None
+        state = self._persisted.get(key)
+        return CheckpointTuple(
+            config=self._with_checkpoint_id(pending["config"], checkpoint["id"]),
+            checkpoint=checkpoint,
+            metadata=pending["metadata"],
+            parent_config=self._with_checkpoint_id(pending["config"], state["id"]) if state else None,
+            pending_writes=[
+                (task_id, channel, value)
+                for task_id, _, writes in pending["writes"] for channel, value in writes
+            ],
+        )
+
+    def _cached_base(self, config: RunnableConfig, channel: str, base_id: str) -> Optional[list]:
+        state = self._persisted.get(self._key(config))
+        if state and state["id"] == base_id:
+            return state["lists"].get(channel)
+        return None
+
+    def _apply_deltas(self, checkpoint_tuple: CheckpointTuple, bases: Dict[str, list]) -> CheckpointTuple:
+        values = dict(checkpoint_tuple.checkpoint["channel_values"])
+        for channel, base in bases.items():
+            delta = values[channel]
+            values[channel] = list(base[:delta["offset"]]) + list(delta["tail"])
+        return checkpoint_tuple._replace(checkpoint={**checkpoint_tuple.checkpoint, "channel_values": values})
+
+    def _resolve(self, checkpoint_tuple: Optional[CheckpointTuple]) -> Optional[CheckpointTuple]:
+        """Rebuild full lists for channels stored as deltas."""
+        if checkpoint_tuple is None:
+            return None
+        values = checkpoint_tuple.checkpoint["channel_values"]
+        bases = {}
+        for channel in self.delta_channels:
+            delta = values.get(channel)
+            if not _is_delta(delta):
+                continue
+            base = self._cached_base(checkpoint_tuple.config, channel, delta[DELTA_MARKER])
+            if base is None:
+                base_tuple = self._resolve(self.saver.get_tuple(
+                    self._with_checkpoint_id(checkpoint_tuple.config, delta[DELTA_MARKER])))
+                if base_tuple is None:
+                    raise ValueError(f"Base checkpoint {delta[DELTA_MARKER]} of channel {channel} is missing")
+                base = base_tuple.checkpoint["channel_values"].get(channel, [])
+            bases[channel] = base
+        return self._apply_deltas(checkpoint_tuple, bases) if bases else checkpoint_tuple
+
+    async def _aresolve(self, checkpoint_tuple: Optional[CheckpointTuple]) -> Optional[CheckpointTuple]:
+        if checkpoint_tuple is None:
+            return None
+        values = checkpoint_tuple.checkpoint["channel_values"]
+        bases = {}
+        for channel in self.delta_channels:
+            delta = values.get(channel)
+            if not _is_delta(delta):
+                continue
+            base = self._cached_base(checkpoint_tuple.config, channel, delta[DELTA_MARKER])
+            if base is None:
+                base_tuple = await self._aresolve(await self.saver.aget_tuple(
+                    self._with_checkpoint_id(checkpoint_tuple.config, delta[DELTA_MARKER])))
+                if base_tuple is None:
+                    raise ValueError(f"Base checkpoint {delta[DELTA_MARKER]} of channel {channel} is missing")
+                base = base_tuple.checkpoint["channel_values"].get(channel, [])
+            bases[channel] = base
+        return self._apply_deltas(checkpoint_tuple, bases) if bases else checkpoint_tuple
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with self._lock:
+            pending = self._pending_tuple(config)
+        if pending is not None:
+            return pending
+        return self._resolve(self.saver.get_tuple(config))
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        for checkpoint_tuple in self.saver.list(config, filter=filter, before=before, limit=limit):
+            yield self._resolve(checkpoint_tuple)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        key = self._key(config)
+        with self._lock:
+            pending, should_write = self._buffer(config, checkpoint, metadata, new_versions)
+            if not should_write:
+                return self._with_checkpoint_id(config, checkpoint["id"])
+            parent_config, encoded, versions = self._encode(key, pending)
+        saved = self.saver.put(parent_config, encoded, metadata, versions)
+        with self._lock:
+            self._finish(key, pending)
+        return saved
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        key = self._key(config)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and pending["checkpoint"]["id"] == config["configurable"].get("checkpoint_id"):
+                pending["writes"].append((task_id, task_path, list(writes)))
+                if not any(channel in (INTERRUPT, ERROR) for channel, _ in writes):
+                    return
+                # The run stops here: write the checkpoint together with everything recorded for it
+                pending["terminal"] = True
+                parent_config, encoded, versions = self._encode(key, pending)
+            else:
+                pending = None
+            buffered = pending["writes"] if pending else [(task_id, task_path, list(writes))]
+            for _, _, task_writes in buffered:
+                self._account_writes(key[0], task_writes)
+
+        if pending is not None:
+            saved = self.saver.put(parent_config, encoded, pending["metadata"], versions)
+        else:
+            saved = config
+        for buffered_task_id, buffered_path, task_writes in buffered:
+            self.saver.put_writes(saved, task_writes, buffered_task_id, buffered_path)
+        if pending is not None:
+            with self._lock:
+                self._finish(key, pending)
+
+    def flush(self, config: RunnableConfig = None) -> None:
+        """
+        Write any checkpoint held back by the policy.
+
+        Args:
+            config (RunnableConfig, optional): Only flush this thread. Defaults to None, which flushes all threads.
+        """
+        with self._lock:
+            keys = [self._key(config)] if config else list(self._pending)
+        for key in keys:
+            with self._lock:
+                pending = self._pending.get(key)
+                if pending is None:
+                    continue
+                pending["terminal"] = True
+                parent_config, encoded, versions = self._encode(key, pending)
+                for _, _, task_writes in pending["writes"]:
+                    self._account_writes(key[0], task_writes)
+            saved = self.saver.put(parent_config, encoded, pending["metadata"], versions)
+            for task_id, task_path, task_writes in pending["writes"]:
+                self.saver.put_writes(saved, task_writes, task_id, task_path)
+            with self._lock:
+                self._finish(key, pending)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._pending if key[0] == thread_id]:
+                del self._pending[key]
+            for key in [key for key in self._persisted if key[0] == thread_id]:
+                del self._persisted[key]
+            self._turns.pop(thread_id, None)
+        self.saver.delete_thread(thread_id)
+
+    def last_turn_stats(self, thread_id: str) -> Optional[dict]:
+        """
+        Return the write stats of the turn currently running on a thread.
+
+        Finished turns are reported through `on_turn_end`.
+        """
+        with self._lock:
+            turn = self._turns.get(thread_id)
+            return dict(turn) if turn else None
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with self._lock:
+            pending = self._pending_tuple(config)
+        if pending is not None:
+            return pending
+        return await self._aresolve(await self.saver.aget_tuple(config))
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        async for checkpoint_tuple in self.saver.alist(config, filter=filter, before=before, limit=limit):
+            yield await self._aresolve(checkpoint_tuple)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        key = self._key(config)
+        with self._lock:
+            pending, should_write = self._buffer(config, checkpoint, metadata, new_versions)
+            if not should_write:
+                return self._with_checkpoint_id(config, checkpoint["id"])
+            parent_config, encoded, versions = self._encode(key, pending)
+        saved = await self.saver.aput(parent_config, encoded, metadata, versions)
+        with self._lock:
+            self._finish(key, pending)
+        return saved
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        key = self._key(config)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and pending["checkpoint"]["id"] == config["configurable"].get("checkpoint_id"):
+                pending["writes"].append((task_id, task_path, list(writes)))
+                if not any(channel in (INTERRUPT, ERROR) for channel, _ in writes):
+                    return
+                pending["terminal"] = True
+                parent_config, encoded, versions = self._encode(key, pending)
+            else:
+                pending = None
+            buffered = pending["writes"] if pending else [(task_id, task_path, list(writes))]
+            for _, _, task_writes in buffered:
+                self._account_writes(key[0], task_writes)
+
+        if pending is not None:
+            saved = await self.saver.aput(parent_config, encoded, pending["metadata"], versions)
+        else:
+            saved = config
+        for buffered_task_id, buffered_path, task_writes in buffered:
+            await self.saver.aput_writes(saved, task_writes, buffered_task_id, buffered_path)
+        if pending is not None:
+            with self._lock:
+                self._finish(key, pending)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._pending if key[0] == thread_id]:
+                del self._pending[key]
+            for key in [key for key in self._persisted if key[0] == thread_id]:
+                del self._persisted[key]
+            self._turns.pop(thread_id, None)
+        await self.saver.adelete_thread(thread_id)
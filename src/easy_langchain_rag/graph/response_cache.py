@@ -0,0 +1,362 @@
+import time
+import uuid
+import hashlib
+import inspect
+import logging
+import functools
+import threading
+from collections import OrderedDict
+import numpy as np
+from typing_extensions import Any, Callable, Dict, Iterable, List, Optional, Set
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage
+from langgraph.config import get_config
+from ..handlers.streaming_callback import SSEHandler
+from ..instrumentation import instrumentation
+
+
+def chunk_id(document: Document) -> str:
+    """
+    Return the id of a retrieved chunk.
+
+    FAISS sets `Document.id` to the docstore id; documents without one fall back to
+    the same content hash EmbeddingStoreManager uses as id.
+    """
+    if getattr(document, "id", None):
+        return document.id
+    if document.metadata.get("id"):
+        return document.metadata["id"]
+    chunk_text = " ".join(document.page_content.strip())
+    return hashlib.sha256(f"{chunk_text}".encode('utf-8')).hexdigest()
+
+
+def _state_get(state, key: str):
+    if isinstance(state, dict):
+        return state.get(key)
+    return getattr(state, key, None)
+
+
+def _answer_text(answer) -> str:
+    if isinstance(answer, str):
+        return answer
+    if isinstance(answer, BaseMessage):
+        return answer.content if isinstance(answer.content, str) else ""
+    if isinstance(answer, list) and answer:
+        return _answer_text(answer[-1])
+    return ""
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+def _fresh_messages(value):
+    """Copies of cached messages without their ids, so the messages reducer appends rather than replaces them."""
+    if isinstance(value, BaseMessage):
+        return value.model_copy(update={"id": None})
+    if isinstance(value, list) and any(isinstance(item, BaseMessage) for item in value):
+        return [_fresh_messages(item) for item in value]
+    return value
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "query", "vector", "answer", "update", "chunk_ids", "created_at")
+
+    def __init__(self, fingerprint: str, query: str, vector: Optional[np.ndarray], answer: Any,
+                 update: Dict[str, Any], chunk_ids: frozenset):
+        self.fingerprint = fingerprint
+        self.query = query
+        # Computed on the first semantic lookup that needs it
+        self.vector = vector
+        self.answer = answer
+        self.update = update
+        self.chunk_ids = chunk_ids
+        self.created_at = time.monotonic()
+
+
+class SemanticResponseCache:
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float = 0.95,
+        max_entries: int = 10000,
+        ttl: Optional[float] = None,
+        node_name: str = "generate",
+        query_key: str = "question",
+        documents_key: str = "context",
+        answer_key: str = "answer",
+    ):
+        """
+        Answer-level cache for compiled RAG graphs.
+
+        An entry is keyed by the query embedding and a fingerprint of the ids of the
+        chunks retrieved for it. A lookup hits when the retrieved chunks are the same
+        and the query embedding is at least `threshold` cosine-similar to a cached one,
+        in which case the generation node is skipped, its cached state update is
+        returned and the answer is streamed through any `SSEHandler` in the run's
+        callbacks. Queries are embedded lazily, only when they have to be compared
+        with cached queries retrieved from the same chunks.
+
+        Args:
+            embeddings (Embeddings): The model used to embed the query.
+            threshold (float, optional): Minimum cosine similarity for a hit. Defaults to 0.95.
+            max_entries (int, optional): Least recently used entries are evicted beyond this. Defaults to 10000.
+            ttl (float, optional): Seconds after which an entry expires. Defaults to None, no expiry.
+            node_name (str, optional): The graph node whose output is cached. Defaults to "generate".
+            query_key (str, optional): State key holding the user query. Defaults to "question".
+            documents_key (str, optional): State key holding the retrieved documents. Defaults to "context".
+            answer_key (str, optional): State key the node writes its answer to. Defaults to "answer".
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+
+        if not isinstance(max_entries, int) or max_entries < 1:
+            raise ValueError("max_entries must be a positive integer")
+
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.node_name = node_name
+        self.query_key = query_key
+        self.documents_key = documents_key
+        self.answer_key = answer_key
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_fingerprint: Dict[str, Set[str]] = {}
+        # (fingerprint, normalized query) -> entry id, answered without embedding anything
+        self._exact: Dict[tuple, str] = {}
+        self._by_chunk: Dict[str, Set[str]] = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def fingerprint(chunk_ids: Iterable[str]) -> str:
+        """Order-independent fingerprint of a set of chunk ids."""
+        return hashlib.sha256("\n".join(sorted(set(chunk_ids))).encode("utf-8")).hexdigest()
+
+    def _embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, entry_id: str) -> Optional[_Entry]:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return None
+        exact_key = (entry.fingerprint, _normalize_query(entry.query))
+        if self._exact.get(exact_key) == entry_id:
+            del self._exact[exact_key]
+        bucket = self._by_fingerprint.get(entry.fingerprint)
+        if bucket is not None:
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._by_fingerprint[entry.fingerprint]
+        for chunk in entry.chunk_ids:
+            entries = self._by_chunk.get(chunk)
+            if entries is not None:
+                entries.discard(entry_id)
+                if not entries:
+                    del self._by_chunk[chunk]
+        return entry
+
+    def _count(self, stat: str, value: int = 1):
+        self.stats[stat] += value
+        instrumentation.increment(f"response_cache_{stat}", value)
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl is not None and now - entry.created_at > self.ttl
+
+    def _lookup(self, query: str, chunk_ids: Iterable[str], vector: np.ndarray = None):
+        """
+        Find the entry answering a query, embedding only when a semantic comparison is needed.
+
+        Returns:
+            Tuple of the entry (None on a miss) and the query vector, None if it was never computed.
+        """
+        fingerprint = self.fingerprint(chunk_ids)
+        now = time.monotonic()
+        with self._lock:
+            for entry_id in list(self._by_fingerprint.get(fingerprint, ())):
+                if self._expired(self._entries[entry_id], now):
+                    self._remove(entry_id)
+                    self._count("expirations")
+
+            entry_id = self._exact.get((fingerprint, _normalize_query(query)))
+            if entry_id is not None:
+                self._entries.move_to_end(entry_id)
+                self._count("hits")
+                return self._entries[entry_id], vector
+
+            candidates = [(entry_id, self._entries[entry_id]) for entry_id in self._by_fingerprint.get(fingerprint, ())]
+            if not candidates:
+                # Nothing was answered from these chunks, no need to embed the query
+                self._count("misses")
+                return None, vector
+
+        if vector is None:
+            vector = self._embed(query)
+        for _, entry in candidates:
+            if entry.vector is None:
+                entry.vector = self._embed(entry.query)
+
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id, entry in candidates:
+                if entry_id not in self._entries:
+                    continue
+                score = float(np.dot(vector, entry.vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self._count("misses")
+                return None, vector
+            self._entries.move_to_end(best_id)
+            self._count("hits")
+            return self._entries[best_id], vector
+
+    def lookup(self, query: str, chunk_ids: Iterable[str], vector: np.ndarray = None) -> Optional[Any]:
+        """
+        Return the cached answer for a query and its retrieved chunks, or None.
+
+        The same query (up to case and whitespace) over the same chunks hits
+        without any embedding, as does a query over chunks nothing was cached
+        for; the query is embedded only to compare it with cached ones.
+
+        Args:
+            query (str): The user query.
+            chunk_ids (Iterable[str]): Ids of the retrieved chunks.
+            vector (np.ndarray, optional): The normalized query embedding, if already computed.
+
+        Returns:
+            The cached answer, or None on a miss.
+        """
+        entry, _ = self._lookup(query, chunk_ids, vector)
+        return None if entry is None else entry.answer
+
+    def store(self, query: str, chunk_ids: Iterable[str], answer: Any, vector: np.ndarray = None,
+              update: Dict[str, Any] = None) -> None:
+        """
+        Cache the answer generated for a query and its retrieved chunks.
+
+        Args:
+            query (str): The user query.
+            chunk_ids (Iterable[str]): Ids of the retrieved chunks.
+            answer: The value the generation node wrote to `answer_key`.
+            vector (np.ndarray, optional): The normalized query embedding, if already computed.
+                Otherwise it is computed when a later lookup first needs it.
+            update (dict, optional): The node's whole state update, replayed on a hit.
+                Defaults to `{answer_key: answer}`.
+        """
+        chunk_ids = frozenset(chunk_ids)
+        entry = _Entry(self.fingerprint(chunk_ids), query, vector, answer,
+                       dict(update) if update else {self.answer_key: answer}, chunk_ids)
+        entry_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries[entry_id] = entry
+            self._by_fingerprint.setdefault(entry.fingerprint, set()).add(entry_id)
+            self._exact[(entry.fingerprint, _normalize_query(query))] = entry_id
+            for chunk in chunk_ids:
+                self._by_chunk.setdefault(chunk, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._count("evictions")
+
+    def invalidate_chunks(self, chunk_ids: Iterable[str]) -> int:
+        """
+        Drop every entry whose answer was generated from one of the given chunks.
+
+        Args:
+            chunk_ids (Iterable[str]): Ids of added, changed or deleted chunks.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        removed = 0
+        with self._lock:
+            for chunk in chunk_ids:
+                for entry_id in list(self._by_chunk.get(chunk, ())):
+                    if self._remove(entry_id) is not None:
+                        removed += 1
+            if removed:
+                self._count("invalidations", removed)
+        if removed:
+            logging.info(f"Response cache: invalidated {removed} entries")
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_fingerprint.clear()
+            self._exact.clear()
+            self._by_chunk.clear()
+
+    def _documents(self, state) -> List[Document]:
+        documents = _state_get(state, self.documents_key) or []
+        return [item[0] if isinstance(item, tuple) else item for item in documents]
+
+    @staticmethod
+    def _stream(answer, config) -> None:
+        """Push a cached answer through the SSEHandlers attached to the run."""
+        callbacks = (config or {}).get("callbacks")
+        handlers = getattr(callbacks, "handlers", callbacks) or []
+        text = _answer_text(answer)
+        for handler in handlers:
+            if isinstance(handler, SSEHandler):
+                handler.stream_text(text)
+
+    def _replay(self, entry: _Entry, config) -> Dict[str, Any]:
+        """The cached state update of a hit, streamed to the run's SSEHandlers."""
+        self._stream(entry.answer, config)
+        return {key: _fresh_messages(value) for key, value in entry.update.items()}
+
+    def wrap_node(self, node: Callable) -> Callable:
+        """
+        Wrap the generation node so cached answers skip it.
+
+        On a hit the node's whole cached state update is returned, messages
+        included, so the checkpointed conversation is the same as if the node
+        had run. The wrapper keeps the node's signature, so langgraph still
+        injects whatever the node asks for.
+        """
+        def _before(state):
+            query = _state_get(state, self.query_key)
+            if not isinstance(query, str) or not query:
+                return None, None
+            return query, [chunk_id(document) for document in self._documents(state)]
+
+        def _after(query, chunk_ids, vector, result):
+            if query is not None and isinstance(result, dict) and result.get(self.answer_key) is not None:
+                self.store(query, chunk_ids, result[self.answer_key], vector=vector, update=result)
+
+        if inspect.iscoroutinefunction(node):
+            @functools.wraps(node)
+            async def async_wrapper(state, *args, **kwargs):
+                query, chunk_ids = _before(state)
+                vector = None
+                if query is not None:
+                    entry, vector = self._lookup(query, chunk_ids)
+                    if entry is not None:
+                        return self._replay(entry, get_config())
+                result = await node(state, *args, **kwargs)
+                _after(query, chunk_ids, vector, result)
+                return result
+            return async_wrapper
+
+        @functools.wraps(node)
+        def wrapper(state, *args, **kwargs):
+            query, chunk_ids = _before(state)
+            vector = None
+            if query is not None:
+                entry, vector = self._lookup(query, chunk_ids)
+                if entry is not None:
+                    return self._replay(entry, get_config())
+            result = node(state, *args, **kwargs)
+            _after(query, chunk_ids, vector, result)
+            return result
+        return wrapper
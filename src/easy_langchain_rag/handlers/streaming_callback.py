@@ -1,3 +1,4 @@
+import re
 from langchain.callbacks.base import BaseCallbackHandler
 from queue import Queue, Empty
 from typing_extensions import Dict, Any, Optional
@@ -29,6 +30,11 @@ class SSEHandler(BaseCallbackHandler):
             self.queue.put(token)
             # print(self.queue.get(timeout=10), end="", flush=True)
 
+    def stream_text(self, text: str):
+        """Stream an already generated answer, e.g. from a response cache, word by word."""
+        for token in re.findall(r"\S+\s*|\s+", text):
+            self.queue.put(token)
+
     def on_llm_end(self, response, **kwargs):
         try:
             while True:
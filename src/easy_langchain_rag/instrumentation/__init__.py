@@ -0,0 +1,300 @@
+import os
+import time
+import inspect
+import logging
+import functools
+import threading
+from bisect import bisect_left
+from typing_extensions import Any, Callable, Dict, List, Tuple
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _NullSpan:
+    """Shared no-op span returned while instrumentation is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("owner", "stage", "attributes", "start_ns")
+
+    def __init__(self, owner: "Instrumentation", stage: str, attributes: dict):
+        self.owner = owner
+        self.stage = stage
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        self.owner._record(self.stage, self.start_ns, end_ns, self.attributes, exc)
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count", "errors")
+
+    def __init__(self, size: int):
+        self.counts = [0] * (size + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Instrumentation:
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 namespace: str = "easy_langchain_rag"):
+        """
+        Collect per-stage latency histograms and counters for the RAG pipeline.
+
+        While disabled, `span` returns a shared no-op object and `increment` returns
+        immediately, so instrumented code pays a single attribute check.
+
+        Args:
+            enabled (bool, optional): Start collecting immediately. Defaults to False.
+            buckets (Tuple[float, ...], optional): Histogram bucket upper bounds in seconds. Defaults to DEFAULT_BUCKETS.
+            namespace (str, optional): Prefix of the exported metric names. Defaults to "easy_langchain_rag".
+        """
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, _Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._hooks: List[Callable] = []
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """Drop every recorded value, keeping hooks and the enabled flag."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def span(self, stage: str, **attributes):
+        """
+        Time a block of code as one occurrence of `stage`.
+
+        Args:
+            stage (str): The stage name, used as the `stage` label of the histogram.
+            attributes: Extra attributes forwarded to span hooks.
+
+        Returns:
+            A context manager.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, attributes)
+
+    def timed(self, stage: str):
+        """Decorator timing every call of the decorated function as `stage`."""
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    with _Span(self, stage, {}):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, stage, {}):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def wrap_node(self, name: str, node: Callable) -> Callable:
+        """
+        Time a graph node as stage `node:<name>`.
+
+        Only plain functions are wrapped; runnables such as ToolNode are returned unchanged.
+        The wrapper keeps the original signature so langgraph still injects config and store.
+        """
+        if not (inspect.isfunction(node) or inspect.ismethod(node)):
+            return node
+        return self.timed(f"node:{name}")(node)
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Add `value` to the counter `name`."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Set the gauge `name` to `value`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, stage: str, seconds: float):
+        """Record a duration measured elsewhere."""
+        if not self.enabled:
+            return
+        self._record(stage, 0, int(seconds * 1e9), {}, None, run_hooks=False)
+
+    def add_span_hook(self, hook: Callable[[str, int, int, dict, BaseException], None]):
+        """
+        Register a callable run after every span with (stage, start_ns, end_ns, attributes, error).
+
+        Timestamps come from `time.perf_counter_ns`; see `opentelemetry_hook` for an adapter.
+        """
+        self._hooks.append(hook)
+
+    def remove_span_hook(self, hook: Callable):
+        self._hooks.remove(hook)
+
+    def _record(self, stage: str, start_ns: int, end_ns: int, attributes: dict, error, run_hooks: bool = True):
+        seconds = (end_ns - start_ns) / 1e9
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = _Histogram(len(self.buckets))
+            histogram.counts[index] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+            if error is not None:
+                histogram.errors += 1
+
+        if run_hooks:
+            for hook in self._hooks:
+                try:
+                    hook(stage, start_ns, end_ns, attributes, error)
+                except Exception as e:
+                    logging.error(f"Instrumentation hook failed: {e}")
+
+    def snapshot(self) -> dict:
+        """
+        Return the recorded values as plain data.
+
+        Returns:
+            dict: `stages` maps each stage to its count, sum, errors and mean in seconds;
+                `counters` and `gauges` map "name{labels}" to their value.
+        """
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": h.count,
+                    "sum_seconds": h.sum,
+                    "mean_seconds": h.sum / h.count if h.count else 0.0,
+                    "errors": h.errors,
+                }
+                for stage, h in self._histograms.items()
+            }
+            counters = {name + _labels(dict(labels)): value for (name, labels), value in self._counters.items()}
+            gauges = {name + _labels(dict(labels)): value for (name, labels), value in self._gauges.items()}
+        return {"stages": stages, "counters": counters, "gauges": gauges}
+
+    def to_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page, ready to be served on a /metrics endpoint.
+        """
+        duration = f"{self.namespace}_stage_duration_seconds"
+        errors = f"{self.namespace}_stage_errors_total"
+        lines = [
+            f"# HELP {duration} Latency of pipeline stages.",
+            f"# TYPE {duration} histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+
+            for stage, histogram in histograms:
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{duration}_bucket{_labels({'stage': stage, 'le': repr(float(bound))})} {cumulative}")
+                lines.append(f"{duration}_bucket{_labels({'stage': stage, 'le': '+Inf'})} {histogram.count}")
+                lines.append(f"{duration}_sum{_labels({'stage': stage})} {histogram.sum}")
+                lines.append(f"{duration}_count{_labels({'stage': stage})} {histogram.count}")
+
+            lines.append(f"# HELP {errors} Pipeline stages that raised an exception.")
+            lines.append(f"# TYPE {errors} counter")
+            for stage, histogram in histograms:
+                lines.append(f"{errors}{_labels({'stage': stage})} {histogram.errors}")
+
+            for kind, metrics, suffix in (("counter", counters, "_total"), ("gauge", gauges, "")):
+                declared = set()
+                for (name, labels), value in metrics:
+                    metric = f"{self.namespace}_{name}{suffix}"
+                    if metric not in declared:
+                        lines.append(f"# TYPE {metric} {kind}")
+                        declared.add(metric)
+                    lines.append(f"{metric}{_labels(dict(labels))} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def opentelemetry_hook(tracer) -> Callable:
+    """
+    Build a span hook that re-emits spans through an OpenTelemetry tracer.
+
+    Usage:
+        from opentelemetry import trace
+        instrumentation.add_span_hook(opentelemetry_hook(trace.get_tracer("easy_langchain_rag")))
+
+    Args:
+        tracer: An `opentelemetry.trace.Tracer`.
+
+    Returns:
+        Callable: A hook for `Instrumentation.add_span_hook`.
+    """
+    # perf_counter is monotonic but not wall-clock; shift it onto the epoch clock OpenTelemetry expects
+    offset = time.time_ns() - time.perf_counter_ns()
+
+    def hook(stage: str, start_ns: int, end_ns: int, attributes: dict, error):
+        span = tracer.start_span(stage, start_time=start_ns + offset, attributes=attributes or None)
+        if error is not None:
+            span.record_exception(error)
+        span.end(end_time=end_ns + offset)
+
+    return hook
+
+
+# Process-wide instance used by the library. Set EASY_LANGCHAIN_RAG_METRICS=1 to enable it at import time.
+instrumentation = Instrumentation(enabled=os.environ.get("EASY_LANGCHAIN_RAG_METRICS", "") in ("1", "true", "yes"))
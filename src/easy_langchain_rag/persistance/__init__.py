@@ -1,12 +1,103 @@
+import json
 import uuid
-from typing_extensions import Type
-from langchain_core.runnables import RunnableConfig
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from langgraph.store.base import SearchItem
-from langgraph.store.memory import InMemoryStore
-from langgraph.store.base import BaseStore
+import base64
+from datetime import datetime
+from typing_extensions import List, NamedTuple, Optional, Tuple
+
+
+class Page(NamedTuple):
+    """One page of results and the cursor of the next one, None on the last page."""
+    items: List[dict]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(created_at: datetime, key: str) -> str:
+    """Opaque cursor pointing just past the row ordered by (created_at, key)."""
+    raw = json.dumps([created_at.isoformat(), key]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor made by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        created_at, key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), str(key)
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"Invalid cursor {cursor!r}") from e
 
 
 class Persistance:
-    """Comming soon to support chat management"""
-    pass
+    """
+    Chat management operations on conversations and their turns.
+
+    Lists are paginated with keysets: a page is the `limit` rows following the
+    cursor in (timestamp, key) order, newest first, and the cursor of the next
+    page encodes the last row returned. Unlike offsets, fetching page 1000
+    costs the same as fetching page 1. Subclasses implement the storage.
+    """
+
+    def _validate_user_id(self, user_id: str) -> str:
+        """
+        Return the canonical form of a UUID string user ID.
+
+        Raises:
+            ValueError: If the user ID is not a valid UUID string.
+        """
+        try:
+            return str(uuid.UUID(user_id))
+        except (TypeError, ValueError, AttributeError):
+            raise ValueError(f"User ID {user_id} must be a valid UUID string")
+
+    def _validate_limit(self, limit: int):
+        if not isinstance(limit, int) or not 1 <= limit <= 1000:
+            raise ValueError("limit must be an integer from 1 to 1000")
+
+    def add_turn(self, user_id: str, conversation_id: str, query: str, bot: str, title: str = None) -> dict:
+        """
+        Append a turn to a conversation, creating the conversation if needed.
+
+        Returns:
+            dict: The stored turn.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support add_turn")
+
+    def list_conversations(self, user_id: str, limit: int = 20, cursor: str = None) -> Page:
+        """
+        List the conversations of a user, most recently active first.
+
+        Returns:
+            Page: Conversations and the cursor of the next page.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support list_conversations")
+
+    def get_turns(self, user_id: str, conversation_id: str, limit: int = 20, cursor: str = None) -> Page:
+        """
+        Fetch the turns of a conversation, newest first.
+
+        Returns:
+            Page: Turns and the cursor of the next (older) page.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support get_turns")
+
+    def rename_conversation(self, user_id: str, conversation_id: str, title: str) -> bool:
+        """
+        Change the title of a conversation.
+
+        Returns:
+            bool: False if the conversation does not exist.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support rename_conversation")
+
+    def delete_conversation(self, user_id: str, conversation_id: str) -> bool:
+        """
+        Delete a conversation and all its turns.
+
+        Returns:
+            bool: False if the conversation does not exist.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support delete_conversation")
@@ -1,6 +1,386 @@
-# from vectors import VectorStoreActions
+import time
+import uuid
+import inspect
+import logging
+import functools
+import threading
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing_extensions import Callable, Dict, List, Optional, Tuple
+from langchain_core.messages import BaseMessage
+from langgraph.config import get_config
+from . import Page, Persistance, decode_cursor, encode_cursor
+from ..stores import StoreConfig
+from ..stores.in_memory import InMemoryStoreConfig
+from ..stores.postgres import PostgresStoreConfig, _IDENTIFIER_RE
+from ..instrumentation import instrumentation
 
 
-class ChatManagement():
-    """Coming soon to subclass Persitance class for convenient chat management"""
-    pass
\ No newline at end of file
+# Length of the title given to a new conversation from its first query
+TITLE_LENGTH = 80
+
+
+def _new_turn_key() -> str:
+    # Nanosecond prefix keeps keys in creation order when timestamps tie
+    return f"turn_{time.time_ns()}_{uuid.uuid4().hex[:8]}"
+
+
+def _row(row, columns: List[str]) -> dict:
+    return dict(row) if isinstance(row, dict) else dict(zip(columns, row))
+
+
+class ChatManagement(Persistance):
+    def __init__(self, store_config: StoreConfig = None, table_prefix: str = "chat", node_name: str = "generate",
+                 query_key: str = "question", answer_key: str = "answer"):
+        """
+        Conversations of each user and their turns, for listing, paging, renaming and deleting chats.
+
+        With a PostgresStoreConfig, conversations and turns live in
+        `<table_prefix>_conversations` and `<table_prefix>_turns` on the same
+        database, with indexes matching the keyset order of each listing, so a
+        page is one index range scan however long a user's history is. Without
+        one (or with an InMemoryStoreConfig), they live in per-user lists kept
+        sorted by (timestamp, key), where a page is a binary search and a slice.
+
+        Args:
+            store_config (StoreConfig, optional): A PostgresStoreConfig with its connection string set,
+                or an InMemoryStoreConfig. Defaults to None, in memory.
+            table_prefix (str, optional): Prefix of the Postgres table names. Defaults to "chat".
+            node_name (str, optional): The graph node whose answers are recorded by GraphBuilder. Defaults to "generate".
+            query_key (str, optional): State key holding the user query. Defaults to "question".
+            answer_key (str, optional): State key the node writes its answer to. Defaults to "answer".
+        """
+        if store_config is not None and not isinstance(store_config, (InMemoryStoreConfig, PostgresStoreConfig)):
+            raise ValueError("ChatManagement supports InMemoryStoreConfig and PostgresStoreConfig only")
+
+        if not _IDENTIFIER_RE.match(table_prefix):
+            raise ValueError("table_prefix must be a lowercase SQL identifier")
+
+        self.store_config = store_config
+        self.use_postgres = isinstance(store_config, PostgresStoreConfig)
+        self.conversations_table = f"{table_prefix}_conversations"
+        self.turns_table = f"{table_prefix}_turns"
+        self.node_name = node_name
+        self.query_key = query_key
+        self.answer_key = answer_key
+        self._is_setup = False
+        self._lock = threading.Lock()
+
+        # In memory: user_id -> conversation_id -> conversation, and user_id -> sorted (updated_at, conversation_id)
+        self._conversations: Dict[str, Dict[str, dict]] = {}
+        self._recent: Dict[str, List[Tuple[datetime, str]]] = {}
+        # (user_id, conversation_id) -> sorted (created_at, key, turn)
+        self._turns: Dict[Tuple[str, str], List[tuple]] = {}
+
+    def _validate_conversation_id(self, conversation_id: str):
+        if not isinstance(conversation_id, str) or not 0 < len(conversation_id) <= 200:
+            raise ValueError("conversation_id must be a non-empty string of at most 200 characters")
+
+    def _validate_title(self, title: str):
+        if not isinstance(title, str) or not title.strip() or len(title) > 200:
+            raise ValueError("title must be a non-empty string of at most 200 characters")
+
+    def _now(self) -> datetime:
+        if self.use_postgres:
+            return datetime.now(self.store_config.timezone)
+        return datetime.now(timezone.utc)
+
+    def setup(self, conn):
+        """
+        Create the conversation and turn tables and their keyset indexes if missing.
+
+        Conversations are listed by (updated_at, conversation_id) descending,
+        which the `_recent_idx` index serves directly; turns are paged by
+        (created_at, key) within a conversation, which the primary key of the
+        turns table serves with a backward scan.
+        """
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.conversations_table} (
+                user_id TEXT NOT NULL,
+                conversation_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                turns INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (user_id, conversation_id)
+            )
+        """)
+        conn.execute(f"""
+            CREATE INDEX IF NOT EXISTS {self.conversations_table}_recent_idx
+            ON {self.conversations_table} (user_id, updated_at DESC, conversation_id DESC)
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.turns_table} (
+                user_id TEXT NOT NULL,
+                conversation_id TEXT NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                key TEXT NOT NULL,
+                query TEXT NOT NULL,
+                bot TEXT NOT NULL,
+                PRIMARY KEY (user_id, conversation_id, created_at, key),
+                FOREIGN KEY (user_id, conversation_id)
+                    REFERENCES {self.conversations_table} (user_id, conversation_id) ON DELETE CASCADE
+            )
+        """)
+        self._is_setup = True
+
+    @contextmanager
+    def _connection(self):
+        """Connection through the store config, with the tables created on first use."""
+        conn_string = getattr(self.store_config, "conn_string", None)
+        if not conn_string:
+            raise ValueError("Connection string is not set. Please set it using set_connection_string method.")
+        with self.store_config.store_type.from_conn_string(conn_string, index=self.store_config.index) as store:
+            if not self._is_setup:
+                self.setup(store.conn)
+            yield store.conn
+
+    def add_turn(self, user_id: str, conversation_id: str, query: str, bot: str, title: str = None) -> dict:
+        """
+        Append a turn to a conversation, creating the conversation if needed.
+
+        Graphs built with `GraphBuilder(chat_management=...)` call it after
+        every answer, see `wrap_node`. A new conversation is titled after its first
+        query unless `title` is given; `title` is ignored for existing ones.
+
+        Args:
+            user_id (str): The UUID of the user.
+            conversation_id (str): The conversation, e.g. the thread ID.
+            query (str): The user's message.
+            bot (str): The answer.
+            title (str, optional): Title of a new conversation. Defaults to the start of `query`.
+
+        Returns:
+            dict: The stored turn: key, query, bot and created_at.
+        """
+        user_id = self._validate_user_id(user_id)
+        self._validate_conversation_id(conversation_id)
+        if title is not None:
+            self._validate_title(title)
+        title = title or " ".join(query.split())[:TITLE_LENGTH] or "New conversation"
+        turn = {"key": _new_turn_key(), "query": query, "bot": bot, "created_at": self._now()}
+
+        with instrumentation.span("chat_turn_write", store="postgres" if self.use_postgres else "memory"):
+            if self.use_postgres:
+                with self._connection() as conn, conn.transaction():
+                    conn.execute(f"""
+                        INSERT INTO {self.conversations_table} (user_id, conversation_id, title, turns, created_at, updated_at)
+                        VALUES (%s, %s, %s, 1, %s, %s)
+                        ON CONFLICT (user_id, conversation_id) DO UPDATE
+                        SET updated_at = EXCLUDED.updated_at, turns = {self.conversations_table}.turns + 1
+                    """, (user_id, conversation_id, title, turn["created_at"], turn["created_at"]))
+                    conn.execute(f"""
+                        INSERT INTO {self.turns_table} (user_id, conversation_id, created_at, key, query, bot)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                    """, (user_id, conversation_id, turn["created_at"], turn["key"], query, bot))
+            else:
+                self._add_turn_in_memory(user_id, conversation_id, title, turn)
+        return turn
+
+    def _add_turn_in_memory(self, user_id: str, conversation_id: str, title: str, turn: dict):
+        created_at = turn["created_at"]
+        with self._lock:
+            conversations = self._conversations.setdefault(user_id, {})
+            recent = self._recent.setdefault(user_id, [])
+            conversation = conversations.get(conversation_id)
+            if conversation is None:
+                conversation = conversations[conversation_id] = {
+                    "conversation_id": conversation_id, "title": title, "turns": 0,
+                    "created_at": created_at, "updated_at": created_at,
+                }
+            else:
+                del recent[bisect_left(recent, (conversation["updated_at"], conversation_id))]
+                conversation["updated_at"] = max(conversation["updated_at"], created_at)
+            conversation["turns"] += 1
+            insort(recent, (conversation["updated_at"], conversation_id))
+
+            turns = self._turns.setdefault((user_id, conversation_id), [])
+            entry = (created_at, turn["key"], turn)
+            if not turns or turns[-1][:2] < entry[:2]:
+                turns.append(entry)
+            else:
+                insort(turns, entry, key=lambda item: item[:2])
+
+    def _page_in_memory(self, entries: list, limit: int, cursor: Optional[str], key) -> Tuple[list, Optional[str]]:
+        """Newest-first page of a list sorted ascending by `key`, ending just before the cursor."""
+        end = len(entries) if cursor is None else bisect_left(entries, decode_cursor(cursor), key=key)
+        start = max(0, end - limit)
+        page = entries[start:end][::-1]
+        next_cursor = encode_cursor(*key(page[-1])) if start > 0 and page else None
+        return page, next_cursor
+
+    def list_conversations(self, user_id: str, limit: int = 20, cursor: str = None) -> Page:
+        """
+        List the conversations of a user, most recently active first.
+
+        Args:
+            user_id (str): The UUID of the user.
+            limit (int, optional): Conversations per page, at most 1000. Defaults to 20.
+            cursor (str, optional): `next_cursor` of the previous page. Defaults to None, the first page.
+
+        Returns:
+            Page: Conversations (conversation_id, title, turns, created_at, updated_at) and the next cursor.
+        """
+        user_id = self._validate_user_id(user_id)
+        self._validate_limit(limit)
+        columns = ["conversation_id", "title", "turns", "created_at", "updated_at"]
+
+        if not self.use_postgres:
+            with self._lock:
+                conversations = self._conversations.get(user_id, {})
+                keys, next_cursor = self._page_in_memory(self._recent.get(user_id, []), limit, cursor, key=tuple)
+                return Page([dict(conversations[conversation_id]) for _, conversation_id in keys], next_cursor)
+
+        condition, params = "", (user_id,)
+        if cursor is not None:
+            condition = "AND (updated_at, conversation_id) < (%s, %s)"
+            params += decode_cursor(cursor)
+        with self._connection() as conn:
+            rows = conn.execute(f"""
+                SELECT {", ".join(columns)} FROM {self.conversations_table}
+                WHERE user_id = %s {condition}
+                ORDER BY updated_at DESC, conversation_id DESC
+                LIMIT %s
+            """, params + (limit + 1,)).fetchall()
+        items = [_row(row, columns) for row in rows[:limit]]
+        next_cursor = encode_cursor(items[-1]["updated_at"], items[-1]["conversation_id"]) if len(rows) > limit else None
+        return Page(items, next_cursor)
+
+    def get_turns(self, user_id: str, conversation_id: str, limit: int = 20, cursor: str = None) -> Page:
+        """
+        Fetch the turns of a conversation, newest first.
+
+        Args:
+            user_id (str): The UUID of the user owning the conversation.
+            conversation_id (str): The conversation.
+            limit (int, optional): Turns per page, at most 1000. Defaults to 20.
+            cursor (str, optional): `next_cursor` of the previous page. Defaults to None, the latest turns.
+
+        Returns:
+            Page: Turns (key, query, bot, created_at) and the cursor of the next, older page.
+                Empty for an unknown conversation.
+        """
+        user_id = self._validate_user_id(user_id)
+        self._validate_conversation_id(conversation_id)
+        self._validate_limit(limit)
+        columns = ["key", "query", "bot", "created_at"]
+
+        if not self.use_postgres:
+            with self._lock:
+                entries, next_cursor = self._page_in_memory(
+                    self._turns.get((user_id, conversation_id), []), limit, cursor, key=lambda item: item[:2])
+                return Page([dict(turn) for _, _, turn in entries], next_cursor)
+
+        condition, params = "", (user_id, conversation_id)
+        if cursor is not None:
+            condition = "AND (created_at, key) < (%s, %s)"
+            params += decode_cursor(cursor)
+        with instrumentation.span("chat_turns_page", store="postgres"), self._connection() as conn:
+            rows = conn.execute(f"""
+                SELECT {", ".join(columns)} FROM {self.turns_table}
+                WHERE user_id = %s AND conversation_id = %s {condition}
+                ORDER BY created_at DESC, key DESC
+                LIMIT %s
+            """, params + (limit + 1,)).fetchall()
+        items = [_row(row, columns) for row in rows[:limit]]
+        next_cursor = encode_cursor(items[-1]["created_at"], items[-1]["key"]) if len(rows) > limit else None
+        return Page(items, next_cursor)
+
+    def rename_conversation(self, user_id: str, conversation_id: str, title: str) -> bool:
+        """
+        Change the title of a conversation.
+
+        Returns:
+            bool: False if the user has no such conversation.
+        """
+        user_id = self._validate_user_id(user_id)
+        self._validate_conversation_id(conversation_id)
+        self._validate_title(title)
+
+        if not self.use_postgres:
+            with self._lock:
+                conversation = self._conversations.get(user_id, {}).get(conversation_id)
+                if conversation is None:
+                    return False
+                conversation["title"] = title
+                return True
+
+        with self._connection() as conn:
+            row = conn.execute(f"""
+                UPDATE {self.conversations_table} SET title = %s
+                WHERE user_id = %s AND conversation_id = %s
+                RETURNING conversation_id
+            """, (title, user_id, conversation_id)).fetchone()
+        return row is not None
+
+    def delete_conversation(self, user_id: str, conversation_id: str) -> bool:
+        """
+        Delete a conversation and all its turns.
+
+        Returns:
+            bool: False if the user has no such conversation.
+        """
+        user_id = self._validate_user_id(user_id)
+        self._validate_conversation_id(conversation_id)
+
+        if not self.use_postgres:
+            with self._lock:
+                conversation = self._conversations.get(user_id, {}).pop(conversation_id, None)
+                if conversation is None:
+                    return False
+                recent = self._recent[user_id]
+                del recent[bisect_left(recent, (conversation["updated_at"], conversation_id))]
+                self._turns.pop((user_id, conversation_id), None)
+                return True
+
+        # Turns go with the conversation through ON DELETE CASCADE
+        with self._connection() as conn:
+            row = conn.execute(f"""
+                DELETE FROM {self.conversations_table}
+                WHERE user_id = %s AND conversation_id = %s
+                RETURNING conversation_id
+            """, (user_id, conversation_id)).fetchone()
+        if row is not None:
+            logging.info(f"Deleted conversation {conversation_id} of user {user_id}")
+        return row is not None
+
+    def _record(self, state, result):
+        configurable = get_config().get("configurable", {})
+        user_id, thread_id = configurable.get("user_id"), configurable.get("thread_id")
+        query = state.get(self.query_key) if isinstance(state, dict) else getattr(state, self.query_key, None)
+        answer = result.get(self.answer_key) if isinstance(result, dict) else None
+        if not user_id or not thread_id or not isinstance(query, str) or answer is None:
+            return
+        if isinstance(answer, BaseMessage):
+            answer = answer.content
+        try:
+            self.add_turn(user_id, str(thread_id), query, str(answer))
+        except Exception as e:
+            # The answer was produced, failing to list it must not fail the run
+            logging.warning(f"Could not record the turn of conversation {thread_id}: {e}")
+
+    def wrap_node(self, node: Callable) -> Callable:
+        """
+        Wrap the answering node so each answer is recorded as a turn.
+
+        After the node returns, its query and answer are added to the
+        conversation whose ID is the run's `thread_id`, for the run's `user_id`,
+        both read from the `configurable` of the run config. Runs without them
+        are not recorded. The wrapper keeps the node's signature, so langgraph
+        still injects whatever the node asks for.
+        """
+        if inspect.iscoroutinefunction(node):
+            @functools.wraps(node)
+            async def async_wrapper(state, *args, **kwargs):
+                result = await node(state, *args, **kwargs)
+                self._record(state, result)
+                return result
+            return async_wrapper
+
+        @functools.wraps(node)
+        def wrapper(state, *args, **kwargs):
+            result = node(state, *args, **kwargs)
+            self._record(state, result)
+            return result
+        return wrapper
@@ -1,16 +1,17 @@
 import uuid
-from typing import Type
+from typing import Type, Union
 from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 from langgraph.store.postgres import PostgresStore
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import HumanMessage, AIMessage
+from ..embeddings import EmbeddingBackend, validate_embeddings
 
 class StoreConfig:
     def __init__(self,
                  use_embeddings: bool = True,
-                 embeddings: Type[HuggingFaceEmbeddings] = HuggingFaceEmbeddings,
+                 embeddings: Union[Type[HuggingFaceEmbeddings], EmbeddingBackend] = HuggingFaceEmbeddings,
                  embedding_fields: list = [],
                  dims: int = 384):
         """
@@ -18,10 +19,14 @@ class StoreConfig:
 
         Args:
             use_embeddings (bool, optional): If True, use embeddings in the store. Defaults to True.
-            embeddings (Type[HuggingFaceEmbeddings], optional): The embeddings model to use. Defaults to None.
+            embeddings (EmbeddingBackend, optional): The embeddings model to use, any object implementing
+                embed_documents and embed_query. Defaults to None.
             embedding_fields (list, optional): The fields to embed. Defaults to [].
             dims (int, optional): The dimensions of the embeddings. Defaults to 384.
         """
+        if use_embeddings and not isinstance(embeddings, type):
+            validate_embeddings(embeddings)
+
         self.use_embeddings = use_embeddings
         self.embeddings = embeddings
         self.embedding_fields = embedding_fields
@@ -45,6 +50,29 @@ class StoreConfig:
 
         return index
 
+    def export_history(self):
+        """
+        Stream every chat history record of the store with its embedding.
+
+        Returns:
+            Iterator[HistoryRecord]: The records, see `stores.transfer`.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support history export")
+
+    def import_history(self, records, batch_size: int = 10000, reembed: bool = False) -> int:
+        """
+        Write history records into the store, keeping their embeddings when they fit.
+
+        Args:
+            records (Iterable[HistoryRecord]): The records to import.
+            batch_size (int, optional): Records written per batch. Defaults to 10000.
+            reembed (bool, optional): If True, recompute embeddings with this store's model. Defaults to False.
+
+        Returns:
+            int: The number of records imported.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support history import")
+
     def _validate_user_id(self, user_id: str):
         """
         Validate that the user ID is a valid UUID string.
@@ -111,7 +139,7 @@ class StoreConfig:
             # If history is empty
             return history_values
         for hist in history:
-            if store_type == 'PostgresStore':
+            if store_type in ('PostgresStore', 'RedisStore'):
                 values = hist.get('value')
             else:
                 values = hist.dict().get("value")
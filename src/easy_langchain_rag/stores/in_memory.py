@@ -1,9 +1,14 @@
-from typing_extensions import Type
+import logging
+from datetime import datetime, timezone
+from typing_extensions import Iterable, Iterator, Type
 from contextlib import contextmanager
 from langchain_core.runnables import RunnableConfig
+from langgraph.store.base import Item
 from langgraph.store.memory import InMemoryStore
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 from . import StoreConfig
+from .transfer import HistoryRecord, as_embedding, batched, embed_fields
+from ..instrumentation import instrumentation
 
 
 class InMemoryStoreConfig(StoreConfig):
@@ -16,7 +21,7 @@ class InMemoryStoreConfig(StoreConfig):
         
         # Create the store with the built index
         self.index = self._build_index()
-        print("\nIndex: ", self.index)
+        logging.debug(f"InMemoryStore index: {self.index}")
         self.store = store_type(index=self.index)
 
     def _search_in_store(self, config: RunnableConfig, user_query: str = None)->list:
@@ -43,7 +48,8 @@ class InMemoryStoreConfig(StoreConfig):
         del search_params['namespace']
 
         # Search in the store
-        searches = self.store.search(namespace, **search_params)
+        with instrumentation.span("history_search", store="memory"):
+            searches = self.store.search(namespace, **search_params)
         return searches
     
     def _get_latest_chat(self, user_query: str, config: RunnableConfig):
@@ -93,4 +99,75 @@ class InMemoryStoreConfig(StoreConfig):
         # memory_id = str(uuid.uuid4())
 
         # We create a new memory
-        self.store.put(namespace, "chat_history", {f"{index_keys[0]}": data["query"], f"{index_keys[1]}": data["bot"]}, index=index)
\ No newline at end of file
+        with instrumentation.span("history_write", store="memory"):
+            self.store.put(namespace, "chat_history", {f"{index_keys[0]}": data["query"], f"{index_keys[1]}": data["bot"]}, index=index)
+
+    def export_history(self) -> Iterator[HistoryRecord]:
+        """
+        Stream every history record held in the store, with its stored embedding.
+
+        Records are produced one at a time from the store's own item and vector
+        maps, so nothing is re-embedded and no copy of the history is built.
+        A record carries a single embedding, that of the first indexed field;
+        when several fields are indexed, imports re-embed every field instead
+        of reusing it.
+
+        Returns:
+            Iterator[HistoryRecord]: The records of all users.
+        """
+        vectors = getattr(self.store, "_vectors", {})
+        for namespace in list(self.store._data):
+            if len(namespace) != 2 or namespace[1] != "history":
+                continue
+            for key, item in list(self.store._data.get(namespace, {}).items()):
+                fields = vectors.get(namespace, {}).get(key) or {}
+                embedding = next(iter(fields.values()), None)
+                yield HistoryRecord(namespace[0], key, item.value, item.created_at, as_embedding(embedding))
+
+    def import_history(self, records: Iterable[HistoryRecord], batch_size: int = 10000, reembed: bool = False,
+                       index: list = ["query", "bot"]) -> int:
+        """
+        Load history records into the store without going through `put`.
+
+        Items and vectors are written straight into the store's maps. Like
+        `put`, every field of `index` gets its own vector, embedded in batches
+        with the store's model, so imported turns rank like turns written by
+        `update_chat_history`. An exported embedding is reused only when a
+        single field is indexed and it has the store's dimensions.
+
+        Args:
+            records (Iterable[HistoryRecord]): The records to import.
+            batch_size (int, optional): Records embedded per batch. Defaults to 10000.
+            reembed (bool, optional): If True, never reuse exported embeddings. Defaults to False.
+            index (list, optional): The fields embedded, as in `update_chat_history`. Defaults to ["query", "bot"].
+
+        Returns:
+            int: The number of records imported.
+        """
+        embeddings = getattr(self.store, "embeddings", None) if self.index else None
+        count = 0
+        with instrumentation.span("history_import", store="memory"):
+            for batch in batched(records, min(batch_size, 256)):
+                stale = []
+                for record in batch:
+                    namespace = (record.user_id, "history")
+                    created_at = record.created_at or datetime.now(timezone.utc)
+                    self.store._data.setdefault(namespace, {})[record.key] = Item(
+                        value=record.value, key=record.key, namespace=namespace,
+                        created_at=created_at, updated_at=created_at,
+                    )
+                    if embeddings is None:
+                        continue
+                    vectors = self.store._vectors.setdefault(namespace, {}).setdefault(record.key, {})
+                    embedding = as_embedding(record.embedding)
+                    if len(index) == 1 and not reembed and embedding is not None and embedding.size == self.dims:
+                        vectors[index[0]] = embedding.tolist()
+                    else:
+                        stale.append((record, vectors))
+                if stale:
+                    embedded = embed_fields([record for record, _ in stale], embeddings, index)
+                    for (_, vectors), fields in zip(stale, embedded):
+                        vectors.update({field: vector.tolist() for field, vector in fields.items()})
+                count += len(batch)
+        instrumentation.increment("history_records_imported", count)
+        return count
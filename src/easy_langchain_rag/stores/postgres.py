@@ -1,29 +1,74 @@
+import re
+import json
 import time
-from typing_extensions import Type
-from datetime import datetime
+import logging
+from typing_extensions import Iterable, Iterator, List, Optional, Tuple, Type
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from sqlalchemy import and_, between
 from langchain_core.runnables import RunnableConfig
 from langgraph.store.postgres import PostgresStore
 from . import StoreConfig
+from .transfer import HistoryRecord, as_embedding, batched, embed_fields, embed_missing
+from ..instrumentation import instrumentation
+
+
+PARTITION_INTERVALS = {"day": timedelta(days=1), "week": timedelta(weeks=1)}
+_IDENTIFIER_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
 
 
 class PostgresStoreConfig(StoreConfig):
-    def __init__(self, use_embeddings = True, embeddings = None, embedding_fields = [], dims = 384):
+    def __init__(self, use_embeddings = True, embeddings = None, embedding_fields = [], dims = 384,
+                 timezone: str = "Africa/Kigali", window_days: int = 1, partition_by: str = None,
+                 retention_days: int = None, precreate: int = 2, table: str = "chat_history"):
         """
         Initialize a PostgresStoreConfig object with the given configuration.
 
+        By default history lives in the `store`/`store_vectors` tables of
+        langgraph's PostgresStore. With `partition_by`, it goes to `table`
+        instead, range-partitioned by `created_at` per day or week: partitions
+        are created ahead of time, searches only touch the partitions of the
+        window, and retention drops whole partitions rather than deleting rows,
+        so vacuum and bloat stay flat as history accumulates.
+
         Args:
             use_embeddings (bool, optional): If True, it will use embeddings in the store for similarity search. Defaults to True.
-            embeddings (Type[HuggingFaceEmbeddings], optional): The embeddings model to use. Defaults to None.
+            embeddings (EmbeddingBackend, optional): The embeddings model to use. Defaults to None.
             embedding_fields (list, optional): The fields to embed. Defaults to [].
             dims (int, optional): The dimensions of the embeddings. Defaults to 384.
+            timezone (str, optional): Timezone of the calendar days used for the window and partitions. Defaults to "Africa/Kigali".
+            window_days (int, optional): Number of calendar days searched, today included. Defaults to 1.
+            partition_by (str, optional): "day" or "week" to store history in a partitioned table. Defaults to None.
+            retention_days (int, optional): Partitions entirely older than this many days are dropped.
+                Defaults to None, keep everything.
+            precreate (int, optional): Number of future partitions created ahead. Defaults to 2.
+            table (str, optional): Name of the partitioned history table. Defaults to "chat_history".
         """
+        if not isinstance(window_days, int) or window_days < 1:
+            raise ValueError("window_days must be a positive integer")
+
+        if partition_by is not None and partition_by not in PARTITION_INTERVALS:
+            raise ValueError(f"partition_by must be one of {list(PARTITION_INTERVALS)}")
+
+        if retention_days is not None and (not isinstance(retention_days, int) or retention_days < window_days):
+            raise ValueError("retention_days must be an integer no smaller than window_days")
+
+        if not _IDENTIFIER_RE.match(table):
+            raise ValueError("table must be a lowercase SQL identifier")
+
         super().__init__(use_embeddings, embeddings, embedding_fields, dims)
+        self.timezone = ZoneInfo(timezone)
+        self.window_days = window_days
+        self.partition_by = partition_by
+        self.retention_days = retention_days
+        self.precreate = precreate
+        self.table = table
+        # Start of the partition for which maintenance last ran in this process
+        self._maintained_for = None
 
         # Attach index from parent class *StoreConfig* to this class *PostgresStoreConfig*
         self.index = self._build_index()
-        print("\n-----------------\nIndex: ", self.index, end='\n-------------------\n')
+        logging.debug(f"PostgresStore index: {self.index}")
         self.store_type = PostgresStore
    
     def set_connection_string(self, user: str, password: str, host: str, port: int, database: str):
@@ -42,11 +87,149 @@ class PostgresStoreConfig(StoreConfig):
     def initial_postgres_store_setup(self):
         with self.store_type.from_conn_string(self.conn_string, index=self.index) as store:
             store.setup()
+            if self.partition_by:
+                self._setup_partitioned_table(store.conn)
+
+    def _window(self, now: datetime = None) -> Tuple[datetime, datetime]:
+        """Start and end of the searched calendar days, in the configured timezone."""
+        now = now or datetime.now(self.timezone)
+        end = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=self.timezone)
+        start = end - timedelta(days=self.window_days)
+        return start, end
+
+    def _partition_start(self, moment: datetime) -> datetime:
+        """Lower bound of the partition holding `moment`: local midnight, on Monday for weekly partitions."""
+        day = moment.astimezone(self.timezone).date()
+        if self.partition_by == "week":
+            day -= timedelta(days=day.weekday())
+        return datetime.combine(day, datetime.min.time(), tzinfo=self.timezone)
+
+    def _partition_name(self, start: datetime) -> str:
+        return f"{self.table}_{start:%Y%m%d}"
+
+    def _setup_partitioned_table(self, conn):
+        """Create the partitioned history table once per process, then run partition maintenance."""
+        if self._maintained_for is not None:
+            self.maintain_partitions(conn)
+            return
+
+        conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                prefix TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value JSONB NOT NULL,
+                embedding vector({int(self.dims)}),
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (prefix, created_at, key)
+            ) PARTITION BY RANGE (created_at)
+        """)
+        self.maintain_partitions(conn)
+
+    def maintain_partitions(self, conn, now: datetime = None) -> List[str]:
+        """
+        Create the current and upcoming partitions and drop expired ones.
+
+        Runs at most once per partition interval per process unless `now` is
+        given; writes call it so a new day (or week) always has its partition
+        before the first insert.
+
+        Args:
+            conn: An open psycopg connection.
+            now (datetime, optional): Reference time. Defaults to the current time.
+
+        Returns:
+            List[str]: Names of the partitions that were dropped.
+        """
+        explicit = now is not None
+        now = now or datetime.now(self.timezone)
+        current = self._partition_start(now)
+        if not explicit and self._maintained_for == current:
+            return []
+
+        with instrumentation.span("partition_maintenance", store="postgres"):
+            self._create_partitions(conn, current, current + max(self.precreate, 0) * PARTITION_INTERVALS[self.partition_by])
+            dropped = self.drop_expired_partitions(conn, now)
+
+        self._maintained_for = current
+        return dropped
+
+    def _create_partitions(self, conn, first: datetime, last: datetime):
+        """Create the partitions covering `first` through `last`, both included."""
+        start = self._partition_start(first)
+        while start <= last:
+            end = self._partition_start(start + PARTITION_INTERVALS[self.partition_by])
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._partition_name(start)} PARTITION OF {self.table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            start = end
+
+    def drop_expired_partitions(self, conn, now: datetime = None) -> List[str]:
+        """
+        Drop the partitions whose whole range is older than `retention_days`.
+
+        Dropping a partition is a catalog operation, unlike a DELETE it leaves no
+        dead rows to vacuum.
+
+        Args:
+            conn: An open psycopg connection.
+            now (datetime, optional): Reference time. Defaults to the current time.
+
+        Returns:
+            List[str]: Names of the partitions that were dropped.
+        """
+        if self.retention_days is None:
+            return []
+
+        now = now or datetime.now(self.timezone)
+        cutoff = datetime.combine(now.astimezone(self.timezone).date() - timedelta(days=self.retention_days),
+                                  datetime.min.time(), tzinfo=self.timezone)
+        rows = conn.execute(
+            """
+            SELECT child.relname AS name
+            FROM pg_inherits
+            JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            (self.table,),
+        ).fetchall()
+
+        dropped = []
+        interval = PARTITION_INTERVALS[self.partition_by]
+        for row in rows:
+            name = row["name"] if isinstance(row, dict) else row[0]
+            suffix = name[len(self.table) + 1:]
+            try:
+                start = datetime.strptime(suffix, "%Y%m%d").replace(tzinfo=self.timezone)
+            except ValueError:
+                continue
+            if start + interval <= cutoff:
+                conn.execute(f"DROP TABLE IF EXISTS {name}")
+                dropped.append(name)
+
+        if dropped:
+            logging.info(f"Dropped expired history partitions: {dropped}")
+            instrumentation.increment("partitions_dropped", len(dropped))
+        return dropped
+
+    def _embed_turn(self, value: dict) -> Optional[list]:
+        if not self.use_embeddings or self.embeddings is None:
+            return None
+        fields = self.embedding_fields or list(value)
+        text = " ".join(str(value.get(field, "")) for field in fields)
+        with instrumentation.span("embed_query"):
+            return self.embeddings.embed_query(text)
 
     def _search_in_store(self, config, user_query=None, is_latest=False):
         """
         Search in the store for relevant documents based on the given user query.
 
+        Only history created within the last `window_days` calendar days is
+        considered; on a partitioned table the window bounds restrict the scan
+        to the partitions covering it.
+
         Args:
             config (RunnableConfig): The configuration for the runnable.
             user_query (str, optional): The user's query to search. Defaults to None.
@@ -67,13 +250,17 @@ class PostgresStoreConfig(StoreConfig):
         if not self.conn_string:
             raise ValueError("Connection string is not set. Please set it using set_connection_string method.")
 
-        # Limit search to only consider today's history
-        date = datetime.now()
-        start_of_today = datetime.combine(date.today(), datetime.min.time(), tzinfo=ZoneInfo("Africa/Kigali"))
-        end_of_today = datetime.combine(date.today(), datetime.max.time(), tzinfo=ZoneInfo("Africa/Kigali"))
+        # Limit search to the configured window of calendar days
+        start_of_window, end_of_window = self._window()
         
-        query_embedding = self.embeddings.embed_query(user_query)
-        with self.store_type.from_conn_string(self.conn_string, index=self.index) as store:
+        if not is_latest:
+            with instrumentation.span("embed_query"):
+                query_embedding = self.embeddings.embed_query(user_query)
+        with instrumentation.span("history_search", store="postgres"), \
+                self.store_type.from_conn_string(self.conn_string, index=self.index) as store:
+            if self.partition_by:
+                return self._search_partitioned(store.conn, start_of_window, end_of_window,
+                                                None if is_latest else query_embedding, search_params.get('limit'))
             if is_latest:
                 try:
                     query = """SELECT prefix, key, value, created_at, updated_at FROM store where prefix = %s ORDER BY created_at DESC LIMIT 2"""
@@ -88,7 +275,7 @@ class PostgresStoreConfig(StoreConfig):
                     FROM store_vectors AS sv
                     INNER JOIN store AS s ON s.prefix = sv.prefix
                     WHERE sv.prefix = %s
-                    AND sv.created_at BETWEEN %s AND %s
+                    AND sv.created_at >= %s AND sv.created_at < %s
                     ORDER BY sv.embedding <=> %s::vector
                     LIMIT %s
                 """
@@ -97,14 +284,33 @@ class PostgresStoreConfig(StoreConfig):
                     (
                         query_embedding,  # once for distance calculation
                         f"{self.user_id}.history",
-                        start_of_today,
-                        end_of_today,
+                        start_of_window,
+                        end_of_window,
                         query_embedding,  # again for ORDER BY
                         search_params.get('limit'),
                     )
                 ).fetchall()
 
             return emb_data
+
+    def _search_partitioned(self, conn, start: datetime, end: datetime, query_embedding=None, limit=None):
+        prefix = f"{self.user_id}.history"
+        if query_embedding is None:
+            query = f"""
+                SELECT prefix, key, value, created_at FROM {self.table}
+                WHERE prefix = %s AND created_at >= %s AND created_at < %s
+                ORDER BY created_at DESC LIMIT 2
+            """
+            return conn.execute(query, (prefix, start, end)).fetchall()
+
+        query = f"""
+            SELECT key, value, created_at, (embedding <=> %s::vector) AS distance
+            FROM {self.table}
+            WHERE prefix = %s AND created_at >= %s AND created_at < %s
+            ORDER BY embedding <=> %s::vector
+            LIMIT %s
+        """
+        return conn.execute(query, (query_embedding, prefix, start, end, query_embedding, limit or 2)).fetchall()
         
     def _get_latest_chat(self, user_query: str, config: RunnableConfig):
         """
@@ -152,5 +358,183 @@ class PostgresStoreConfig(StoreConfig):
         """
         namespace = (self.user_id, "history")
         unique_key = f"chat_{int(time.time() * 1000)}"
-        with self.store_type.from_conn_string(self.conn_string, index=self.index) as store:
-            store.put(namespace, unique_key, {f"{index_keys[0]}": data["query"], f"{index_keys[1]}": data["bot"]}, index=self.index.get('fields'))
\ No newline at end of file
+        if self.partition_by:
+            self._write_partitioned(unique_key, {f"{index_keys[0]}": data["query"], f"{index_keys[1]}": data["bot"]})
+            return
+        with instrumentation.span("history_write", store="postgres"), \
+                self.store_type.from_conn_string(self.conn_string, index=self.index) as store:
+            store.put(namespace, unique_key, {f"{index_keys[0]}": data["query"], f"{index_keys[1]}": data["bot"]}, index=self.index.get('fields'))
+
+    def _write_partitioned(self, key: str, value: dict):
+        embedding = self._embed_turn(value)
+        created_at = datetime.now(self.timezone)
+        with instrumentation.span("history_write", store="postgres"), \
+                self.store_type.from_conn_string(self.conn_string, index=self.index) as store:
+            self.maintain_partitions(store.conn)
+            store.conn.execute(
+                f"INSERT INTO {self.table} (prefix, key, value, embedding, created_at) VALUES (%s, %s, %s::jsonb, %s::vector, %s)",
+                (f"{self.user_id}.history", key, json.dumps(value), embedding, created_at),
+            )
+
+    def export_history(self) -> Iterator[HistoryRecord]:
+        """
+        Stream every history record with its embedding using `COPY ... TO STDOUT (FORMAT BINARY)`.
+
+        Rows are decoded as they arrive from the server, so memory stays flat
+        whatever the size of the history. Embeddings are exported as float32
+        arrays. A record carries a single embedding: for langgraph's tables,
+        that of the first indexed field, so when several fields are indexed
+        imports re-embed every field instead of reusing it.
+
+        Returns:
+            Iterator[HistoryRecord]: The records of all users.
+        """
+        if not self.conn_string:
+            raise ValueError("Connection string is not set. Please set it using set_connection_string method.")
+
+        if self.partition_by:
+            query = f"""
+                COPY (SELECT prefix, key, value, created_at, embedding::real[] FROM {self.table})
+                TO STDOUT (FORMAT BINARY)
+            """
+        else:
+            query = """
+                COPY (
+                    SELECT s.prefix, s.key, s.value, s.created_at, v.embedding::real[]
+                    FROM store AS s
+                    LEFT JOIN LATERAL (
+                        SELECT sv.embedding FROM store_vectors AS sv
+                        WHERE sv.prefix = s.prefix AND sv.key = s.key
+                        ORDER BY sv.field_name LIMIT 1
+                    ) AS v ON TRUE
+                    WHERE s.prefix LIKE '%.history'
+                ) TO STDOUT (FORMAT BINARY)
+            """
+
+        count = 0
+        with instrumentation.span("history_export", store="postgres"), \
+                self.store_type.from_conn_string(self.conn_string, index=self.index) as store, \
+                store.conn.cursor() as cursor, cursor.copy(query) as copy:
+            copy.set_types(["text", "text", "jsonb", "timestamptz", "float4[]"])
+            for prefix, key, value, created_at, embedding in copy.rows():
+                count += 1
+                yield HistoryRecord(prefix.rsplit(".", 1)[0], key, value, created_at, as_embedding(embedding))
+        instrumentation.increment("history_records_exported", count)
+
+    def import_history(self, records: Iterable[HistoryRecord], batch_size: int = 10000, reembed: bool = False) -> int:
+        """
+        Bulk load history records with `COPY ... FROM STDIN (FORMAT BINARY)`.
+
+        Each batch is streamed into a temporary staging table and merged into
+        the history tables in one transaction: existing keys are overwritten,
+        missing partitions are created for the batch's time range, and only
+        one batch of records is held at a time. In langgraph's tables each
+        indexed field gets its own `store_vectors` row, as with `put`; an
+        exported embedding is reused only when a single field is indexed and it
+        has this store's dimensions, otherwise every field is embedded again.
+
+        Args:
+            records (Iterable[HistoryRecord]): The records to import.
+            batch_size (int, optional): Records per COPY and transaction. Defaults to 10000.
+            reembed (bool, optional): If True, recompute every embedding. Defaults to False.
+
+        Returns:
+            int: The number of records imported.
+        """
+        if not self.conn_string:
+            raise ValueError("Connection string is not set. Please set it using set_connection_string method.")
+
+        self.initial_postgres_store_setup()
+        fields = self.embedding_fields or ["$"]
+        # langgraph's tables hold one vector per indexed field, the partitioned table one per row
+        per_field = not self.partition_by and bool(self.index) and self.embeddings is not None and len(fields) > 1
+        if self.use_embeddings and not per_field:
+            records = embed_missing(records, self.embeddings, self.embedding_fields, self.dims,
+                                    reembed=reembed, batch_size=min(batch_size, 256))
+
+        count = 0
+        with instrumentation.span("history_import", store="postgres"), \
+                self.store_type.from_conn_string(self.conn_string, index=self.index) as store:
+            conn = store.conn
+            for batch in batched(records, batch_size):
+                with conn.transaction():
+                    conn.execute("""
+                        CREATE TEMP TABLE history_import (
+                            prefix TEXT, key TEXT, value JSONB, created_at TIMESTAMPTZ, embedding REAL[]
+                        ) ON COMMIT DROP
+                    """)
+                    with conn.cursor() as cursor, \
+                            cursor.copy("COPY history_import FROM STDIN (FORMAT BINARY)") as copy:
+                        copy.set_types(["text", "text", "jsonb", "timestamptz", "float4[]"])
+                        for record in batch:
+                            embedding = None if per_field else as_embedding(record.embedding)
+                            if embedding is not None and embedding.size != self.dims:
+                                embedding = None
+                            copy.write_row((
+                                f"{record.user_id}.history", record.key, record.value, record.created_at,
+                                None if embedding is None else embedding.tolist(),
+                            ))
+                    if per_field:
+                        self._stage_field_vectors(conn, batch, fields)
+                    self._merge_import(conn, per_field)
+                count += len(batch)
+                logging.info(f"Imported {count} history records")
+        instrumentation.increment("history_records_imported", count)
+        return count
+
+    def _stage_field_vectors(self, conn, batch: List[HistoryRecord], fields: list):
+        """Embed every indexed field of `batch` into the `history_import_vectors` staging table."""
+        conn.execute("""
+            CREATE TEMP TABLE history_import_vectors (
+                prefix TEXT, key TEXT, field_name TEXT, embedding REAL[]
+            ) ON COMMIT DROP
+        """)
+        with conn.cursor() as cursor, \
+                cursor.copy("COPY history_import_vectors FROM STDIN (FORMAT BINARY)") as copy:
+            copy.set_types(["text", "text", "text", "float4[]"])
+            for record, vectors in zip(batch, embed_fields(batch, self.embeddings, fields)):
+                for field, vector in vectors.items():
+                    copy.write_row((f"{record.user_id}.history", record.key, field, vector.tolist()))
+
+    def _merge_import(self, conn, per_field: bool = False):
+        """Move the staged rows of `history_import` (and `history_import_vectors`) into the history tables."""
+        if self.partition_by:
+            bounds = conn.execute("SELECT min(created_at) AS first, max(created_at) AS last FROM history_import").fetchone()
+            first, last = (bounds["first"], bounds["last"]) if isinstance(bounds, dict) else bounds
+            if first is None:
+                return
+            self._create_partitions(conn, first, last)
+            conn.execute(f"""
+                INSERT INTO {self.table} (prefix, key, value, embedding, created_at)
+                SELECT prefix, key, value, embedding::vector, created_at FROM history_import
+                ON CONFLICT (prefix, created_at, key) DO UPDATE
+                SET value = EXCLUDED.value, embedding = EXCLUDED.embedding
+            """)
+            return
+
+        conn.execute("""
+            INSERT INTO store (prefix, key, value, created_at, updated_at)
+            SELECT prefix, key, value, created_at, created_at FROM history_import
+            ON CONFLICT (prefix, key) DO UPDATE
+            SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at
+        """)
+        if per_field:
+            conn.execute("""
+                INSERT INTO store_vectors (prefix, key, field_name, embedding, created_at, updated_at)
+                SELECT v.prefix, v.key, v.field_name, v.embedding::vector, h.created_at, h.created_at
+                FROM history_import_vectors AS v
+                JOIN history_import AS h ON h.prefix = v.prefix AND h.key = v.key
+                ON CONFLICT (prefix, key, field_name) DO UPDATE
+                SET embedding = EXCLUDED.embedding, updated_at = EXCLUDED.updated_at
+            """)
+        elif self.index:
+            conn.execute(
+                """
+                INSERT INTO store_vectors (prefix, key, field_name, embedding, created_at, updated_at)
+                SELECT prefix, key, %s, embedding::vector, created_at, created_at FROM history_import
+                WHERE embedding IS NOT NULL
+                ON CONFLICT (prefix, key, field_name) DO UPDATE
+                SET embedding = EXCLUDED.embedding, updated_at = EXCLUDED.updated_at
+                """,
+                ((self.embedding_fields or ["$"])[0],),
+            )
@@ -0,0 +1,288 @@
+import json
+import time
+import logging
+import numpy as np
+from collections import defaultdict
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from typing_extensions import Iterable, Iterator
+from langchain_core.runnables import RunnableConfig
+from . import StoreConfig
+from .transfer import HistoryRecord, as_embedding, batched, embed_missing
+from ..instrumentation import instrumentation
+
+
+class RedisStoreConfig(StoreConfig):
+    def __init__(self, client=None, url: str = "redis://localhost:6379/0", use_embeddings=True, embeddings=None,
+                 embedding_fields=[], dims=384, timezone: str = "Africa/Kigali", key_prefix: str = "easy_rag",
+                 expire_grace: int = 0):
+        """
+        Initialize a RedisStoreConfig object with the given configuration.
+
+        History is kept per user and per day: a list of turns, a parallel list of
+        float32 query embeddings, and a `latest` key holding the last turn so that
+        `is_latest` is a single GET. Every write goes out in one pipelined
+        transaction and sets the keys to expire at the end of the day, so a day
+        of history disappears on its own like the "today" window of
+        PostgresStoreConfig.
+
+        Args:
+            client (redis.Redis, optional): A Redis client, or any object with the same methods
+                such as a local stand-in. Defaults to a client connected to `url`.
+            url (str, optional): Redis URL used when no client is given. Defaults to "redis://localhost:6379/0".
+            use_embeddings (bool, optional): If True, history searches rank turns by similarity to the query.
+                Otherwise they return the most recent turns. Defaults to True.
+            embeddings (EmbeddingBackend, optional): The embeddings model to use. Defaults to None.
+            embedding_fields (list, optional): The fields to embed. Defaults to [], the query.
+            dims (int, optional): The dimensions of the embeddings. Defaults to 384.
+            timezone (str, optional): Timezone whose calendar day scopes the history. Defaults to "Africa/Kigali".
+            key_prefix (str, optional): Prefix of every key. Defaults to "easy_rag".
+            expire_grace (int, optional): Seconds history is kept past the end of its day. Defaults to 0.
+        """
+        super().__init__(use_embeddings, embeddings, embedding_fields, dims)
+
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+
+        self.client = client
+        self.timezone = ZoneInfo(timezone)
+        self.key_prefix = key_prefix
+        self.expire_grace = expire_grace
+        self.limit = 2
+
+    def _day(self) -> datetime:
+        return datetime.now(self.timezone)
+
+    def _keys(self, day: datetime, user_id: str = None) -> tuple:
+        base = f"{self.key_prefix}:history:{user_id or self.user_id}"
+        stamp = day.strftime("%Y%m%d")
+        return f"{base}:{stamp}:turns", f"{base}:{stamp}:vectors", f"{base}:latest"
+
+    def _expire_at(self, day: datetime) -> int:
+        midnight = datetime.combine(day.date() + timedelta(days=1), datetime.min.time(), tzinfo=self.timezone)
+        return int(midnight.timestamp()) + self.expire_grace
+
+    def _embed_turn(self, data: dict) -> bytes:
+        fields = self.embedding_fields or ["query"]
+        text = " ".join(str(data.get(field, "")) for field in fields)
+        with instrumentation.span("embed_query"):
+            vector = self.embeddings.embed_query(text)
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def _decode(raw) -> dict:
+        return json.loads(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+
+    def _search_in_store(self, config: RunnableConfig, user_query: str = None) -> list:
+        """
+        Search today's history of the user for the turns closest to the query.
+
+        Args:
+            config (RunnableConfig): The configuration for the runnable.
+            user_query (str, optional): The user's query to search. Defaults to None.
+
+        Returns:
+            list: Up to two `{"value": turn}` entries, best first.
+        """
+        search_params = self._prepare_search_params(config, user_query)
+        limit = search_params.get("limit", self.limit)
+        turns_key, vectors_key, _ = self._keys(self._day())
+        rank = self.use_embeddings and self.embeddings is not None and user_query
+
+        with instrumentation.span("history_search", store="redis"):
+            pipe = self.client.pipeline(transaction=False)
+            pipe.lrange(turns_key, 0, -1)
+            if rank:
+                pipe.lrange(vectors_key, 0, -1)
+            results = pipe.execute()
+            turns = results[0]
+            if not turns:
+                return []
+
+            if not rank or len(results[1]) != len(turns):
+                if rank:
+                    logging.warning(f"Redis history {turns_key} has missing embeddings, using the latest turns")
+                selected = list(range(len(turns) - 1, -1, -1))[:limit]
+            else:
+                with instrumentation.span("embed_query"):
+                    query = np.asarray(self.embeddings.embed_query(user_query), dtype=np.float32)
+                matrix = np.frombuffer(b"".join(results[1]), dtype=np.float32).reshape(len(turns), -1)
+                norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+                scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+                selected = np.argsort(-scores, kind="stable")[:limit].tolist()
+
+        return [{"value": self._decode(turns[i])} for i in selected]
+
+    def _get_latest_chat(self, user_query: str, config: RunnableConfig):
+        """
+        Retrieve the latest chat from the store.
+
+        Returns:
+            The most recent chat entry in the store.
+        """
+        self._prepare_search_params(config, user_query)
+        _, _, latest_key = self._keys(self._day())
+        with instrumentation.span("history_search", store="redis"):
+            raw = self.client.get(latest_key)
+        if not raw:
+            return []
+        return {"value": self._decode(raw)}
+
+    def load_chat_history(self, user_query: str, config: RunnableConfig, is_latest=False):
+        """
+        Load chat history from the store.
+
+        Args:
+            is_latest (bool, optional): If True, only load the latest chat entry. Defaults to False.
+
+        Returns:
+            list: The formatted chat history.
+        """
+        if not is_latest:
+            history = self._search_in_store(config, user_query)
+            formatted = super()._format_chat_history(history, store_type="RedisStore")
+        else:
+            latest = self._get_latest_chat(user_query, config)
+            if latest:
+                formatted = super()._format_chat_history([latest], store_type="RedisStore")
+            else:
+                formatted = []
+
+        return formatted
+
+    def update_chat_history(self, data: dict, index_keys: list = ["query", "bot"]):
+        """
+        Update the store with the latest chat data.
+
+        Args:
+            data (dict): The query and bot response to store.
+            index_keys (list, optional): The keys to store the query and response under. Defaults to ["query", "bot"].
+        """
+        day = self._day()
+        turns_key, vectors_key, latest_key = self._keys(day)
+        turn = {f"{index_keys[0]}": data["query"], f"{index_keys[1]}": data["bot"], "created_at": time.time()}
+        payload = json.dumps(turn)
+        vector = self._embed_turn(turn) if self.use_embeddings and self.embeddings is not None else None
+        expire_at = self._expire_at(day)
+
+        with instrumentation.span("history_write", store="redis"):
+            # MULTI/EXEC keeps the turns and vectors lists aligned under concurrent writers
+            pipe = self.client.pipeline(transaction=True)
+            pipe.rpush(turns_key, payload)
+            if vector is not None:
+                pipe.rpush(vectors_key, vector)
+            pipe.set(latest_key, payload)
+            pipe.expireat(turns_key, expire_at)
+            if vector is not None:
+                pipe.expireat(vectors_key, expire_at)
+            pipe.expireat(latest_key, expire_at)
+            pipe.execute()
+
+    def export_history(self) -> Iterator[HistoryRecord]:
+        """
+        Stream every history record kept in Redis, with its stored embedding.
+
+        Day lists are found with SCAN, so the server is never blocked, and each
+        day's turns and vectors are read in one pipelined round trip. Only the
+        days that have not expired yet are left to export.
+
+        Returns:
+            Iterator[HistoryRecord]: The records of all users.
+        """
+        count = 0
+        pattern = f"{self.key_prefix}:history:*:turns"
+        with instrumentation.span("history_export", store="redis"):
+            for turns_key in self.client.scan_iter(match=pattern, count=1000):
+                turns_key = turns_key.decode("utf-8") if isinstance(turns_key, bytes) else turns_key
+                user_id, stamp = turns_key[len(self.key_prefix) + len(":history:"):].rsplit(":", 2)[:2]
+                pipe = self.client.pipeline(transaction=False)
+                pipe.lrange(turns_key, 0, -1)
+                pipe.lrange(turns_key[:-len("turns")] + "vectors", 0, -1)
+                turns, vectors = pipe.execute()
+                if len(vectors) != len(turns):
+                    vectors = [None] * len(turns)
+
+                for raw, vector in zip(turns, vectors):
+                    value = self._decode(raw)
+                    created = value.pop("created_at", None)
+                    created_at = (datetime.fromtimestamp(created, tz=self.timezone) if created is not None
+                                  else datetime.strptime(stamp, "%Y%m%d").replace(tzinfo=self.timezone))
+                    embedding = None if vector is None else np.frombuffer(vector, dtype=np.float32)
+                    count += 1
+                    yield HistoryRecord(user_id, f"chat_{int(created_at.timestamp() * 1000)}", value, created_at,
+                                        as_embedding(embedding))
+        instrumentation.increment("history_records_exported", count)
+
+    def import_history(self, records: Iterable[HistoryRecord], batch_size: int = 10000, reembed: bool = False) -> int:
+        """
+        Append history records to the per-day lists with pipelined writes.
+
+        Records are grouped by user and calendar day, sorted by creation time
+        and pushed with their float32 embeddings in one transaction per batch,
+        so the turns and vectors lists stay aligned. `latest` is moved to an
+        imported turn only if it is newer than the current one. Records of days
+        that have already expired are skipped, since Redis keeps only the
+        current day of history.
+
+        Args:
+            records (Iterable[HistoryRecord]): The records to import.
+            batch_size (int, optional): Records per pipeline. Defaults to 10000.
+            reembed (bool, optional): If True, recompute every embedding. Defaults to False.
+
+        Returns:
+            int: The number of records imported.
+        """
+        use_vectors = self.use_embeddings and self.embeddings is not None
+        if use_vectors:
+            records = embed_missing(records, self.embeddings, self.embedding_fields or ["query"], self.dims,
+                                    reembed=reembed, batch_size=min(batch_size, 256))
+
+        count = skipped = 0
+        now = time.time()
+        with instrumentation.span("history_import", store="redis"):
+            for batch in batched(records, batch_size):
+                days = defaultdict(list)
+                for record in batch:
+                    created_at = record.created_at or datetime.now(self.timezone)
+                    day = created_at.astimezone(self.timezone)
+                    if self._expire_at(day) <= now:
+                        skipped += 1
+                        continue
+                    days[(record.user_id, day.date())].append((created_at.timestamp(), day, record))
+                if not days:
+                    continue
+
+                # Latest turn of each user in the batch, compared with the stored one below
+                newest = {}
+                for (user_id, _), turns in days.items():
+                    turns.sort(key=lambda turn: turn[0])
+                    if user_id not in newest or turns[-1][0] > newest[user_id][0]:
+                        newest[user_id] = turns[-1]
+                latest_keys = {user_id: self._keys(turn[1], user_id)[2] for user_id, turn in newest.items()}
+                current = dict(zip(latest_keys, self.client.mget(list(latest_keys.values()))))
+
+                pipe = self.client.pipeline(transaction=True)
+                for (user_id, _), turns in days.items():
+                    turns_key, vectors_key, latest_key = self._keys(turns[0][1], user_id)
+                    expire_at = self._expire_at(turns[0][1])
+                    payloads = [json.dumps({**record.value, "created_at": created}) for created, _, record in turns]
+                    pipe.rpush(turns_key, *payloads)
+                    pipe.expireat(turns_key, expire_at)
+                    if use_vectors:
+                        pipe.rpush(vectors_key, *[as_embedding(record.embedding).tobytes() for _, _, record in turns])
+                        pipe.expireat(vectors_key, expire_at)
+                    created, _, record = newest[user_id]
+                    stored = current.get(user_id)
+                    if turns[-1][2] is record and (not stored or self._decode(stored).get("created_at", 0) < created):
+                        pipe.set(latest_key, payloads[-1])
+                        pipe.expireat(latest_key, expire_at)
+                    count += len(turns)
+                pipe.execute()
+                logging.info(f"Imported {count} history records")
+
+        if skipped:
+            logging.info(f"Skipped {skipped} history records of expired days")
+        instrumentation.increment("history_records_imported", count)
+        return count
+
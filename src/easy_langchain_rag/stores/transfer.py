@@ -0,0 +1,205 @@
+import gzip
+import json
+import struct
+import logging
+from datetime import datetime, timezone
+from itertools import islice
+from typing_extensions import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional
+import numpy as np
+from ..instrumentation import instrumentation
+
+
+MAGIC = b"ERAGHST1"
+# created_at, user id length, key length, value length, embedding dimensions (0: none)
+_RECORD = struct.Struct("<dHHIH")
+_BUFFER_SIZE = 1 << 20
+
+
+class HistoryRecord(NamedTuple):
+    """One chat turn as moved between stores: owner, key, stored value, creation time and embedding."""
+    user_id: str
+    key: str
+    value: dict
+    created_at: datetime
+    embedding: Optional[np.ndarray] = None
+
+
+def as_embedding(vector) -> Optional[np.ndarray]:
+    """A float32 vector, or None for a missing or empty embedding."""
+    if vector is None:
+        return None
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    return vector if vector.size else None
+
+
+def _open(path: str, mode: str) -> BinaryIO:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, compresslevel=1)
+    return open(path, mode, buffering=_BUFFER_SIZE)
+
+
+def write_history_file(path: str, records: Iterable[HistoryRecord]) -> int:
+    """
+    Stream history records to a compact binary file.
+
+    Each record is a fixed header followed by the user id, key, JSON value and
+    float32 embedding bytes, so a file is written and read back one record at
+    a time regardless of its size. Paths ending in ".gz" are gzip-compressed.
+
+    Args:
+        path (str): The file to write.
+        records (Iterable[HistoryRecord]): The records, typically a store's `export_history()`.
+
+    Returns:
+        int: The number of records written.
+    """
+    count = 0
+    with instrumentation.span("history_export", format="file"), _open(path, "wb") as handle:
+        handle.write(MAGIC)
+        for record in records:
+            user_id = record.user_id.encode("utf-8")
+            key = record.key.encode("utf-8")
+            value = json.dumps(record.value, separators=(",", ":")).encode("utf-8")
+            embedding = as_embedding(record.embedding)
+            dims = 0 if embedding is None else embedding.size
+            handle.write(_RECORD.pack(record.created_at.timestamp(), len(user_id), len(key), len(value), dims))
+            handle.write(user_id)
+            handle.write(key)
+            handle.write(value)
+            if dims:
+                handle.write(embedding.tobytes())
+            count += 1
+    instrumentation.increment("history_records_exported", count)
+    return count
+
+
+def read_history_file(path: str) -> Iterator[HistoryRecord]:
+    """
+    Stream the records of a file written by `write_history_file`.
+
+    Raises:
+        ValueError: If the file is not a history file or is truncated.
+    """
+    with _open(path, "rb") as handle:
+        if handle.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a chat history file")
+        while True:
+            header = handle.read(_RECORD.size)
+            if not header:
+                return
+            if len(header) != _RECORD.size:
+                raise ValueError(f"{path} is truncated")
+            created_at, user_len, key_len, value_len, dims = _RECORD.unpack(header)
+            body = handle.read(user_len + key_len + value_len + 4 * dims)
+            if len(body) != user_len + key_len + value_len + 4 * dims:
+                raise ValueError(f"{path} is truncated")
+            key_end = user_len + key_len
+            value_end = key_end + value_len
+            yield HistoryRecord(
+                user_id=body[:user_len].decode("utf-8"),
+                key=body[user_len:key_end].decode("utf-8"),
+                value=json.loads(body[key_end:value_end]),
+                created_at=datetime.fromtimestamp(created_at, tz=timezone.utc),
+                embedding=np.frombuffer(body, dtype=np.float32, offset=value_end) if dims else None,
+            )
+
+
+def batched(records: Iterable[HistoryRecord], size: int) -> Iterator[List[HistoryRecord]]:
+    """Consecutive lists of at most `size` records."""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def embed_missing(records: Iterable[HistoryRecord], embeddings, embedding_fields: list, dims: int,
+                  reembed: bool = False, batch_size: int = 256) -> Iterator[HistoryRecord]:
+    """
+    Fill in embeddings that are missing or of the wrong size, in batches.
+
+    Migrating between stores keeps the exported vectors as long as they match
+    the target's dimensions; `reembed` recomputes all of them, for example
+    when the target uses a different embedding model.
+
+    Args:
+        records (Iterable[HistoryRecord]): The records to import.
+        embeddings (Embeddings): The target store's embedding model, or None to leave records as they are.
+        embedding_fields (list): The value fields embedded. Defaults to all fields when empty.
+        dims (int): The embedding dimensions of the target store.
+        reembed (bool, optional): If True, recompute every embedding. Defaults to False.
+        batch_size (int, optional): Number of texts per `embed_documents` call. Defaults to 256.
+    """
+    if embeddings is None:
+        yield from records
+        return
+
+    for batch in batched(records, batch_size):
+        stale = [
+            i for i, record in enumerate(batch)
+            if reembed or record.embedding is None or np.asarray(record.embedding).size != dims
+        ]
+        if stale:
+            texts = [
+                " ".join(str(batch[i].value.get(field, "")) for field in (embedding_fields or list(batch[i].value)))
+                for i in stale
+            ]
+            with instrumentation.span("embed_documents", texts=len(texts)):
+                vectors = embeddings.embed_documents(texts)
+            for i, vector in zip(stale, vectors):
+                batch[i] = batch[i]._replace(embedding=as_embedding(vector))
+            logging.debug(f"Embedded {len(stale)} history records during import")
+        yield from batch
+
+
+def embed_fields(records: List[HistoryRecord], embeddings, fields: list,
+                 batch_size: int = 256) -> List[Dict[str, np.ndarray]]:
+    """
+    Embed each indexed field of each record separately, as langgraph stores do on `put`.
+
+    Args:
+        records (List[HistoryRecord]): The records to embed.
+        embeddings (Embeddings): The target store's embedding model.
+        fields (list): The value fields embedded; fields missing from a record are skipped.
+        batch_size (int, optional): Number of texts per `embed_documents` call. Defaults to 256.
+
+    Returns:
+        List[Dict[str, np.ndarray]]: The vector of every present field, one dict per record.
+    """
+    vectors = [{} for _ in records]
+    targets = [(i, field) for i, record in enumerate(records) for field in fields if field in record.value]
+    for start in range(0, len(targets), batch_size):
+        chunk = targets[start:start + batch_size]
+        texts = [str(records[i].value[field]) for i, field in chunk]
+        with instrumentation.span("embed_documents", texts=len(texts)):
+            embedded = embeddings.embed_documents(texts)
+        for (i, field), vector in zip(chunk, embedded):
+            vectors[i][field] = as_embedding(vector)
+    return vectors
+
+
+def migrate_history(source, target, batch_size: int = 10000, reembed: bool = False) -> int:
+    """
+    Copy every history record of one store config into another.
+
+    Args:
+        source (StoreConfig): The store to read, e.g. an InMemoryStoreConfig.
+        target (StoreConfig): The store to write, e.g. a PostgresStoreConfig.
+        batch_size (int, optional): Records written per batch. Defaults to 10000.
+        reembed (bool, optional): If True, recompute embeddings with the target's model. Defaults to False.
+
+    Returns:
+        int: The number of records imported.
+    """
+    return target.import_history(source.export_history(), batch_size=batch_size, reembed=reembed)
+
+
+def export_history_file(store_config, path: str) -> int:
+    """Back up a store's history to `path`; see `write_history_file`."""
+    return write_history_file(path, store_config.export_history())
+
+
+def import_history_file(store_config, path: str, batch_size: int = 10000, reembed: bool = False) -> int:
+    """Restore history from a file written by `export_history_file` into a store."""
+    return store_config.import_history(read_history_file(path), batch_size=batch_size, reembed=reembed)
@@ -0,0 +1,378 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing_extensions import Dict, List, Optional, Set, Tuple, Type
+from langchain_core.documents import Document
+from langchain_community.document_loaders import TextLoader, Docx2txtLoader, PyPDFLoader, UnstructuredMarkdownLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from ..document_processor import DocumentProcessor
+from ..instrumentation import instrumentation
+from ..vectors import iter_docstore
+from .managers import EmbeddingStoreManager
+
+
+DEFAULT_LOADERS = {
+    "txt": TextLoader,
+    "md": UnstructuredMarkdownLoader,
+    "pdf": PyPDFLoader,
+    "docx": Docx2txtLoader,
+}
+
+
+class _Job:
+    __slots__ = ("path", "attempts", "not_before")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.attempts = 0
+        self.not_before = 0.0
+
+
+class IndexingWorker:
+    def __init__(
+        self,
+        manager: EmbeddingStoreManager,
+        directories: List[str],
+        text_splitter: Type = RecursiveCharacterTextSplitter,
+        loaders: Dict[str, Type] = None,
+        poll_interval: float = 1.0,
+        debounce: float = 2.0,
+        batch_size: int = 32,
+        max_retries: int = 3,
+        retry_backoff: float = 5.0,
+        index_existing: bool = True,
+        **processor_kwargs,
+    ):
+        """
+        Long-running worker keeping a vector store in sync with knowledge-base directories.
+
+        The directories are polled for added, modified and deleted files. A file
+        is queued once it has stopped changing for `debounce` seconds, so a burst
+        of writes becomes a single job. Up to `batch_size` queued files are
+        re-chunked, diffed against the chunks indexed for them, embedded in one
+        call and published together as a new index version through
+        `manager.save_updated_vector_store`. Serving processes keep answering
+        from the last published version and swap in the new one through
+        `VectorStoreActions.load_vector_store_handle`.
+
+        Failed files are retried with exponential backoff. Progress, retries
+        and backlog are exposed in `stats` and as instrumentation metrics.
+
+        Run it in its own process next to the servers so chunking and embedding
+        never compete with query traffic.
+
+        Args:
+            manager (EmbeddingStoreManager): Manager of the index to keep up to date.
+            directories (List[str]): Knowledge-base directories, relative to the working directory.
+            text_splitter (Type, optional): Splitter class passed to DocumentProcessor. Defaults to RecursiveCharacterTextSplitter.
+            loaders (Dict[str, Type], optional): Document loader by file extension. Defaults to DEFAULT_LOADERS.
+            poll_interval (float, optional): Seconds between directory scans. Defaults to 1.0.
+            debounce (float, optional): Seconds a file must stay unchanged before it is indexed. Defaults to 2.0.
+            batch_size (int, optional): Maximum number of files applied per published version. Defaults to 32.
+            max_retries (int, optional): Retries of a failing file before it is given up. Defaults to 3.
+            retry_backoff (float, optional): Delay before the first retry, doubled on each one. Defaults to 5.0.
+            index_existing (bool, optional): Treat the files present at start as changed, so the index
+                catches up with edits made while the worker was down. Defaults to True.
+            **processor_kwargs: Extra DocumentProcessor arguments, such as chunk_size or chunk_overlap.
+        """
+        if not directories or not all(isinstance(d, str) for d in directories):
+            raise ValueError("directories must be a non-empty list of paths")
+
+        for directory in directories:
+            if "../" in directory:
+                raise ValueError("directories must be relative paths")
+            if not os.path.isdir(directory):
+                raise ValueError(f"directory {directory} does not exist")
+
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+
+        if debounce < 0 or poll_interval <= 0:
+            raise ValueError("debounce must be >= 0 and poll_interval > 0")
+
+        self.manager = manager
+        self.directories = [os.path.normpath(d) for d in directories]
+        self.text_splitter = text_splitter
+        self.loaders = loaders or DEFAULT_LOADERS
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.processor_kwargs = processor_kwargs
+
+        # (mtime_ns, size) of every file as last indexed, or as found at start
+        self._indexed: Dict[str, Tuple[int, int]] = {}
+        # Changed files waiting for the debounce: path -> (signature, last change time)
+        self._changing: Dict[str, Tuple[Optional[Tuple[int, int]], float]] = {}
+        self._queue: "OrderedDict[str, _Job]" = OrderedDict()
+        self._dirty = False
+        self._failed: Dict[str, str] = {}
+
+        self._ids_by_source: Dict[str, Set[str]] = {}
+        self._sources_by_id: Dict[str, Set[str]] = {}
+        for doc_id, document in iter_docstore(self.manager.vectorstore):
+            source = document.metadata.get("source")
+            if source:
+                source = os.path.normpath(source)
+                self._ids_by_source.setdefault(source, set()).add(doc_id)
+                self._sources_by_id.setdefault(doc_id, set()).add(source)
+
+        self.stats = {
+            "files_indexed": 0,
+            "files_failed": 0,
+            "retries": 0,
+            "chunks_added": 0,
+            "chunks_removed": 0,
+            "publishes": 0,
+            "backlog": 0,
+            "oldest_pending_seconds": 0.0,
+            "last_publish": None,
+        }
+
+        if not index_existing:
+            for path, signature in self._scan().items():
+                self._indexed[path] = signature
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        found = {}
+        for directory in self.directories:
+            for folder, _, files in os.walk(directory):
+                for name in files:
+                    extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+                    if extension not in self.loaders:
+                        continue
+                    path = os.path.normpath(os.path.join(folder, name))
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    found[path] = (stat.st_mtime_ns, stat.st_size)
+        return found
+
+    def scan(self) -> int:
+        """
+        Look for changed files and queue those that have settled.
+
+        Returns:
+            int: The number of files queued by this scan.
+        """
+        now = time.monotonic()
+        found = self._scan()
+        changed = {path: signature for path, signature in found.items() if self._indexed.get(path) != signature}
+        for path in self._indexed:
+            if path not in found:
+                changed[path] = None
+        # Files restored to their indexed state need nothing
+        for path in list(self._changing):
+            if path not in changed:
+                del self._changing[path]
+                self._queue.pop(path, None)
+
+        queued = 0
+        for path, signature in changed.items():
+            previous = self._changing.get(path)
+            if previous is None or previous[0] != signature:
+                previous = self._changing[path] = (signature, now)
+            if now - previous[1] >= self.debounce and path not in self._queue:
+                self._queue[path] = _Job(path)
+                queued += 1
+        return queued
+
+    def _chunk_file(self, path: str) -> List[Document]:
+        loader = self.loaders[path.rsplit(".", 1)[-1].lower()]
+        processor = DocumentProcessor(path, self.text_splitter, loader, **self.processor_kwargs)
+        chunks, _ = processor.get_chunks()
+        return list(chunks)
+
+    def _due_jobs(self, now: float) -> List[_Job]:
+        jobs = []
+        for job in self._queue.values():
+            # A queued file that changed again waits for a new debounce period
+            change = self._changing.get(job.path)
+            if change is not None and now - change[1] < self.debounce:
+                continue
+            if job.not_before <= now:
+                jobs.append(job)
+                if len(jobs) == self.batch_size:
+                    break
+        return jobs
+
+    def process_batch(self) -> int:
+        """
+        Apply up to `batch_size` queued files and publish the result.
+
+        Returns:
+            int: The number of files applied.
+        """
+        now = time.monotonic()
+        jobs = self._due_jobs(now)
+        if not jobs:
+            if self._dirty:
+                self._publish()
+            return 0
+
+        results: List[Tuple[_Job, Optional[List[Document]], Optional[Tuple[int, int]]]] = []
+        with instrumentation.span("indexing_batch", files=len(jobs)):
+            for job in jobs:
+                signature = self._changing.get(job.path, (None, 0))[0]
+                try:
+                    chunks = self._chunk_file(job.path) if os.path.exists(job.path) else None
+                except Exception as e:
+                    self._retry(job, e)
+                    continue
+                results.append((job, chunks, signature))
+
+            if results:
+                self._apply(results)
+                self._dirty = True
+                self._publish()
+
+        for job, _, signature in results:
+            self._queue.pop(job.path, None)
+            self._changing.pop(job.path, None)
+            self._failed.pop(job.path, None)
+            if signature is None:
+                self._indexed.pop(job.path, None)
+            else:
+                self._indexed[job.path] = signature
+            self.stats["files_indexed"] += 1
+            instrumentation.increment("indexing_files_indexed")
+        return len(results)
+
+    def _retry(self, job: _Job, error: Exception):
+        job.attempts += 1
+        if job.attempts > self.max_retries:
+            logging.error(f"Giving up indexing {job.path} after {job.attempts} attempts: {error}")
+            self._queue.pop(job.path, None)
+            # Take the failed state as indexed so the file is retried only when it changes again
+            signature = self._changing.pop(job.path, (None, 0))[0]
+            if signature is None:
+                self._indexed.pop(job.path, None)
+            else:
+                self._indexed[job.path] = signature
+            self._failed[job.path] = str(error)
+            self.stats["files_failed"] += 1
+            instrumentation.increment("indexing_files_failed")
+            return
+        job.not_before = time.monotonic() + self.retry_backoff * 2 ** (job.attempts - 1)
+        self.stats["retries"] += 1
+        instrumentation.increment("indexing_retries")
+        logging.warning(f"Indexing {job.path} failed (attempt {job.attempts}), retrying: {error}")
+
+    def _apply(self, results: List[Tuple[_Job, Optional[List[Document]], Optional[Tuple[int, int]]]]):
+        """Diff the chunks of the files against the index and apply all changes at once."""
+        manager = self.manager
+        vector_store = manager.vectorstore
+        touched: Set[str] = set()
+        documents: Dict[str, Document] = {}
+        present = set(vector_store.index_to_docstore_id.values())
+
+        for job, chunks, _ in results:
+            source = job.path
+            for doc_id in self._ids_by_source.pop(source, ()):
+                self._sources_by_id.get(doc_id, set()).discard(source)
+                touched.add(doc_id)
+            if not chunks:
+                continue
+            ids = manager._create_doc_hash(chunks)
+            for doc_id, chunk in zip(ids, chunks):
+                documents.setdefault(doc_id, chunk)
+                self._sources_by_id.setdefault(doc_id, set()).add(source)
+                touched.add(doc_id)
+            self._ids_by_source[source] = set(ids)
+
+        to_delete = [doc_id for doc_id in touched if not self._sources_by_id.get(doc_id) and doc_id in present]
+        to_add = [doc_id for doc_id in touched if self._sources_by_id.get(doc_id) and doc_id not in present]
+        for doc_id in touched:
+            if not self._sources_by_id.get(doc_id):
+                self._sources_by_id.pop(doc_id, None)
+
+        if to_add:
+            vector_store.add_documents(documents=[documents[doc_id] for doc_id in to_add], ids=to_add)
+            instrumentation.increment("chunks_embedded", len(to_add))
+        if to_delete:
+            vector_store.delete(ids=to_delete)
+
+        if manager.sparse_index is not None:
+            for doc_id in to_delete:
+                manager.sparse_index.remove(doc_id)
+            for doc_id in to_add:
+                manager.sparse_index.add(doc_id, documents[doc_id].page_content)
+
+        manager.changed_doc_ids.update(to_add)
+        manager.changed_doc_ids.update(to_delete)
+        manager.existing_doc_ids = manager._load_existing_chunk_ids()
+
+        self.stats["chunks_added"] += len(to_add)
+        self.stats["chunks_removed"] += len(to_delete)
+        instrumentation.increment("indexing_chunks_added", len(to_add))
+        instrumentation.increment("indexing_chunks_removed", len(to_delete))
+        logging.info(f"Indexed {len(results)} files: {len(to_add)} chunks added, {len(to_delete)} removed")
+
+    def _publish(self):
+        if not self.manager.save_updated_vector_store(self.manager.vectorstore):
+            # Changes stay in memory and are published with the next batch or poll
+            return
+        self._dirty = False
+        self.stats["publishes"] += 1
+        self.stats["last_publish"] = time.time()
+        instrumentation.increment("indexing_publishes")
+
+    def _update_backlog(self):
+        now = time.monotonic()
+        pending = [change_time for _, change_time in self._changing.values()]
+        self.stats["backlog"] = len(self._queue)
+        self.stats["oldest_pending_seconds"] = now - min(pending) if pending else 0.0
+        instrumentation.set_gauge("indexing_backlog", self.stats["backlog"])
+        instrumentation.set_gauge("indexing_oldest_pending_seconds", self.stats["oldest_pending_seconds"])
+
+    @property
+    def failed(self) -> Dict[str, str]:
+        """Files given up on, with their last error."""
+        return dict(self._failed)
+
+    def poll(self) -> int:
+        """
+        Run one scan and apply every due batch.
+
+        Returns:
+            int: The number of files applied.
+        """
+        self.scan()
+        applied = 0
+        while True:
+            count = self.process_batch()
+            applied += count
+            self._update_backlog()
+            if count < self.batch_size or self._stop.is_set():
+                return applied
+
+    def run(self):
+        """Poll until `stop` is called."""
+        logging.info(f"Indexing worker watching {self.directories}")
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logging.error(f"Indexing worker iteration failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self) -> "IndexingWorker":
+        """Run the worker in a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="indexing-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
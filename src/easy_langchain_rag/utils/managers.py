@@ -1,21 +1,30 @@
 import os
 import hashlib
 import logging
-from typing_extensions import Type
+from typing_extensions import List, Union
 from pathlib import Path
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 from langchain_core.documents import Document
+from ..instrumentation import instrumentation
+from ..vectors import instrument_vector_store
+from ..vectors.sparse import SparseIndex
+from ..vectors.snapshots import SnapshotStore, resolve_index_path
+from ..document_processor.chunk_store import ChunkStore
+from ..embeddings import EmbeddingBackend, validate_embeddings
 
 class EmbeddingStoreManager:
-    def __init__(self, embedding_path:str, embedding_function: Type[HuggingFaceEmbeddings], allow_dangerous_deserialization=True):
+    def __init__(self, embedding_path:str, embedding_function: EmbeddingBackend, allow_dangerous_deserialization=True,
+                 response_cache=None):
         """
         Initialize a EmbeddingStoreManager object.
 
         Args:
             embedding_path (str): The path to a FAISS index to load.
-            embedding_function (Type[HuggingFaceEmbeddings]): The embedding model to use.
+            embedding_function (EmbeddingBackend): The embedding model to use, e.g. HuggingFaceEmbeddings,
+                OnnxEmbeddings or ProcessPoolEmbeddings.
             allow_dangerous_deserialization (bool): Whether to allow deserialization of the index. Defaults to True.
+            response_cache (SemanticResponseCache, optional): A response cache whose entries built on
+                changed chunks are dropped when the updated vector store is saved. Defaults to None.
         """
         if not embedding_path:
             raise ValueError("embedding_path is required")
@@ -31,11 +40,21 @@ class EmbeddingStoreManager:
                 
         if not embedding_function:
             raise ValueError("embedding_function is required")
+        validate_embeddings(embedding_function, "embedding_function")
                 
         self.embedding_path = embedding_path
         self.embedding_function = embedding_function
-        self.vectorstore = FAISS.load_local(embedding_path, embedding_function, allow_dangerous_deserialization=allow_dangerous_deserialization)
+        # Versioned index directories load their published version
+        index_path = resolve_index_path(embedding_path)
+        with instrumentation.span("index_load"):
+            self.vectorstore = instrument_vector_store(FAISS.load_local(
+                index_path, embedding_function, allow_dangerous_deserialization=allow_dangerous_deserialization))
         self.existing_doc_ids = self._load_existing_chunk_ids()
+        # BM25 index saved next to the FAISS index, kept in sync with it when present
+        self.sparse_index = SparseIndex.load(index_path)
+        self.response_cache = response_cache
+        # Ids added or deleted since the last save
+        self.changed_doc_ids = set()
     
     def _load_existing_chunk_ids(self):
         """
@@ -56,21 +75,22 @@ class EmbeddingStoreManager:
         Create a list of ids by hashing the content of each chunk in a list of chunks.
         
         Args:
-            chunks (list): A list of Document objects.
+            chunks (list): A list of Document objects, or a ChunkStore.
         
         Returns:
             tuple: A tuple containing a list of ids and the length of the list
         """
         ids = []
-        for chunk in chunks:
-            chunk_text = " ".join(chunk.page_content.strip())
+        texts = chunks.texts() if isinstance(chunks, ChunkStore) else (chunk.page_content for chunk in chunks)
+        for text in texts:
+            chunk_text = " ".join(text.strip())
             has_version = hashlib.sha256(f"{chunk_text}".encode('utf-8')).hexdigest()
             ids.append(has_version)
 
         return ids
         
 
-    def update_vector_store(self, vector_store: FAISS, chunks: list[Document]):
+    def update_vector_store(self, vector_store: FAISS, chunks: Union[List[Document], ChunkStore]):
         """
         Update the given vector store with new or modified document chunks.
 
@@ -83,13 +103,17 @@ class EmbeddingStoreManager:
 
         Args:
             vector_store (FAISS): The vector store to be updated.
-            chunks (list[Document]): A list of Document objects representing the chunks
-                                    to be compared and potentially added to the vector store.
+            chunks (Union[List[Document], ChunkStore]): The chunks to be compared and potentially
+                                    added to the vector store. Only added chunks are materialized from a ChunkStore.
 
         Returns:
             FAISS: The updated vector store.
         """
 
+        with instrumentation.span("index_update", chunks=len(chunks)):
+            return self._update_vector_store(vector_store, chunks)
+
+    def _update_vector_store(self, vector_store: FAISS, chunks: Union[List[Document], ChunkStore]):
         new_vector_store = vector_store
         old_doc_ids = self.existing_doc_ids
         new_doc_ids = self._create_doc_hash(chunks)
@@ -105,7 +129,12 @@ class EmbeddingStoreManager:
             if new_id not in old_doc_ids:
                 logging.info(f"Paragraph {new_id} is a new paragraph")
                 # add new doc and continue
-                new_vector_store.add_documents(documents=[chunks[index]], ids=[new_id])
+                chunk = chunks[index]
+                new_vector_store.add_documents(documents=[chunk], ids=[new_id])
+                instrumentation.increment("chunks_embedded")
+                self.changed_doc_ids.add(new_id)
+                if self.sparse_index is not None:
+                    self.sparse_index.add(new_id, chunk.page_content)
                 # then update the ids list to avoid conflicts
                 old_doc_ids.append(new_id)
                 continue
@@ -116,6 +145,9 @@ class EmbeddingStoreManager:
                 if new_vector_store.get_by_ids([id]):
                     logging.info(f"Paragraph {id} is a deleted paragraph")
                     new_vector_store.delete(ids=[id])
+                    self.changed_doc_ids.add(id)
+                    if self.sparse_index is not None:
+                        self.sparse_index.remove(id)
                 
                     # then update the ids list to avoid conflicts
                     old_doc_ids.remove(id)
@@ -127,13 +159,32 @@ class EmbeddingStoreManager:
     
     def save_updated_vector_store(self, vector_store: FAISS, index="index"):
         """
-        Save the updated vector store to disk.
+        Save the updated vector store to disk as a new version.
+
+        The index is written into a fresh version directory and published with an
+        atomic pointer swap, so readers never load a half-written index and
+        handles from `VectorStoreActions.load_vector_store_handle` pick it up
+        without a restart. Old versions are garbage-collected.
         
         Args:
             vector_store (FAISS): The vector store to be saved.
+
+        Returns:
+            bool: True if the new version was published, False if saving failed.
         """
+        def write(path):
+            vector_store.save_local(path, index_name=index)
+            if self.sparse_index is not None:
+                self.sparse_index.save(path, index_name=index)
+
         try:
-            vector_store.save_local(self.embedding_path, index=index)
-            logging.info(f"Vector store saved to {self.embedding_path}")
+            with instrumentation.span("index_save"):
+                path = SnapshotStore(self.embedding_path).write(write)
+            logging.info(f"Vector store saved to {path}")
+            if self.response_cache is not None and self.changed_doc_ids:
+                self.response_cache.invalidate_chunks(self.changed_doc_ids)
+            self.changed_doc_ids = set()
+            return True
         except Exception as e:
-            logging.error(f"Failed to save vector store: {e}")
\ No newline at end of file
+            logging.error(f"Failed to save vector store: {e}")
+            return False
\ No newline at end of file
@@ -0,0 +1,221 @@
+import unicodedata
+from collections import Counter, defaultdict
+from typing_extensions import Dict, Iterable, List, Optional
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for phrase matching.
+
+    Applies NFKC normalization and Unicode case folding and strips surrounding
+    whitespace, so that phrases in any language compare the same way.
+
+    Parameters
+    ----------
+    text : str
+        The text to normalize.
+
+    Returns
+    -------
+    str
+        The normalized text.
+    """
+    return unicodedata.normalize("NFKC", text).casefold().strip()
+
+
+def _bigrams(text: str) -> Counter:
+    return Counter(text[i:i + 2] for i in range(len(text) - 1))
+
+
+class ClosingPhraseMatcher:
+    def __init__(self, phrases: Iterable[str], threshold: float = 0.85):
+        """
+        Precompiled matcher for closing phrases.
+
+        Built once from `CLOSING_PHRASES`, it answers the same question as
+        `detect_closing_intent`: does the message contain a phrase, or is the
+        whole message close to one? Substring hits use an Aho-Corasick automaton,
+        so the cost depends on the message length and not on the number of
+        phrases. Fuzzy hits use a bigram index to pick the few phrases that can
+        still reach the threshold, then a bit-parallel LCS to check them.
+
+        The fuzzy score is 2 * LCS / (len(message) + len(phrase)), which is never
+        lower than `difflib.SequenceMatcher.ratio`, so apart from the Unicode
+        normalization everything the old check accepted is still accepted.
+
+        Parameters
+        ----------
+        phrases : iterable of str
+            The closing phrases, in any language.
+        threshold : float, optional
+            The minimum similarity for a fuzzy hit. Defaults to 0.85.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+
+        self.threshold = threshold
+        self.phrases: List[str] = []
+        seen = set()
+        for phrase in phrases:
+            normalized = normalize_text(phrase)
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                self.phrases.append(normalized)
+
+        self._build_automaton()
+        self._build_fuzzy_index()
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def _build_automaton(self):
+        """Build the Aho-Corasick goto, fail and output tables."""
+        goto: List[Dict[str, int]] = [{}]
+        output: List[int] = [-1]
+        for index, phrase in enumerate(self.phrases):
+            state = 0
+            for char in phrase:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append(-1)
+                state = next_state
+            if output[state] == -1:
+                output[state] = index
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                # A state also matches every phrase ending at its fallback
+                if output[next_state] == -1:
+                    output[next_state] = output[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+
+    def _build_fuzzy_index(self):
+        self._lengths: Dict[int, List[int]] = defaultdict(list)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._masks: List[Dict[str, int]] = []
+        for index, phrase in enumerate(self.phrases):
+            self._lengths[len(phrase)].append(index)
+            for bigram in _bigrams(phrase):
+                self._postings[bigram].append(index)
+            masks: Dict[str, int] = defaultdict(int)
+            for position, char in enumerate(phrase):
+                masks[char] |= 1 << position
+            self._masks.append(dict(masks))
+
+    def _find_substring(self, text: str) -> int:
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] != -1:
+                return output[state]
+        return -1
+
+    def _lcs(self, text: str, index: int) -> int:
+        """Length of the longest common subsequence of `text` and phrase `index` (Hyyrö's bit-vector algorithm)."""
+        masks = self._masks[index]
+        length = len(self.phrases[index])
+        full = (1 << length) - 1
+        vector = full
+        for char in text:
+            matches = vector & masks.get(char, 0)
+            vector = ((vector + matches) | (vector - matches)) & full
+        return length - bin(vector).count("1")
+
+    def _find_fuzzy(self, text: str) -> int:
+        size = len(text)
+        if not size:
+            return -1
+        slack = 1 - self.threshold
+        # 2 * LCS >= t * (a + b) and LCS <= min(a, b) bound the phrase length b
+        min_length = max(int(size * self.threshold / (2 - self.threshold)), 1)
+        max_length = int(size * (2 - self.threshold) / self.threshold) + 1
+
+        # Each insertion or deletion breaks at most two bigrams, so a phrase within reach
+        # shares at least `required` bigrams with the text
+        required = min(
+            max(size, length) - 1 - 2 * int(slack * (size + length))
+            for length in range(min_length, max_length + 1)
+        )
+        if required <= 0:
+            # Too short to filter on bigrams: check every phrase of a compatible length
+            for length in range(min_length, max_length + 1):
+                for index in self._lengths.get(length, ()):
+                    if self._is_close(text, index):
+                        return index
+            return -1
+
+        # Prefix filter: a phrase sharing `required` bigrams must contain one of the rarest
+        # (size - 1) - required + 1 bigram occurrences of the text
+        budget = size - required
+        seen = set()
+        bigrams = sorted(_bigrams(text).items(), key=lambda item: len(self._postings.get(item[0], ())))
+        for bigram, count in bigrams:
+            for index in self._postings.get(bigram, ()):
+                if index in seen or not min_length <= len(self.phrases[index]) <= max_length:
+                    continue
+                seen.add(index)
+                if self._is_close(text, index):
+                    return index
+            budget -= count
+            if budget <= 0:
+                break
+        return -1
+
+    def _is_close(self, text: str, index: int) -> bool:
+        return 2 * self._lcs(text, index) >= self.threshold * (len(text) + len(self.phrases[index]))
+
+    def find(self, text: str) -> Optional[str]:
+        """
+        Return the closing phrase matched by `text`, or None.
+
+        Parameters
+        ----------
+        text : str
+            The user input.
+
+        Returns
+        -------
+        str or None
+            The normalized phrase that matched.
+        """
+        text = normalize_text(text)
+        index = self._find_substring(text)
+        if index == -1:
+            index = self._find_fuzzy(text)
+        return self.phrases[index] if index != -1 else None
+
+    def match(self, text: str) -> bool:
+        """Return True if `text` is a closing intent."""
+        return self.find(text) is not None
+
+    def match_many(self, texts: Iterable[str]) -> List[bool]:
+        """
+        Check a batch of messages.
+
+        Parameters
+        ----------
+        texts : iterable of str
+            The user inputs.
+
+        Returns
+        -------
+        list of bool
+            One result per input, in order.
+        """
+        return [self.find(text) is not None for text in texts]
@@ -1,4 +1,10 @@
+import re
+from functools import lru_cache
 from difflib import SequenceMatcher
+from typing_extensions import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from .phrase_matcher import ClosingPhraseMatcher
 
 
 def is_conversation_closing(user_input: str, CLOSING_PHRASES) -> bool:
@@ -61,6 +67,11 @@ def fuzzy_match(user_input: str, CLOSING_PHRASES, threshold: float = 0.85) -> bo
     return False
 
 
+@lru_cache(maxsize=32)
+def _compiled_matcher(phrases: Tuple[str, ...]) -> ClosingPhraseMatcher:
+    return ClosingPhraseMatcher(phrases)
+
+
 def detect_closing_intent(user_input: str, CLOSING_PHRASES) -> bool:
     """
     Detect if user input is a closing intent.
@@ -70,26 +81,317 @@ def detect_closing_intent(user_input: str, CLOSING_PHRASES) -> bool:
     `CLOSING_PHRASES` or if the user input is similar to one of the phrases in
     `CLOSING_PHRASES` (using fuzzy matching).
 
+    The phrases are compiled into a `ClosingPhraseMatcher` on first use and the
+    matcher is reused for the same phrases. For large phrase lists, build the
+    matcher once and pass it as `CLOSING_PHRASES` to skip the cache lookup.
+
     Parameters
     ----------
     user_input : str
         The user input to check.
+    CLOSING_PHRASES : list or ClosingPhraseMatcher
+        The phrases that indicate the conversation is closing.
 
     Returns
     -------
     bool
         True if the user input is a closing intent, False otherwise.
     """
-    if is_conversation_closing(user_input, CLOSING_PHRASES):
-        return True
-    if fuzzy_match(user_input, CLOSING_PHRASES):
-        return True
-    return False
+    if isinstance(CLOSING_PHRASES, ClosingPhraseMatcher):
+        matcher = CLOSING_PHRASES
+    else:
+        matcher = _compiled_matcher(tuple(CLOSING_PHRASES))
+    return matcher.match(user_input)
+
+
+# Fallback tokenization when tiktoken is not installed: words, numbers and single symbols,
+# which tracks BPE token counts closely enough for budgeting.
+_APPROXIMATE_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+@lru_cache(maxsize=None)
+def _get_tokenizer(encoding_name: str) -> Callable[[str], list]:
+    """Load a tokenizer once per encoding name."""
+    try:
+        import tiktoken
+    except ImportError:
+        return _APPROXIMATE_TOKEN_RE.findall
+    return tiktoken.get_encoding(encoding_name).encode_ordinary
+
+
+@lru_cache(maxsize=65536)
+def _count_text(text: str, encoding_name: str) -> int:
+    return len(_get_tokenizer(encoding_name)(text))
+
+
+def _message_text(message: Union[BaseMessage, Document, str]) -> str:
+    if isinstance(message, str):
+        return message
+    if isinstance(message, Document):
+        return message.page_content
+    content = message.content
+    if isinstance(content, str):
+        return content
+    # Multimodal content: only text parts use tokens from the budget
+    return " ".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+
+
+def token_counter(
+    messages: Union[str, BaseMessage, Document, Iterable[Union[str, BaseMessage, Document]]],
+    encoding_name: str = "cl100k_base",
+    tokens_per_message: int = 3,
+) -> int:
+    """
+    Count the tokens used by messages, documents or plain strings.
+
+    The tokenizer is loaded once and the count of every distinct text is
+    memoized, so counting a history again after a new turn only tokenizes the
+    new message. It can be passed as `token_counter` to LangChain's own
+    `trim_messages`.
+
+    Parameters
+    ----------
+    messages : str, BaseMessage, Document or an iterable of them
+        What to count.
+    encoding_name : str, optional
+        The tiktoken encoding. Defaults to "cl100k_base". Without tiktoken
+        installed an approximate regex tokenizer is used.
+    tokens_per_message : int, optional
+        Formatting overhead added for each chat message. Defaults to 3.
+
+    Returns
+    -------
+    int
+        The number of tokens.
+    """
+    if isinstance(messages, (str, BaseMessage, Document)):
+        messages = [messages]
+
+    total = 0
+    for message in messages:
+        total += _count_text(_message_text(message), encoding_name)
+        if isinstance(message, BaseMessage):
+            total += tokens_per_message
+    return total
+
+
+def _split_turns(messages: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], List[List[BaseMessage]]]:
+    """Separate leading system messages and group the rest into turns starting at each human message."""
+    system = []
+    index = 0
+    while index < len(messages) and isinstance(messages[index], SystemMessage):
+        system.append(messages[index])
+        index += 1
+
+    turns = []
+    for message in messages[index:]:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return system, turns
+
+
+def _document_span(document: Document) -> Optional[Tuple[int, int]]:
+    metadata = document.metadata
+    start = metadata.get("start", metadata.get("start_index"))
+    if start is None:
+        return None
+    end = metadata.get("end", start + len(document.page_content))
+    return start, end
+
+
+def _text_overlap(left: str, right: str, min_overlap: int) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right`, or 0 if shorter than min_overlap."""
+    longest = min(len(left), len(right))
+    if longest < min_overlap:
+        return 0
+    head = right[:min_overlap]
+    # The first occurrence of the head of `right` in the tail of `left` gives the longest overlap
+    position = left.find(head, len(left) - longest)
+    while position != -1:
+        if right.startswith(left[position:]):
+            return len(left) - position
+        position = left.find(head, position + 1)
+    return 0
+
+
+def _parent_key(document: Document) -> Optional[Tuple[str, str]]:
+    """(source, page) of the text a chunk's offsets are relative to, or None without a source."""
+    source = document.metadata.get("source")
+    if source is None:
+        return None
+    page = document.metadata.get("page", document.metadata.get("page_number"))
+    return str(source), "" if page is None else str(page)
+
+
+def merge_overlapping_chunks(
+    documents: Sequence[Tuple[Document, float]],
+    min_overlap: int = 20,
+) -> List[Tuple[Document, float]]:
+    """
+    Merge retrieved chunks of the same source and page whose text overlaps.
+
+    Chunks carrying character offsets (`start`/`end` or `start_index`
+    metadata) are merged when their ranges touch; others when the end of one
+    chunk repeats the start of the next. A merged chunk keeps the best score.
+    Chunks without a `source` are never merged, since nothing tells whether
+    they come from the same document, and chunks of different pages are
+    never merged, since their offsets are relative to their own page.
+
+    Parameters
+    ----------
+    documents : sequence of (Document, float)
+        Chunks with their relevance score, higher is better.
+    min_overlap : int, optional
+        Minimum repeated characters for chunks without offsets. Defaults to 20.
+
+    Returns
+    -------
+    list of (Document, float)
+        The merged chunks.
+    """
+    with_span = []
+    merged = []
+    for document, score in documents:
+        span = _document_span(document)
+        if span is None:
+            merged.append((document, score))
+        else:
+            with_span.append((_parent_key(document), span, document, score))
+
+    with_span.sort(key=lambda item: (item[0] is None, item[0] or ("", ""), item[1]))
+    current = None
+    for parent, (start, end), document, score in with_span:
+        # Offsets of chunks without a source may come from different documents, never merge them
+        if current and parent is not None and current[0] == parent and start <= current[2]:
+            text = current[3].page_content
+            overlap = current[2] - start
+            if end > current[2]:
+                text = text + document.page_content[overlap:]
+            metadata = {**current[3].metadata, "end": max(end, current[2])}
+            current = (parent, current[1], max(end, current[2]), Document(page_content=text, metadata=metadata),
+                       max(score, current[4]))
+            continue
+        if current:
+            merged.append((current[3], current[4]))
+        current = (parent, start, end, document, score)
+    if current:
+        merged.append((current[3], current[4]))
+
+    # Chunks without offsets: merge on repeated text within the same known source and page
+    result = []
+    for document, score in merged:
+        parent = _parent_key(document)
+        if _document_span(document) or parent is None:
+            result.append((document, score))
+            continue
+        for i, (kept, kept_score) in enumerate(result):
+            if _parent_key(kept) != parent or _document_span(kept):
+                continue
+            overlap = _text_overlap(kept.page_content, document.page_content, min_overlap)
+            if overlap:
+                result[i] = (Document(page_content=kept.page_content + document.page_content[overlap:],
+                                      metadata=kept.metadata), max(score, kept_score))
+                break
+            overlap = _text_overlap(document.page_content, kept.page_content, min_overlap)
+            if overlap:
+                result[i] = (Document(page_content=document.page_content + kept.page_content[overlap:],
+                                      metadata=kept.metadata), max(score, kept_score))
+                break
+        else:
+            result.append((document, score))
+    return result
+
+
+def trim_messages(
+    messages: Sequence[BaseMessage],
+    max_tokens: int,
+    documents: Sequence[Union[Document, Tuple[Document, float]]] = None,
+    context_share: float = 0.5,
+    higher_score_is_better: bool = True,
+    encoding_name: str = "cl100k_base",
+    min_overlap: int = 20,
+) -> Tuple[List[BaseMessage], List[Document]]:
+    """
+    Fit chat history and retrieved context into a token budget.
+
+    Leading system messages and the newest turn are always kept. Retrieved
+    chunks are merged when they overlap and taken best score first, up to
+    `context_share` of the budget; older turns then fill what is left,
+    newest first, and any budget the history leaves unused goes back to the
+    remaining chunks.
+
+    Parameters
+    ----------
+    messages : sequence of BaseMessage
+        The chat history, oldest first, e.g. from `load_chat_history`.
+    max_tokens : int
+        The total budget for history and context.
+    documents : sequence of Document or (Document, score), optional
+        Retrieved chunks. Without scores the retrieval order is used as rank.
+    context_share : float, optional
+        Part of the budget reserved for chunks before history is added. Defaults to 0.5.
+    higher_score_is_better : bool, optional
+        Set to False for distance scores such as FAISS L2. Defaults to True.
+    encoding_name : str, optional
+        The tiktoken encoding used for counting. Defaults to "cl100k_base".
+    min_overlap : int, optional
+        Minimum repeated characters to merge chunks without offsets. Defaults to 20.
+
+    Returns
+    -------
+    tuple of (list of BaseMessage, list of Document)
+        The kept history in its original order and the kept chunks, best first.
+    """
+    if not isinstance(max_tokens, int) or max_tokens <= 0:
+        raise ValueError("max_tokens must be a positive integer")
+
+    if not 0 <= context_share <= 1:
+        raise ValueError("context_share must be between 0 and 1")
+
+    scored = []
+    for rank, item in enumerate(documents or []):
+        if isinstance(item, Document):
+            document, score = item, -rank
+        else:
+            document, score = item
+            score = score if higher_score_is_better else -score
+        scored.append((document, score))
+    scored = merge_overlapping_chunks(scored, min_overlap=min_overlap)
+    scored.sort(key=lambda item: item[1], reverse=True)
+    costs = [token_counter(document, encoding_name) for document, _ in scored]
+
+    system, turns = _split_turns(messages)
+    used = token_counter(system, encoding_name)
+    kept_turns = []
+    if turns:
+        # The newest turn is what the user is talking about, keep it whatever the budget
+        kept_turns.append(turns[-1])
+        used += token_counter(turns[-1], encoding_name)
 
+    kept_documents = set()
+    context_budget = int(max_tokens * context_share)
+    context_used = 0
+    for i, cost in enumerate(costs):
+        if context_used + cost <= context_budget and used + cost <= max_tokens:
+            kept_documents.add(i)
+            context_used += cost
+            used += cost
 
-def token_counter():
-    pass
+    for turn in reversed(turns[:-1]):
+        cost = token_counter(turn, encoding_name)
+        if used + cost > max_tokens:
+            break
+        kept_turns.append(turn)
+        used += cost
 
+    for i, cost in enumerate(costs):
+        if i not in kept_documents and used + cost <= max_tokens:
+            kept_documents.add(i)
+            used += cost
 
-def trim_messages():
-    pass
+    history = list(system)
+    for turn in reversed(kept_turns):
+        history.extend(turn)
+    return history, [scored[i][0] for i in sorted(kept_documents)]
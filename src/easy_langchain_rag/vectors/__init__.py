@@ -1,41 +1,106 @@
 import os
 import logging
 from pathlib import Path
-from typing_extensions import Type, List, Union
+from typing_extensions import Iterator, Type, List, Tuple, Union
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_core.language_models import BaseLLM, BaseChatModel
 from langchain_core.vectorstores import VectorStoreRetriever
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 from langchain.retrievers.document_compressors import LLMChainFilter, LLMChainExtractor, EmbeddingsFilter
 from langchain.retrievers import ContextualCompressionRetriever
+from ..instrumentation import instrumentation
+from ..document_processor.chunk_store import ChunkStore
+from ..embeddings import EmbeddingBackend, is_embedding_backend, validate_embeddings
+from .sparse import SparseIndex
+from .hybrid import HybridRetriever
+from .rerank import CrossEncoderScorer, PairScoreCache, PairScorer, RerankRetriever
+from .snapshots import SnapshotStore, VectorStoreHandle, resolve_index_path
+
+
+def iter_docstore(vector_store: FAISS) -> Iterator[Tuple[str, Document]]:
+    """
+    Yield the (id, document) pairs of a FAISS vector store in index order.
+
+    Goes through the public `index_to_docstore_id` mapping and `docstore.search`
+    rather than the docstore's private dict, so callers do not depend on how
+    langchain stores documents.
+    """
+    for doc_id in list(vector_store.index_to_docstore_id.values()):
+        document = vector_store.docstore.search(doc_id)
+        if isinstance(document, Document):
+            yield doc_id, document
+
+
+def instrument_vector_store(vector_store: FAISS) -> FAISS:
+    """
+    Time query embedding and FAISS search on a loaded vector store.
+
+    Query embedding goes through `_embed_query`, or `_aembed_query` for the
+    async methods. Similarity searches go through
+    `similarity_search_with_score_by_vector` and MMR searches through
+    `max_marginal_relevance_search_with_score_by_vector`, which queries the
+    index itself; the async searches run those two in an executor. Wrapping
+    these four on the instance covers retrievers built from it as well.
+
+    Returns:
+        FAISS: The same vector store.
+    """
+    if getattr(vector_store, "_instrumented", False):
+        return vector_store
+    stages = {
+        "_embed_query": "embed_query",
+        "_aembed_query": "embed_query",
+        "similarity_search_with_score_by_vector": "faiss_search",
+        "max_marginal_relevance_search_with_score_by_vector": "faiss_search",
+    }
+    for method, stage in stages.items():
+        if hasattr(vector_store, method):
+            setattr(vector_store, method, instrumentation.timed(stage)(getattr(vector_store, method)))
+    vector_store._instrumented = True
+    return vector_store
 
 
 class VectorStoreActions:
+    # Chunks of a ChunkStore embedded per call
+    EMBED_BATCH_SIZE = 1024
+
     def __init__(self,
                  vector_store: Type[FAISS] = FAISS,
                  vector_store_location: str = None,
-                 embedding_model: Type[HuggingFaceEmbeddings] = HuggingFaceEmbeddings,
+                 embedding_model: Union[Type[Embeddings], EmbeddingBackend] = HuggingFaceEmbeddings,
                  embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
                  save_location: str = None,
-                 chunks: List[Document] = None):
+                 chunks: Union[List[Document], ChunkStore] = None,
+                 embeddings: EmbeddingBackend = None,
+                 build_sparse_index: bool = True):
         """
         Initialize a VectrorStoreActions object.
 
         Args:
             vector_store (Type[FAISS]): The vector store to use.
             vector_store_location (str, optional): The location of the existing vector store to load. Defaults to None.
-            embedding_model (Type[HuggingFaceEmbeddings], optional): The embedding model to use. Defaults to HuggingFaceEmbeddings.
+            embedding_model (Union[Type[Embeddings], EmbeddingBackend], optional): The embedding model class, instantiated
+                with embedding_model_name, or an already built backend such as OnnxEmbeddings or
+                ProcessPoolEmbeddings. Defaults to HuggingFaceEmbeddings.
             embedding_model_name (str, optional): The name of the embedding model to use. Defaults to None.
             save_location (str, optional): The location to save the vector store. Defaults to None.
-            chunks (List[Document], optional): The chunks to use when creating the vector store. Defaults to None.
+            chunks (Union[List[Document], ChunkStore], optional): The chunks to use when creating the vector store.
+                A ChunkStore is embedded batch by batch without building chunk Documents. Defaults to None.
+            embeddings (EmbeddingBackend, optional): An already built embeddings instance to use instead of
+                instantiating embedding_model with embedding_model_name. Defaults to None.
+            build_sparse_index (bool, optional): Build a BM25 index next to the FAISS index when saving,
+                used by load_hybrid_retriever. Defaults to True.
         """
         # Validation checks
         if not vector_store:
             raise ValueError("vector_store must of FAISS type.")
         
-        if not embedding_model or embedding_model != HuggingFaceEmbeddings:
-            raise ValueError(f"embedding_model must be of HuggingFaceEmbeddings instance. {embedding_model}: {type(embedding_model)}")
+        if not embedding_model or not (isinstance(embedding_model, type) or is_embedding_backend(embedding_model)):
+            raise ValueError(f"embedding_model must be an embeddings class or an EmbeddingBackend instance. {embedding_model}: {type(embedding_model)}")
+
+        validate_embeddings(embeddings)
         
         if not isinstance(embedding_model_name, str) or not embedding_model_name:
             raise ValueError("embedding_model_name must be a non-empty string.")
@@ -59,10 +124,10 @@ class VectorStoreActions:
             if path.stat().st_size == 0:
                 raise ValueError("vector_store_location directory is empty.")
                 
-        if not vector_store_location and (not chunks or not isinstance(chunks, list)):
-            raise ValueError("chunks must be a list of Document objects or None.")
+        if not vector_store_location and (not chunks or not isinstance(chunks, (list, ChunkStore))):
+            raise ValueError("chunks must be a list of Document objects, a ChunkStore or None.")
         
-        if not chunks or not all(isinstance(doc, Document) for doc in chunks):
+        if not chunks or (not isinstance(chunks, ChunkStore) and not all(isinstance(doc, Document) for doc in chunks)):
             raise ValueError("All items in chunks must be instances of Document.")
         
         self.vector_store = vector_store
@@ -71,12 +136,19 @@ class VectorStoreActions:
         self.embedding_model_name = embedding_model_name
         self.save_location = save_location
         self.chunks = chunks
-        self.embeddings = self.embedding_model(model_name=self.embedding_model_name)
+        self.build_sparse_index = build_sparse_index
+        if embeddings is not None:
+            self.embeddings = embeddings
+        elif is_embedding_backend(embedding_model):
+            self.embeddings = embedding_model
+        else:
+            self.embeddings = self.embedding_model(model_name=self.embedding_model_name)
 
     def _save_vector_store(self):
         """
         Save the vector store to a local directory.
-        The directory is created if it does not exist.
+        The directory is created if it does not exist, and the index is written as
+        its first published version.
 
         Raises:
             Exception: If any error occurs.
@@ -97,14 +169,57 @@ class VectorStoreActions:
             path.mkdir(parents=True, exist_ok=True)
             
             logging.info(f"Saving to embeddings: {path}")
-            vector_store = self.vector_store.from_documents(self.chunks, self.embeddings)
-            vector_store.save_local(folder_path=path)
+            SnapshotStore(path).write(self._write_index)
+        except Exception:
+            raise
+
+    def publish_vector_store(self, location: str = None) -> Path:
+        """
+        Embed the chunks into a new version of an existing index directory and publish it.
+
+        Readers using a handle from `load_vector_store_handle` swap to the new
+        version without a restart; until it is published they keep the old one.
+
+        Args:
+            location (str, optional): The index directory. Defaults to vector_store_location or save_location.
+
+        Returns:
+            Path: The directory of the published version.
+        """
+        location = location or self.vector_store_location or self.save_location
+        if not self.chunks:
+            raise Exception("chunks are required to publish a vector store.")
+        return SnapshotStore(Path(os.getcwd())/location).write(self._write_index)
+
+    def _write_index(self, path: Path):
+        """Embed the chunks and write the FAISS (and sparse) index files into `path`."""
+        try:
+            with instrumentation.span("embed", chunks=len(self.chunks)):
+                if isinstance(self.chunks, ChunkStore):
+                    vector_store = None
+                    for texts, metadatas in self.chunks.batches(self.EMBED_BATCH_SIZE):
+                        if vector_store is None:
+                            vector_store = self.vector_store.from_texts(texts, self.embeddings, metadatas=metadatas)
+                        else:
+                            vector_store.add_texts(texts, metadatas=metadatas)
+                else:
+                    vector_store = self.vector_store.from_documents(self.chunks, self.embeddings)
+            instrumentation.increment("chunks_embedded", len(self.chunks))
+            with instrumentation.span("index_save"):
+                vector_store.save_local(folder_path=path)
+
+            if self.build_sparse_index:
+                with instrumentation.span("sparse_index"):
+                    ids = [vector_store.index_to_docstore_id[i] for i in range(len(vector_store.index_to_docstore_id))]
+                    texts = self.chunks.texts() if isinstance(self.chunks, ChunkStore) else (chunk.page_content for chunk in self.chunks)
+                    sparse_index = SparseIndex.from_texts(ids, texts)
+                    sparse_index.save(path)
         except Exception:
             raise
     
     def _load_existing_vector_store(self, location=None) -> FAISS:
         """
-        Load an existing vector store.
+        Load an existing vector store, from its published version if it is versioned.
 
         Args:
             location (str, optional): The location of the vector store to load. Defaults to None.
@@ -121,8 +236,9 @@ class VectorStoreActions:
             location = self.vector_store_location or self.save_location # To alow both because might still be using save_location
 
         try:
-            vectorstore = self.vector_store.load_local(folder_path=location, embeddings=self.embeddings, allow_dangerous_deserialization=True)
-            return vectorstore
+            with instrumentation.span("index_load"):
+                vectorstore = self.vector_store.load_local(folder_path=resolve_index_path(location), embeddings=self.embeddings, allow_dangerous_deserialization=True)
+            return instrument_vector_store(vectorstore)
         except Exception:
             raise
 
@@ -158,6 +274,26 @@ class VectorStoreActions:
         
         return vectorstore
     
+    def load_vector_store_handle(self, check_interval: float = 1.0) -> VectorStoreHandle:
+        """
+        Load the vector store behind a handle that follows newly published versions.
+
+        Call `handle.get()` (or use `handle.as_retriever()`) once per request: a
+        version published by `publish_vector_store` or
+        `EmbeddingStoreManager.save_updated_vector_store` is swapped in between
+        requests without a restart and without read locks.
+
+        Args:
+            check_interval (float, optional): Seconds between checks for a new version. Defaults to 1.0.
+
+        Returns:
+            VectorStoreHandle: The handle.
+        """
+        location = self.vector_store_location or self.save_location
+        if not self.vector_store_location and not (Path(os.getcwd())/location).exists():
+            self._save_vector_store()
+        return VectorStoreHandle(location, self._load_existing_vector_store, check_interval=check_interval)
+
     def load_vector_store_compressor(
         self,
         llm: Type[Union[BaseChatModel, BaseLLM]],
@@ -184,3 +320,79 @@ class VectorStoreActions:
         compression_retriever = ContextualCompressionRetriever(base_compressor=compressor, base_retriever=retriever)
 
         return compression_retriever
+
+    def load_sparse_index(self, location=None) -> SparseIndex:
+        """
+        Load the BM25 index saved next to the vector store.
+
+        Args:
+            location (str, optional): The vector store directory. Defaults to vector_store_location or save_location.
+
+        Returns:
+            SparseIndex: The sparse index, or None if the vector store was saved without one.
+        """
+        location = location or self.vector_store_location or self.save_location
+        return SparseIndex.load(resolve_index_path(location))
+
+    def load_hybrid_retriever(self, k: int = 4, fetch_k: int = 20, rrf_k: int = 60) -> HybridRetriever:
+        """
+        Create a retriever fusing BM25 and vector search rankings.
+
+        Args:
+            k (int, optional): Number of documents returned. Defaults to 4.
+            fetch_k (int, optional): Number of candidates taken from each ranking. Defaults to 20.
+            rrf_k (int, optional): Reciprocal rank fusion constant. Defaults to 60.
+
+        Returns:
+            HybridRetriever: The hybrid retriever.
+        """
+        vector_store = self.load_vector_store()
+        if not vector_store:
+            raise Exception("Vector store could not be loaded.")
+
+        sparse_index = self.load_sparse_index()
+        if sparse_index is None:
+            raise Exception("No sparse index found next to the vector store. Rebuild it with build_sparse_index=True.")
+
+        return HybridRetriever(vector_store=vector_store, sparse_index=sparse_index, k=k, fetch_k=fetch_k, rrf_k=rrf_k)
+
+    def load_rerank_retriever(
+        self,
+        scorer: PairScorer = None,
+        k: int = 4,
+        fetch_k: int = 20,
+        latency_budget: float = 0.1,
+        batch_size: int = 32,
+        cache_size: int = 100000,
+    ) -> RerankRetriever:
+        """
+        Create a two-stage retriever that reranks FAISS candidates with a pair scorer.
+
+        A cheaper alternative to `load_vector_store_compressor`: one batched
+        scoring pass on CPU instead of one LLM call per document.
+
+        Args:
+            scorer (PairScorer, optional): Scores (query, passages) pairs. Defaults to a CrossEncoderScorer.
+            k (int, optional): Number of documents returned. Defaults to 4.
+            fetch_k (int, optional): Number of candidates taken from FAISS. Defaults to 20.
+            latency_budget (float, optional): Seconds per request before falling back to vector order.
+                Defaults to 0.1; None disables the budget.
+            batch_size (int, optional): Pairs scored per call. Defaults to 32.
+            cache_size (int, optional): Pair scores kept in the LRU cache; 0 disables it. Defaults to 100000.
+
+        Returns:
+            RerankRetriever: The reranking retriever.
+        """
+        vector_store = self.load_vector_store()
+        if not vector_store:
+            raise Exception("Vector store could not be loaded.")
+
+        return RerankRetriever(
+            vector_store=vector_store,
+            scorer=scorer or CrossEncoderScorer(batch_size=batch_size),
+            k=k,
+            fetch_k=fetch_k,
+            batch_size=batch_size,
+            latency_budget=latency_budget,
+            cache=PairScoreCache(cache_size) if cache_size else None,
+        )
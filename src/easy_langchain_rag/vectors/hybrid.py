@@ -0,0 +1,77 @@
+from pydantic import ConfigDict
+from typing_extensions import Dict, List
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores import FAISS
+from ..instrumentation import instrumentation
+from .sparse import SparseIndex
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], weights: List[float] = None, k: int = 60) -> Dict[str, float]:
+    """
+    Fuse several rankings of document ids with reciprocal rank fusion.
+
+    Args:
+        rankings (List[List[str]]): Document ids, best first, one list per retriever.
+        weights (List[float], optional): Weight of each ranking. Defaults to 1 for all.
+        k (int, optional): Damping constant; larger values flatten the rank curve. Defaults to 60.
+
+    Returns:
+        Dict[str, float]: The fused score of every document id.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank + 1)
+    return scores
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing BM25 and FAISS rankings with reciprocal rank fusion.
+
+    Exact terms such as codes, ids and names are found by the sparse index even
+    when their embedding is not distinctive, so a small `k` is enough.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: FAISS
+    sparse_index: SparseIndex
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    sparse_weight: float = 1.0
+    dense_weight: float = 1.0
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        with instrumentation.span("dense_search"):
+            dense = self.vector_store.similarity_search_with_score(query, k=self.fetch_k)
+        with instrumentation.span("sparse_search"):
+            sparse = self.sparse_index.search(query, k=self.fetch_k)
+
+        documents: Dict[str, Document] = {}
+        dense_ranking = []
+        for document, _ in dense:
+            if document.id:
+                documents[document.id] = document
+                dense_ranking.append(document.id)
+        sparse_ranking = [doc_id for doc_id, _ in sparse]
+
+        scores = reciprocal_rank_fusion(
+            [dense_ranking, sparse_ranking], [self.dense_weight, self.sparse_weight], k=self.rrf_k)
+        best = sorted(scores, key=scores.get, reverse=True)[:self.k]
+
+        results = []
+        for doc_id in best:
+            document = documents.get(doc_id) or self.vector_store.docstore.search(doc_id)
+            if not isinstance(document, Document):
+                continue
+            results.append(Document(
+                id=doc_id,
+                page_content=document.page_content,
+                metadata={**document.metadata, "rrf_score": scores[doc_id]},
+            ))
+        return results
@@ -0,0 +1,212 @@
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pydantic import ConfigDict, PrivateAttr
+from typing_extensions import Callable, Dict, List, Optional, Sequence, Tuple
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_community.vectorstores import FAISS
+from ..instrumentation import instrumentation
+
+
+# Scores a batch of (query, passage) pairs, higher is more relevant
+PairScorer = Callable[[str, Sequence[str]], Sequence[float]]
+
+
+class CrossEncoderScorer:
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", batch_size: int = 32,
+                 max_length: int = 512, device: str = "cpu"):
+        """
+        Pair scorer backed by a sentence-transformers cross-encoder.
+
+        The model is loaded on first use. Pairs are scored in batches of
+        `batch_size`, which keeps CPU inference efficient without one call per
+        passage.
+
+        Args:
+            model_name (str, optional): The cross-encoder to load. Defaults to "cross-encoder/ms-marco-MiniLM-L-6-v2".
+            batch_size (int, optional): Pairs per forward pass. Defaults to 32.
+            max_length (int, optional): Maximum tokens of a pair. Defaults to 512.
+            device (str, optional): Torch device. Defaults to "cpu".
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.device = device
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, max_length=self.max_length, device=self.device)
+        return self._model
+
+    def __call__(self, query: str, texts: Sequence[str]) -> List[float]:
+        if not texts:
+            return []
+        scores = self.model.predict([(query, text) for text in texts], batch_size=self.batch_size,
+                                    show_progress_bar=False)
+        return [float(score) for score in scores]
+
+
+class PairScoreCache:
+    def __init__(self, max_entries: int = 100000):
+        """
+        LRU cache of (query, passage) scores.
+
+        Keys are digests of the pair, so memory per entry stays small whatever
+        the passage length.
+
+        Args:
+            max_entries (int, optional): Least recently used pairs are evicted beyond this. Defaults to 100000.
+        """
+        if not isinstance(max_entries, int) or max_entries < 1:
+            raise ValueError("max_entries must be a positive integer")
+
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._scores: "OrderedDict[bytes, float]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    @staticmethod
+    def key(query: str, text: str) -> bytes:
+        return hashlib.blake2b(f"{query}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[float]]:
+        with self._lock:
+            scores = []
+            for key in keys:
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                scores.append(score)
+            hits = sum(score is not None for score in scores)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(keys) - hits
+        return scores
+
+    def put_many(self, items: Sequence[Tuple[bytes, float]]) -> None:
+        with self._lock:
+            for key, score in items:
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scores.clear()
+
+
+class RerankRetriever(BaseRetriever):
+    """
+    Two-stage retriever: over-fetch candidates from FAISS, then rerank them with a pair scorer.
+
+    Candidates are scored in batches and cached by pair. Reranking must fit
+    in `latency_budget` seconds counted from the start of the request: it is
+    skipped when the measured cost per pair predicts an overrun, and abandoned
+    between batches once the budget is spent. Either way the top `k` in vector
+    order are returned, so a slow scorer costs at most the budget. Scores
+    computed before giving up are still cached for the next request, and a
+    request is let through now and then to refresh a stale cost estimate,
+    e.g. one inflated by loading the model.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: FAISS
+    scorer: Callable
+    k: int = 4
+    fetch_k: int = 20
+    batch_size: int = 32
+    latency_budget: Optional[float] = 0.1
+    cache: Optional[PairScoreCache] = None
+    # Weight of the latest request in the moving average of the cost per pair
+    cost_smoothing: float = 0.2
+    # After this many skips in a row, rerank anyway to refresh a stale cost estimate
+    probe_every: int = 50
+
+    _seconds_per_pair: Optional[float] = PrivateAttr(default=None)
+    _skipped_in_row: int = PrivateAttr(default=0)
+    _stats: Dict[str, int] = PrivateAttr(default_factory=lambda: {"reranked": 0, "skipped": 0, "abandoned": 0})
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self._stats
+
+    def _count(self, stat: str):
+        self._stats[stat] += 1
+        instrumentation.increment(f"rerank_{stat}")
+
+    def _score(self, query: str, texts: List[str], deadline: Optional[float]) -> Optional[List[float]]:
+        """Scores of every text, or None if the deadline is or would be missed."""
+        keys = [PairScoreCache.key(query, text) for text in texts] if self.cache is not None else None
+        scores = self.cache.get_many(keys) if keys else [None] * len(texts)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if not missing:
+            return scores
+
+        if deadline is not None and self._seconds_per_pair is not None and self._skipped_in_row < self.probe_every:
+            if time.perf_counter() + self._seconds_per_pair * len(missing) > deadline:
+                self._skipped_in_row += 1
+                self._count("skipped")
+                return None
+        if self._skipped_in_row >= self.probe_every:
+            # Probe: measure afresh instead of averaging with the stale estimate
+            self._seconds_per_pair = None
+        self._skipped_in_row = 0
+
+        for offset in range(0, len(missing), self.batch_size):
+            batch = missing[offset:offset + self.batch_size]
+            start = time.perf_counter()
+            batch_scores = self.scorer(query, [texts[i] for i in batch])
+            elapsed = time.perf_counter() - start
+            cost = elapsed / len(batch)
+            self._seconds_per_pair = cost if self._seconds_per_pair is None else \
+                (1 - self.cost_smoothing) * self._seconds_per_pair + self.cost_smoothing * cost
+            for i, score in zip(batch, batch_scores):
+                scores[i] = float(score)
+            if keys:
+                self.cache.put_many([(keys[i], scores[i]) for i in batch])
+            if deadline is not None and offset + self.batch_size < len(missing) and time.perf_counter() > deadline:
+                self._count("abandoned")
+                return None
+        return scores
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        start = time.perf_counter()
+        deadline = start + self.latency_budget if self.latency_budget is not None else None
+
+        with instrumentation.span("dense_search"):
+            candidates = [document for document, _ in
+                          self.vector_store.similarity_search_with_score(query, k=max(self.fetch_k, self.k))]
+        if len(candidates) <= 1:
+            return candidates[:self.k]
+
+        with instrumentation.span("rerank", candidates=len(candidates)):
+            scores = self._score(query, [document.page_content for document in candidates], deadline)
+
+        if scores is None:
+            logging.debug(f"Rerank over budget after {time.perf_counter() - start:.3f}s, using vector order")
+            return candidates[:self.k]
+
+        self._count("reranked")
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)[:self.k]
+        return [
+            Document(
+                id=candidates[i].id,
+                page_content=candidates[i].page_content,
+                metadata={**candidates[i].metadata, "rerank_score": scores[i]},
+            )
+            for i in order
+        ]
@@ -0,0 +1,269 @@
+import os
+import time
+import uuid
+import shutil
+import logging
+import threading
+from pathlib import Path
+from pydantic import ConfigDict
+from typing_extensions import Any, Callable, Dict, List, Optional, Tuple
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from ..instrumentation import instrumentation
+
+
+POINTER_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+_STAGING_PREFIX = ".staging-"
+
+
+class SnapshotStore:
+    def __init__(self, root: str, keep: int = 2, stale_staging_after: float = 3600.0):
+        """
+        Versioned index directories published with an atomic pointer swap.
+
+        Every save goes into a fresh `versions/<version>` directory under `root`;
+        once fully written, the `CURRENT` file is replaced with `os.replace`, so a
+        reader sees either the previous or the new version and never a partially
+        written index. A root without `CURRENT` is a plain, unversioned index
+        directory and resolves to itself.
+
+        Args:
+            root (str): The index directory.
+            keep (int, optional): Number of versions kept by `gc`, the current one included. Defaults to 2.
+            stale_staging_after (float, optional): Seconds after which an unpublished staging
+                directory left by a crashed writer is removed by `gc`. Defaults to 3600.
+        """
+        if not isinstance(keep, int) or keep < 1:
+            raise ValueError("keep must be a positive integer")
+
+        self.root = Path(root)
+        self.keep = keep
+        self.stale_staging_after = stale_staging_after
+
+    @property
+    def versions_path(self) -> Path:
+        return self.root / VERSIONS_DIR
+
+    def current_version(self) -> Optional[str]:
+        """Return the published version, or None for an unversioned directory."""
+        try:
+            version = (self.root / POINTER_FILE).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def path_of(self, version: Optional[str]) -> Path:
+        """Return the directory of a version; None is the unversioned root."""
+        return self.versions_path / version if version else self.root
+
+    def current_path(self) -> Path:
+        """Return the directory holding the published index files."""
+        return self.path_of(self.current_version())
+
+    def versions(self) -> List[str]:
+        """Return the published versions on disk, oldest first."""
+        if not self.versions_path.exists():
+            return []
+        return sorted(p.name for p in self.versions_path.iterdir() if p.is_dir() and not p.name.startswith(_STAGING_PREFIX))
+
+    def stage(self) -> Tuple[str, Path]:
+        """
+        Create an empty staging directory for a new version.
+
+        Returns:
+            Tuple[str, Path]: The version name and the directory to write the index into.
+        """
+        # Sortable by creation time; the suffix keeps concurrent writers apart
+        version = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        path = self.versions_path / f"{_STAGING_PREFIX}{version}"
+        path.mkdir(parents=True)
+        return version, path
+
+    def publish(self, version: str, staging_path: Path) -> Path:
+        """
+        Move a fully written staging directory into place and point `CURRENT` at it.
+
+        Returns:
+            Path: The directory of the published version.
+        """
+        with instrumentation.span("index_publish"):
+            final_path = self.versions_path / version
+            os.replace(staging_path, final_path)
+            pointer_tmp = self.root / f"{POINTER_FILE}.{uuid.uuid4().hex}.tmp"
+            with open(pointer_tmp, "w", encoding="utf-8") as f:
+                f.write(version)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(pointer_tmp, self.root / POINTER_FILE)
+        logging.info(f"Published index version {version} in {self.root}")
+        return final_path
+
+    def write(self, writer: Callable[[Path], None]) -> Path:
+        """
+        Write a new version with `writer(path)` and publish it.
+
+        The staging directory is removed if the writer fails, leaving the
+        published version untouched. Older versions are garbage-collected.
+
+        Returns:
+            Path: The directory of the published version.
+        """
+        version, staging_path = self.stage()
+        try:
+            writer(staging_path)
+        except Exception:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+        final_path = self.publish(version, staging_path)
+        self.gc()
+        return final_path
+
+    def gc(self) -> List[str]:
+        """
+        Remove all but the `keep` newest versions, never the current one.
+
+        Readers load an index fully into memory, so a version can go as soon as
+        no reader is about to open it; keeping more than one covers readers
+        that resolved the pointer just before a swap.
+
+        Returns:
+            List[str]: The removed versions.
+        """
+        current = self.current_version()
+        versions = self.versions()
+        keep = set(versions[-self.keep:])
+        if current:
+            keep.add(current)
+
+        removed = []
+        for version in versions:
+            if version not in keep:
+                shutil.rmtree(self.versions_path / version, ignore_errors=True)
+                removed.append(version)
+
+        if self.versions_path.exists():
+            now = time.time()
+            for path in self.versions_path.iterdir():
+                if path.name.startswith(_STAGING_PREFIX) and now - path.stat().st_mtime > self.stale_staging_after:
+                    shutil.rmtree(path, ignore_errors=True)
+
+        if removed:
+            logging.info(f"Removed index versions {removed} from {self.root}")
+        return removed
+
+
+def resolve_index_path(path: str) -> str:
+    """Return the directory holding the current index files of a versioned or plain index directory."""
+    return str(SnapshotStore(path).current_path())
+
+
+class VectorStoreHandle:
+    def __init__(self, location: str, loader: Callable[[str], Any], check_interval: Optional[float] = 1.0):
+        """
+        Reader handle that follows the published version of an index.
+
+        `get()` returns the loaded index. At most every `check_interval` seconds
+        it reads the `CURRENT` pointer; when a new version is published, the one
+        caller that wins a non-blocking lock loads it and swaps it in while every
+        other caller keeps using the previous index. The swap is a single
+        attribute assignment, so the hot path takes no lock.
+
+        Args:
+            location (str): The index directory.
+            loader (Callable[[str], Any]): Loads the index from a version directory.
+            check_interval (float, optional): Seconds between pointer checks; None disables
+                checks in `get()`, for use with `watch()` or explicit `refresh()`. Defaults to 1.0.
+        """
+        self.snapshots = SnapshotStore(location)
+        self.loader = loader
+        self.check_interval = check_interval
+        self._reload_lock = threading.Lock()
+        self._next_check = 0.0
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        version = self.snapshots.current_version()
+        # (version, index) swapped as one object so readers never see a mixed pair
+        self._state = (version, self.loader(str(self.snapshots.path_of(version))))
+        if check_interval is not None:
+            self._next_check = time.monotonic() + check_interval
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._state[0]
+
+    def get(self) -> Any:
+        """Return the current index, picking up a newly published version if one is due."""
+        if self.check_interval is not None and time.monotonic() >= self._next_check:
+            self.refresh(blocking=False)
+        return self._state[1]
+
+    def refresh(self, blocking: bool = True) -> bool:
+        """
+        Load the published version if it differs from the loaded one.
+
+        Args:
+            blocking (bool, optional): Wait for a reload running in another thread. Defaults to True.
+
+        Returns:
+            bool: True if a new version was swapped in.
+        """
+        if not self._reload_lock.acquire(blocking=blocking):
+            return False
+        try:
+            if self.check_interval is not None:
+                self._next_check = time.monotonic() + self.check_interval
+            version = self.snapshots.current_version()
+            if version == self._state[0]:
+                return False
+            try:
+                index = self.loader(str(self.snapshots.path_of(version)))
+            except Exception as e:
+                # The previous index keeps serving; the next check retries
+                logging.error(f"Failed to load index version {version}: {e}")
+                return False
+            self._state = (version, index)
+            instrumentation.increment("index_reloads")
+            logging.info(f"Swapped in index version {version}")
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def watch(self, interval: float = 1.0) -> None:
+        """Reload new versions from a background thread, so `get()` never loads."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=run, name="vector-store-handle", daemon=True)
+        self._watcher.start()
+
+    def close(self) -> None:
+        """Stop the background watcher, if any."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def as_retriever(self, **kwargs) -> "SnapshotRetriever":
+        """Retriever that searches whatever version is current at each call; kwargs go to `as_retriever`."""
+        return SnapshotRetriever(handle=self, retriever_kwargs=kwargs)
+
+
+class SnapshotRetriever(BaseRetriever):
+    """Retriever resolving the current vector store of a VectorStoreHandle at every query."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    handle: VectorStoreHandle
+    retriever_kwargs: Dict[str, Any] = {}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        retriever = self.handle.get().as_retriever(**self.retriever_kwargs)
+        return retriever._get_relevant_documents(query, run_manager=run_manager)
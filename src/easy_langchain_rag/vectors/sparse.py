@@ -0,0 +1,196 @@
+import os
+import re
+import math
+import heapq
+import pickle
+import logging
+from array import array
+from pathlib import Path
+from typing_extensions import Dict, Iterable, List, Optional, Tuple
+
+
+# Words, plus codes such as "INV-2024/07" or "v1.2.3" kept whole
+_TOKEN_RE = re.compile(r"\w+(?:[-./:]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms for the sparse index.
+
+    Compound codes are indexed both whole and by their parts, so "INV-2024"
+    matches a query for "INV-2024" exactly and a query for "2024" loosely.
+    """
+    terms = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in re.split(r"[-./:]", token) if part)
+    return terms
+
+
+class SparseIndex:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Compact inverted index scored with BM25.
+
+        Postings are kept as typed arrays of document numbers and term
+        frequencies. Documents can be added and removed incrementally; removed
+        documents are tombstoned and squeezed out by `compact`, which runs on
+        its own once a fifth of the documents are dead.
+
+        Args:
+            k1 (float, optional): BM25 term frequency saturation. Defaults to 1.5.
+            b (float, optional): BM25 length normalization. Defaults to 0.75.
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_ids: List[Optional[str]] = []
+        self._numbers: Dict[str, int] = {}
+        self._lengths = array("I")
+        self._total_length = 0
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._numbers
+
+    @classmethod
+    def from_texts(cls, doc_ids: Iterable[str], texts: Iterable[str], **kwargs) -> "SparseIndex":
+        index = cls(**kwargs)
+        for doc_id, text in zip(doc_ids, texts):
+            index.add(doc_id, text)
+        return index
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index a document, replacing any previous version with the same id."""
+        if doc_id in self._numbers:
+            self.remove(doc_id)
+
+        number = len(self._doc_ids)
+        terms = tokenize(text)
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("I"))
+            postings[0].append(number)
+            postings[1].append(frequency)
+
+        self._doc_ids.append(doc_id)
+        self._numbers[doc_id] = number
+        self._lengths.append(len(terms))
+        self._total_length += len(terms)
+
+    def remove(self, doc_id: str) -> bool:
+        """Tombstone a document. Returns False if it was not indexed."""
+        number = self._numbers.pop(doc_id, None)
+        if number is None:
+            return False
+        self._doc_ids[number] = None
+        self._total_length -= self._lengths[number]
+        self._lengths[number] = 0
+        self._dead += 1
+        if self._dead > 1000 and self._dead * 5 > len(self._doc_ids):
+            self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Rewrite the postings without removed documents."""
+        renumber = {}
+        doc_ids, lengths = [], array("I")
+        for number, doc_id in enumerate(self._doc_ids):
+            if doc_id is not None:
+                renumber[number] = len(doc_ids)
+                doc_ids.append(doc_id)
+                lengths.append(self._lengths[number])
+
+        postings = {}
+        for term, (numbers, frequencies) in self._postings.items():
+            kept_numbers, kept_frequencies = array("I"), array("I")
+            for number, frequency in zip(numbers, frequencies):
+                new_number = renumber.get(number)
+                if new_number is not None:
+                    kept_numbers.append(new_number)
+                    kept_frequencies.append(frequency)
+            if kept_numbers:
+                postings[term] = (kept_numbers, kept_frequencies)
+
+        self._postings = postings
+        self._doc_ids = doc_ids
+        self._numbers = {doc_id: number for number, doc_id in enumerate(doc_ids)}
+        self._lengths = lengths
+        self._dead = 0
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[str, float]]:
+        """
+        Return the `k` best documents for a query.
+
+        Args:
+            query (str): The query text.
+            k (int, optional): Number of results. Defaults to 4.
+
+        Returns:
+            List[Tuple[str, float]]: (document id, BM25 score) pairs, best first.
+        """
+        live = len(self._numbers)
+        if not live:
+            return []
+        average_length = self._total_length / live or 1.0
+        k1, b = self.k1, self.b
+        lengths = self._lengths
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            numbers, frequencies = postings
+            idf = math.log(1 + (live - len(numbers) + 0.5) / (len(numbers) + 0.5))
+            for number, frequency in zip(numbers, frequencies):
+                if self._doc_ids[number] is None:
+                    continue
+                norm = k1 * (1 - b + b * lengths[number] / average_length)
+                scores[number] = scores.get(number, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self._doc_ids[number], score) for number, score in best]
+
+    def save(self, folder_path: str, index_name: str = "index") -> None:
+        """Write the index next to the FAISS files as `<index_name>.sparse`."""
+        if self._dead:
+            self.compact()
+        path = Path(folder_path)
+        path.mkdir(parents=True, exist_ok=True)
+        state = {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_ids": self._doc_ids,
+            "lengths": self._lengths,
+            "postings": self._postings,
+        }
+        tmp_path = path / f"{index_name}.sparse.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path / f"{index_name}.sparse")
+
+    @classmethod
+    def load(cls, folder_path: str, index_name: str = "index") -> Optional["SparseIndex"]:
+        """Load `<index_name>.sparse` from a folder, or return None if there is none."""
+        path = Path(folder_path) / f"{index_name}.sparse"
+        if not path.exists():
+            return None
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        index = cls(k1=state["k1"], b=state["b"])
+        index._doc_ids = state["doc_ids"]
+        index._numbers = {doc_id: number for number, doc_id in enumerate(index._doc_ids) if doc_id is not None}
+        index._lengths = state["lengths"]
+        index._total_length = sum(index._lengths)
+        index._postings = state["postings"]
+        logging.info(f"Loaded sparse index with {len(index)} documents from {path}")
+        return index
@@ -0,0 +1,205 @@
+import os
+import re
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing_extensions import Any, Callable, Dict, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+from ..instrumentation import instrumentation
+from . import instrument_vector_store
+from .snapshots import resolve_index_path
+
+
+_TENANT_RE = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of the files directly inside `path`."""
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class _Load:
+    """A load in progress, shared by every caller asking for the same tenant."""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TenantVectorStoreManager:
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        location_template: str = "indexes/{tenant_id}",
+        memory_budget: int = 2 * 1024 ** 3,
+        loader: Callable[[str], Any] = None,
+        size_of: Callable[[str, Any], int] = None,
+    ):
+        """
+        Per-tenant vector stores loaded on demand and kept in a memory-bounded LRU.
+
+        `get(tenant_id)` returns the tenant's loaded store, loading it on first
+        use. Concurrent first requests for the same tenant wait on a single
+        load. Once the estimated size of the resident stores exceeds
+        `memory_budget`, the least recently used tenants are evicted; the store
+        just loaded is always kept, even if alone it exceeds the budget.
+
+        Args:
+            embeddings (Embeddings): The embedding model shared by all tenants.
+            location_template (str, optional): Index directory of a tenant, relative to the working
+                directory. Defaults to "indexes/{tenant_id}".
+            memory_budget (int, optional): Budget in bytes for the resident stores. Defaults to 2 GiB.
+            loader (Callable[[str], Any], optional): Loads the store of a tenant id. Defaults to
+                loading the FAISS index (its published version if versioned) from location_template.
+            size_of (Callable[[str, Any], int], optional): Estimated memory of a loaded store, given the
+                tenant id and the store. Defaults to the on-disk size of its index files.
+        """
+        if "{tenant_id}" not in location_template:
+            raise ValueError("location_template must contain {tenant_id}")
+
+        if not isinstance(memory_budget, int) or memory_budget <= 0:
+            raise ValueError("memory_budget must be a positive integer")
+
+        self.embeddings = embeddings
+        self.location_template = location_template
+        self.memory_budget = memory_budget
+        self.loader = loader or self._load_faiss
+        self.size_of = size_of or self._index_size
+
+        self._lock = threading.Lock()
+        self._resident: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._loading: Dict[str, _Load] = {}
+        self.resident_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "loads": 0, "load_failures": 0, "evictions": 0}
+
+    def location(self, tenant_id: str) -> str:
+        if not isinstance(tenant_id, str) or not _TENANT_RE.match(tenant_id) or ".." in tenant_id:
+            raise ValueError(f"Invalid tenant_id: {tenant_id!r}")
+        return self.location_template.format(tenant_id=tenant_id)
+
+    def _load_faiss(self, tenant_id: str) -> FAISS:
+        path = Path(os.getcwd())/self.location(tenant_id)
+        if not path.exists():
+            raise ValueError(f"No index for tenant {tenant_id} at {path}")
+        with instrumentation.span("index_load", tenant=tenant_id):
+            vector_store = FAISS.load_local(resolve_index_path(str(path)), self.embeddings, allow_dangerous_deserialization=True)
+        return instrument_vector_store(vector_store)
+
+    def _index_size(self, tenant_id: str, vector_store: Any) -> int:
+        return directory_size(resolve_index_path(str(Path(os.getcwd())/self.location(tenant_id))))
+
+    def _count(self, stat: str, value: int = 1):
+        self.stats[stat] += value
+        instrumentation.increment(f"tenant_{stat}", value)
+
+    def __contains__(self, tenant_id: str) -> bool:
+        return tenant_id in self._resident
+
+    def __len__(self) -> int:
+        return len(self._resident)
+
+    def get(self, tenant_id: str) -> Any:
+        """
+        Return the store of a tenant, loading it if it is not resident.
+
+        Raises:
+            ValueError: If the tenant id is invalid or its index does not exist.
+        """
+        self.location(tenant_id)
+        with self._lock:
+            store = self._resident.get(tenant_id)
+            if store is not None:
+                self._resident.move_to_end(tenant_id)
+                self._count("hits")
+                return store
+            self._count("misses")
+            load = self._loading.get(tenant_id)
+            owner = load is None
+            if owner:
+                load = self._loading[tenant_id] = _Load()
+
+        if not owner:
+            load.done.wait()
+            if load.error is not None:
+                raise load.error
+            return load.value
+
+        try:
+            store = self.loader(tenant_id)
+            size = int(self.size_of(tenant_id, store))
+        except BaseException as e:
+            load.error = e
+            with self._lock:
+                del self._loading[tenant_id]
+            self._count("load_failures")
+            load.done.set()
+            raise
+
+        with self._lock:
+            self._resident[tenant_id] = store
+            self._sizes[tenant_id] = size
+            self.resident_bytes += size
+            del self._loading[tenant_id]
+            self._evict(keep=tenant_id)
+            self._count("loads")
+        load.value = store
+        load.done.set()
+        instrumentation.set_gauge("tenant_resident_bytes", self.resident_bytes)
+        instrumentation.set_gauge("tenant_resident", len(self._resident))
+        return store
+
+    async def aget(self, tenant_id: str) -> Any:
+        """Async version of `get`; loads run in a worker thread."""
+        with self._lock:
+            store = self._resident.get(tenant_id)
+            if store is not None:
+                self._resident.move_to_end(tenant_id)
+                self._count("hits")
+                return store
+        return await asyncio.to_thread(self.get, tenant_id)
+
+    def _evict(self, keep: str = None):
+        """Drop least recently used tenants until the budget is met. Call with the lock held."""
+        while self.resident_bytes > self.memory_budget:
+            victim = next((tenant for tenant in self._resident if tenant != keep), None)
+            if victim is None:
+                break
+            self._remove(victim)
+            self._count("evictions")
+            logging.info(f"Evicted vector store of tenant {victim}")
+
+    def _remove(self, tenant_id: str) -> bool:
+        if self._resident.pop(tenant_id, None) is None:
+            return False
+        self.resident_bytes -= self._sizes.pop(tenant_id, 0)
+        return True
+
+    def evict(self, tenant_id: str) -> bool:
+        """
+        Drop a tenant's store, for example after its index was rebuilt.
+
+        Returns:
+            bool: True if the tenant was resident.
+        """
+        with self._lock:
+            removed = self._remove(tenant_id)
+        instrumentation.set_gauge("tenant_resident_bytes", self.resident_bytes)
+        return removed
+
+    def set_memory_budget(self, memory_budget: int):
+        """Change the budget, evicting tenants right away if it shrank."""
+        if not isinstance(memory_budget, int) or memory_budget <= 0:
+            raise ValueError("memory_budget must be a positive integer")
+        with self._lock:
+            self.memory_budget = memory_budget
+            self._evict()
+
+    def as_retriever(self, tenant_id: str, **kwargs):
+        """Retriever over a tenant's store; kwargs go to `as_retriever`."""
+        return self.get(tenant_id).as_retriever(**kwargs)
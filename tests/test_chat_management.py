@@ -0,0 +1,129 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("langgraph.store.postgres")
+pytest.importorskip("langchain_huggingface")
+
+from typing_extensions import TypedDict
+from langgraph.graph import END, START, StateGraph
+
+from easy_langchain_rag.persistance import decode_cursor, encode_cursor
+from easy_langchain_rag.persistance.chat_management import ChatManagement
+
+
+@pytest.fixture
+def user_id():
+    return str(uuid.uuid4())
+
+
+def all_pages(fetch, limit):
+    items, cursor = [], None
+    while True:
+        page = fetch(limit=limit, cursor=cursor)
+        items.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return items
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+
+    assert decode_cursor(encode_cursor(created_at, "turn_1")) == (created_at, "turn_1")
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_pages_through_turns_newest_first(user_id):
+    chats = ChatManagement()
+    for i in range(7):
+        chats.add_turn(user_id, "thread", f"question {i}", f"answer {i}")
+
+    turns = all_pages(lambda **page: chats.get_turns(user_id, "thread", **page), limit=3)
+
+    assert [turn["query"] for turn in turns] == [f"question {i}" for i in range(6, -1, -1)]
+
+
+def test_pages_through_tied_timestamps(user_id, monkeypatch):
+    chats = ChatManagement()
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    monkeypatch.setattr(chats, "_now", lambda: now)
+    for i in range(5):
+        chats.add_turn(user_id, f"thread {i}", f"question {i}", "answer")
+        chats.add_turn(user_id, "shared", f"question {i}", "answer")
+
+    turns = all_pages(lambda **page: chats.get_turns(user_id, "shared", **page), limit=2)
+    conversations = all_pages(lambda **page: chats.list_conversations(user_id, **page), limit=2)
+
+    assert [turn["query"] for turn in turns] == [f"question {i}" for i in range(4, -1, -1)]
+    assert len({turn["key"] for turn in turns}) == 5
+    assert sorted(conversation["conversation_id"] for conversation in conversations) == sorted(
+        ["shared"] + [f"thread {i}" for i in range(5)])
+
+
+def test_lists_recently_active_conversations_first(user_id):
+    chats = ChatManagement()
+    chats.add_turn(user_id, "first", "hello", "hi")
+    chats.add_turn(user_id, "second", "hello", "hi")
+    chats.add_turn(user_id, "first", "again", "hi")
+
+    page = chats.list_conversations(user_id, limit=10)
+
+    assert [conversation["conversation_id"] for conversation in page.items] == ["first", "second"]
+    assert page.items[0]["turns"] == 2
+    assert page.next_cursor is None
+
+
+def test_rename_conversation(user_id):
+    chats = ChatManagement()
+    chats.add_turn(user_id, "thread", "What is the capital of France?", "Paris.")
+
+    assert chats.list_conversations(user_id).items[0]["title"] == "What is the capital of France?"
+    assert chats.rename_conversation(user_id, "thread", "Geography")
+    assert chats.list_conversations(user_id).items[0]["title"] == "Geography"
+    assert not chats.rename_conversation(user_id, "missing", "Geography")
+    assert not chats.rename_conversation(str(uuid.uuid4()), "thread", "Geography")
+
+
+def test_delete_conversation(user_id):
+    chats = ChatManagement()
+    chats.add_turn(user_id, "kept", "hello", "hi")
+    chats.add_turn(user_id, "deleted", "hello", "hi")
+
+    assert chats.delete_conversation(user_id, "deleted")
+    assert not chats.delete_conversation(user_id, "deleted")
+    assert chats.get_turns(user_id, "deleted").items == []
+    assert [conversation["conversation_id"] for conversation in chats.list_conversations(user_id).items] == ["kept"]
+
+
+def test_rejects_invalid_arguments(user_id):
+    chats = ChatManagement()
+
+    with pytest.raises(ValueError):
+        chats.add_turn("not a uuid", "thread", "hello", "hi")
+    with pytest.raises(ValueError):
+        chats.list_conversations(user_id, limit=0)
+    with pytest.raises(ValueError):
+        chats.get_turns(user_id, "thread", cursor="not a cursor")
+
+
+def test_wrapped_node_records_turns_under_the_thread_id(user_id):
+    class State(TypedDict):
+        question: str
+        answer: str
+
+    chats = ChatManagement()
+    builder = StateGraph(State)
+    builder.add_node("generate", chats.wrap_node(lambda state: {"answer": f"echo {state['question']}"}))
+    builder.add_edge(START, "generate")
+    builder.add_edge("generate", END)
+    graph = builder.compile()
+
+    graph.invoke({"question": "hello"}, {"configurable": {"thread_id": "thread", "user_id": user_id}})
+    graph.invoke({"question": "again"}, {"configurable": {"thread_id": "thread", "user_id": user_id}})
+    graph.invoke({"question": "anonymous"}, {"configurable": {"thread_id": "thread"}})
+
+    turns = chats.get_turns(user_id, "thread").items
+    assert [(turn["query"], turn["bot"]) for turn in turns] == [("again", "echo again"), ("hello", "echo hello")]
@@ -0,0 +1,108 @@
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("langgraph.checkpoint.postgres")
+pytest.importorskip("langgraph.checkpoint.redis")
+
+from typing_extensions import Annotated, List, TypedDict
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from easy_langchain_rag.graph.checkpointer import CHECKPOINT_POLICIES, DELTA_MARKER, PolicyCheckpointSaver
+
+
+class State(TypedDict):
+    question: str
+    messages: Annotated[List[AnyMessage], add_messages]
+
+
+def build_graph(checkpointer):
+    def ask(state):
+        return {"messages": [HumanMessage(state["question"])]}
+
+    def think(state):
+        return {"messages": [AIMessage(f"thinking about {state['question']}")]}
+
+    def answer(state):
+        return {"messages": [AIMessage(f"answer to {state['question']}")]}
+
+    builder = StateGraph(State)
+    builder.add_node("ask", ask)
+    builder.add_node("think", think)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "ask")
+    builder.add_edge("ask", "think")
+    builder.add_edge("think", "answer")
+    builder.add_edge("answer", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def contents(messages):
+    return [message.content for message in messages]
+
+
+@pytest.mark.parametrize("policy", CHECKPOINT_POLICIES)
+def test_restores_a_thread_from_delta_checkpoints(policy):
+    storage = InMemorySaver()
+    saver = PolicyCheckpointSaver(storage, policy=policy, every=2, snapshot_every=3)
+    config = {"configurable": {"thread_id": "thread"}}
+    graph = build_graph(saver)
+    for question in ["one", "two", "three", "four"]:
+        graph.invoke({"question": question}, config)
+    saver.flush()
+    expected = contents(graph.get_state(config).values["messages"])
+
+    assert len(expected) == 12
+    assert _is_delta_stored(storage, config)
+
+    # A fresh wrapper has no cached lists, so it rebuilds them from the stored deltas
+    restored = build_graph(PolicyCheckpointSaver(storage, policy=policy, every=2, snapshot_every=3))
+    assert contents(restored.get_state(config).values["messages"]) == expected
+
+    restored.invoke({"question": "five"}, config)
+    assert contents(restored.get_state(config).values["messages"]) == expected + [
+        "five", "thinking about five", "answer to five"]
+
+
+def _is_delta_stored(storage, config):
+    return any(
+        isinstance(checkpoint_tuple.checkpoint["channel_values"].get("messages"), dict)
+        and DELTA_MARKER in checkpoint_tuple.checkpoint["channel_values"]["messages"]
+        for checkpoint_tuple in storage.list(config)
+    )
+
+
+@pytest.mark.parametrize("policy", CHECKPOINT_POLICIES)
+def test_accounts_bytes_per_turn(policy):
+    turns = []
+    saver = PolicyCheckpointSaver(InMemorySaver(), policy=policy, every=2,
+                                  on_turn_end=lambda thread_id, stats: turns.append(stats))
+    graph = build_graph(saver)
+    config = {"configurable": {"thread_id": "thread"}}
+    for question in ["one", "two", "three"]:
+        graph.invoke({"question": question}, config)
+
+    assert len(turns) == 3
+    assert all(turn["bytes_written"] > 0 for turn in turns)
+    assert sum(turn["bytes_written"] for turn in turns) == saver.total_bytes_written
+    if policy == "every_step":
+        assert all(turn["checkpoints_skipped"] == 0 for turn in turns)
+    else:
+        assert all(turn["checkpoints_skipped"] > 0 for turn in turns)
+    if policy == "on_end":
+        assert all(turn["checkpoints_written"] == 1 for turn in turns)
+
+
+def test_deltas_write_fewer_bytes_than_full_lists():
+    def bytes_of_last_turn(delta_channels):
+        turns = []
+        saver = PolicyCheckpointSaver(InMemorySaver(), delta_channels=delta_channels,
+                                      on_turn_end=lambda thread_id, stats: turns.append(stats))
+        graph = build_graph(saver)
+        for question in ["one", "two", "three", "four", "five"]:
+            graph.invoke({"question": question}, {"configurable": {"thread_id": "thread"}})
+        return turns[-1]["bytes_written"]
+
+    assert bytes_of_last_turn(("messages",)) < bytes_of_last_turn(())
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("langchain_huggingface")
+huggingface_hub = pytest.importorskip("huggingface_hub")
+
+from benchmarks.parity import run_parity
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# min cosine to the reference vectors, mean share of the reference top-10 neighbours found
+THRESHOLDS = {
+    "onnx_fp32": (0.999, 0.95),
+    "onnx_int8": (0.98, 0.8),
+    "pool": (0.999, 0.95),
+}
+
+
+@pytest.fixture(scope="module")
+def parity(tmp_path_factory):
+    if not isinstance(huggingface_hub.try_to_load_from_cache(MODEL_NAME, "config.json"), str):
+        pytest.skip(f"{MODEL_NAME} is not in the Hugging Face cache")
+    onnx_dir = tmp_path_factory.mktemp("onnx_model")
+    return run_parity(model_name=MODEL_NAME, backends=list(THRESHOLDS), texts=300, onnx_dir=str(onnx_dir),
+                      processes=2)
+
+
+@pytest.mark.parametrize("backend", list(THRESHOLDS))
+def test_backend_matches_the_reference_model(parity, backend):
+    min_cosine, overlap = THRESHOLDS[backend]
+
+    assert parity[backend]["min_cosine"] >= min_cosine
+    assert parity[backend]["neighbour_overlap"] >= overlap
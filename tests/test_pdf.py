@@ -0,0 +1,30 @@
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+pytest.importorskip("langchain_community")
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from easy_langchain_rag.document_processor.pdf import iter_pdf_pages
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    writer = pypdf.PdfWriter()
+    for _ in range(5):
+        writer.add_blank_page(200, 200)
+    writer.add_metadata({"/Title": " Annual report ", "/CreationDate": "D:20240102030405+02'00'"})
+    writer.set_page_label(0, 1, style="/r")
+    writer.set_page_label(2, 4, style="/D", start=1)
+    path = tmp_path / "report.pdf"
+    writer.write(path)
+    return str(path)
+
+
+def test_pages_have_the_loader_metadata(pdf_path):
+    expected = [document.metadata for document in PyPDFLoader(pdf_path).load()]
+
+    pages = [document for batch in iter_pdf_pages(pdf_path, workers=2, pages_per_task=2) for document in batch]
+
+    assert [document.metadata for document in pages] == expected
+    assert [document.metadata["page_label"] for document in pages] == ["i", "ii", "1", "2", "3"]
@@ -0,0 +1,113 @@
+import operator
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+pytest.importorskip("langgraph")
+
+from typing_extensions import Annotated, List, TypedDict
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from easy_langchain_rag.graph.response_cache import SemanticResponseCache
+
+
+class CountingEmbeddings(Embeddings):
+    """Embeds every text to the same vector and counts the calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [1.0, 0.0, 0.0]
+
+
+class State(TypedDict):
+    question: str
+    context: List[Document]
+    answer: str
+    messages: Annotated[List[AnyMessage], add_messages]
+    generations: Annotated[int, operator.add]
+
+
+def build_graph(cache):
+    def retrieve(state):
+        return {"context": [Document(page_content="Paris is the capital of France.", id="chunk-1")],
+                "messages": [HumanMessage(state["question"])]}
+
+    def generate(state):
+        answer = "Paris."
+        return {"answer": answer, "messages": [AIMessage(answer)], "generations": 1}
+
+    builder = StateGraph(State)
+    builder.add_node("retrieve", retrieve)
+    builder.add_node("generate", cache.wrap_node(generate))
+    builder.add_edge(START, "retrieve")
+    builder.add_edge("retrieve", "generate")
+    builder.add_edge("generate", END)
+    return builder.compile(checkpointer=MemorySaver())
+
+
+def test_hit_replays_the_whole_update():
+    cache = SemanticResponseCache(CountingEmbeddings())
+    graph = build_graph(cache)
+
+    first = graph.invoke({"question": "What is the capital of France?"},
+                         {"configurable": {"thread_id": "a"}})
+    assert first["generations"] == 1
+    assert cache.stats["misses"] == 1
+
+    config = {"configurable": {"thread_id": "b"}}
+    second = graph.invoke({"question": "What is the capital of France?"}, config)
+    assert cache.stats["hits"] == 1
+    assert second["generations"] == 1
+    assert second["answer"] == "Paris."
+    assert [message.type for message in second["messages"]] == ["human", "ai"]
+    assert second["messages"][-1].content == "Paris."
+
+
+def test_hit_appends_messages_in_the_same_thread():
+    cache = SemanticResponseCache(CountingEmbeddings())
+    graph = build_graph(cache)
+    config = {"configurable": {"thread_id": "a"}}
+
+    graph.invoke({"question": "What is the capital of France?"}, config)
+    state = graph.invoke({"question": "What is the capital of France?"}, config)
+
+    assert [message.type for message in state["messages"]] == ["human", "ai", "human", "ai"]
+    assert state["messages"][1].id != state["messages"][3].id
+
+
+def test_embeds_only_for_semantic_lookups():
+    embeddings = CountingEmbeddings()
+    cache = SemanticResponseCache(embeddings)
+
+    assert cache.lookup("What is the capital of France?", ["chunk-1"]) is None
+    cache.store("What is the capital of France?", ["chunk-1"], "Paris.")
+    assert embeddings.calls == 0
+
+    assert cache.lookup("what is the capital   of France?", ["chunk-1"]) == "Paris."
+    assert embeddings.calls == 0
+
+    assert cache.lookup("Capital of France?", ["chunk-1"]) == "Paris."
+    assert embeddings.calls == 2
+
+    assert cache.lookup("Capital of France?", ["chunk-2"]) is None
+    assert embeddings.calls == 2
+
+
+def test_invalidated_chunks_miss():
+    cache = SemanticResponseCache(CountingEmbeddings())
+    cache.store("What is the capital of France?", ["chunk-1"], "Paris.")
+
+    assert cache.invalidate_chunks(["chunk-1"]) == 1
+    assert cache.lookup("What is the capital of France?", ["chunk-1"]) is None
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("langgraph.store.postgres")
+pytest.importorskip("langchain_huggingface")
+
+from langchain_core.embeddings import Embeddings
+
+from easy_langchain_rag.stores.in_memory import InMemoryStoreConfig
+from easy_langchain_rag.stores.transfer import HistoryRecord, embed_fields
+
+
+class LengthEmbeddings(Embeddings):
+    """Embeds a text to a vector filled with its length."""
+
+    def embed_documents(self, texts):
+        return [[float(len(text))] * 4 for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def records(count=3, embedding=(9.0, 9.0, 9.0, 9.0)):
+    created_at = datetime.now(timezone.utc)
+    return [HistoryRecord("user", f"chat_{i}", {"query": "hi", "bot": "hello"}, created_at, embedding)
+            for i in range(count)]
+
+
+def test_embed_fields_embeds_each_field_separately():
+    vectors = embed_fields(records(2), LengthEmbeddings(), ["query", "bot", "missing"], batch_size=3)
+
+    assert [sorted(fields) for fields in vectors] == [["bot", "query"], ["bot", "query"]]
+    assert vectors[0]["query"].tolist() == [2.0] * 4
+    assert vectors[1]["bot"].tolist() == [5.0] * 4
+
+
+def test_import_embeds_every_indexed_field():
+    store = InMemoryStoreConfig(embeddings=LengthEmbeddings(), embedding_fields=["query", "bot"], dims=4)
+
+    assert store.import_history(records(), index=["query", "bot"]) == 3
+
+    vectors = store.store._vectors[("user", "history")]["chat_0"]
+    assert vectors == {"query": [2.0] * 4, "bot": [5.0] * 4}
+
+
+def test_import_reuses_the_exported_vector_of_a_single_field():
+    store = InMemoryStoreConfig(embeddings=LengthEmbeddings(), embedding_fields=["query"], dims=4)
+
+    store.import_history(records(), index=["query"])
+
+    assert store.store._vectors[("user", "history")]["chat_0"] == {"query": [9.0] * 4}
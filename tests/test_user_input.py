@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+from easy_langchain_rag.utils.user_input import merge_overlapping_chunks
+
+
+def chunk(text, start, **metadata):
+    return Document(page_content=text, metadata={"start_index": start, **metadata})
+
+
+def test_merges_overlapping_chunks_of_one_page():
+    documents = [
+        (chunk("The quick brown fox", 0, source="a.pdf", page=0), 0.9),
+        (chunk("brown fox jumps", 10, source="a.pdf", page=0), 0.5),
+    ]
+
+    merged = merge_overlapping_chunks(documents)
+
+    assert len(merged) == 1
+    document, score = merged[0]
+    assert document.page_content == "The quick brown fox jumps"
+    assert score == 0.9
+
+
+def test_never_merges_chunks_of_two_pages_of_one_pdf():
+    # Offsets restart on every page, so these ranges overlap without the text doing so
+    documents = [
+        (chunk("Page one starts here", 0, source="a.pdf", page=0), 0.9),
+        (chunk("Page two starts here", 5, source="a.pdf", page=1), 0.8),
+    ]
+
+    merged = merge_overlapping_chunks(documents)
+
+    assert sorted(document.page_content for document, _ in merged) == [
+        "Page one starts here", "Page two starts here"]
+
+
+def test_never_merges_repeated_text_across_pages():
+    documents = [
+        (Document(page_content="Terms and conditions apply to every order",
+                  metadata={"source": "a.pdf", "page": 0}), 0.9),
+        (Document(page_content="conditions apply to every order placed online",
+                  metadata={"source": "a.pdf", "page": 1}), 0.8),
+    ]
+
+    assert len(merge_overlapping_chunks(documents)) == 2
+
+
+def test_never_merges_chunks_without_source():
+    documents = [
+        (chunk("The quick brown fox", 0), 0.9),
+        (chunk("brown fox jumps", 10), 0.5),
+    ]
+
+    assert len(merge_overlapping_chunks(documents)) == 2
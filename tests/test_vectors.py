@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+pytest.importorskip("langchain_huggingface")
+
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+
+from easy_langchain_rag.vectors import iter_docstore
+
+
+def test_iter_docstore_follows_the_index():
+    vector_store = FAISS.from_texts(["alpha", "beta", "gamma"], DeterministicFakeEmbedding(size=8),
+                                    metadatas=[{"source": "a.txt"}, {"source": "b.txt"}, {"source": "c.txt"}],
+                                    ids=["a", "b", "c"])
+    vector_store.delete(ids=["b"])
+
+    pairs = list(iter_docstore(vector_store))
+
+    assert [(doc_id, document.page_content) for doc_id, document in pairs] == [("a", "alpha"), ("c", "gamma")]